@@ -12,6 +12,8 @@ STARRY_MONO_64 = 1
 STARRY_MONO_128 = 2
 STARRY_SPECTRAL_64 = 4
 STARRY_SPECTRAL_128 = 8
+STARRY_MONO_QUAD = 16
+STARRY_SPECTRAL_QUAD = 32
 
 # Custom compiler flags
 macros = dict(STARRY_NMULTI=32,
@@ -32,8 +34,9 @@ debug = bool(int(os.getenv('STARRY_DEBUG', 0)))
 if debug:
     optimize = 0
 
-# Module bitsum (1 + 2 + 4 + 8 = 15)
-bitsum = int(os.getenv('STARRY_BITSUM', 15))
+# Module bitsum (1 + 2 + 4 + 8 + 16 + 32 = 63)
+# The quad modules are skipped if the compiler doesn't support them
+bitsum = int(os.getenv('STARRY_BITSUM', 63))
 
 class get_pybind_include(object):
     """
@@ -54,7 +57,8 @@ class get_pybind_include(object):
         return pybind11.get_include(self.user)
 
 
-def get_ext(module='starry._starry_mono_64', name='STARRY_MONO_64'):
+def get_ext(module='starry._starry_mono_64', name='STARRY_MONO_64',
+            libraries=[]):
     return Extension(
         module,
         ['starry/pybind_interface.cpp'],
@@ -72,6 +76,7 @@ def get_ext(module='starry._starry_mono_64', name='STARRY_MONO_64'):
             "lib/LBFGSpp/include"
         ],
         language='c++',
+        libraries=libraries,
         define_macros=[(name, 1)]+
                       [(key, value) for key, value in macros.items()]
     )
@@ -86,6 +91,13 @@ if (bitsum & STARRY_SPECTRAL_64):
     ext_modules.append(get_ext('starry._starry_spectral_64', 'STARRY_SPECTRAL_64'))
 if (bitsum & STARRY_SPECTRAL_128):
     ext_modules.append(get_ext('starry._starry_spectral_128', 'STARRY_SPECTRAL_128'))
+if (bitsum & STARRY_MONO_QUAD):
+    ext_modules.append(get_ext('starry._starry_mono_quad', 'STARRY_MONO_QUAD',
+                               libraries=['quadmath']))
+if (bitsum & STARRY_SPECTRAL_QUAD):
+    ext_modules.append(get_ext('starry._starry_spectral_quad',
+                               'STARRY_SPECTRAL_QUAD',
+                               libraries=['quadmath']))
 
 # As of Python 3.6, CCompiler has a `has_flag` method.
 # cf http://bugs.python.org/issue26689
@@ -106,6 +118,32 @@ def has_flag(compiler, flagname):
     return True
 
 
+def has_quadmath(compiler):
+    """
+    Check if the compiler supports `__float128` and `libquadmath`.
+
+    Return a boolean indicating whether the quad modules can be built.
+    """
+    import tempfile
+    import shutil
+    tmpdir = tempfile.mkdtemp()
+    try:
+        source = os.path.join(tmpdir, 'quad.cpp')
+        with open(source, 'w') as f:
+            f.write('extern "C" {\n#include <quadmath.h>\n}\n'
+                    'int main (int argc, char **argv) '
+                    '{ __float128 x = 2; return sqrtq(x) > 1 ? 0 : 1; }')
+        objects = compiler.compile([source], output_dir=tmpdir)
+        compiler.link_executable(objects, os.path.join(tmpdir, 'quad'),
+                                 libraries=['quadmath'])
+    except (setuptools.distutils.errors.CompileError,
+            setuptools.distutils.errors.LinkError):
+        return False
+    finally:
+        shutil.rmtree(tmpdir)
+    return True
+
+
 class BuildExt(build_ext):
     """A custom build extension for adding compiler-specific options."""
 
@@ -133,11 +171,21 @@ class BuildExt(build_ext):
                         self.distribution.get_version())
             if has_flag(self.compiler, '-fvisibility=hidden'):
                 opts.append('-fvisibility=hidden')
+            if has_flag(self.compiler, '-pthread'):
+                opts.append('-pthread')
         elif ct == 'msvc':
             opts.append('/DVERSION_INFO=\\"%s\\"' %
                         self.distribution.get_version())
+        if 'quadmath' in sum([ext.libraries for ext in self.extensions], []):
+            if not has_quadmath(self.compiler):
+                print("warning: `__float128` is not supported by the "
+                      "compiler; not building the quad modules.")
+                self.extensions = [ext for ext in self.extensions
+                                   if 'quadmath' not in ext.libraries]
         for ext in self.extensions:
             ext.extra_compile_args = list(opts + ext.extra_compile_args)
+            if '-pthread' in opts:
+                ext.extra_link_args += ['-pthread']
             ext.extra_compile_args += ["-O%d" % optimize]
             ext.extra_compile_args += ["-Wextra",
                                        "-Wpedantic",
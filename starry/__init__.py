@@ -1,23 +1,101 @@
 # -*- coding: utf-8 -*-
 from ._starry_mono_64 import __version__
-from . import _starry_mono_64, _starry_mono_128, \
-              _starry_spectral_64, _starry_spectral_128
-from . import kepler
+from . import _starry_mono_64
+import importlib
 
 
-# Class factory
-def Map(lmax=2, nwav=1, multi=False):
-    if (nwav == 1) and (not multi):
-        return _starry_mono_64.Map(lmax, nwav)
+# The compiled modules other than `_starry_mono_64`. These are large,
+# so they are only imported the first time they are needed, via
+# `_module` (or `_load`).
+_LAZY_MODULES = ("_starry_mono_128", "_starry_spectral_64",
+                 "_starry_spectral_128")
+
+# The quadruple precision modules, which are only compiled if the
+# compiler supports `__float128`
+_QUAD_MODULES = ("_starry_mono_quad", "_starry_spectral_quad")
+
+# The optional modules that failed to import
+_unavailable = set()
+
+
+def _load(name, optional=False):
+    """
+    Import the compiled module `name` if it hasn't been imported yet
+    and return it. If the module is `optional` and it was not compiled,
+    return None.
+
+    """
+    if name in _unavailable:
+        return None
+    try:
+        return importlib.import_module("." + name, __name__)
+    except ImportError:
+        if not optional:
+            raise
+        _unavailable.add(name)
+        return None
+
+
+def _module(nwav=1, multi=False):
+    """
+    Return the compiled module for `nwav` wavelengths and precision
+    `multi`, or None if the arguments are invalid.
+
+    """
+    if multi not in (False, True, "quad"):
+        raise ValueError("Invalid value for `multi`: %r. Must be one of "
+                         "`False`, `True` or `\"quad\"`." % (multi,))
+    if (nwav >= 1) and (multi == "quad"):
+        return _quad_module(nwav)
+    elif (nwav == 1) and (not multi):
+        return _starry_mono_64
     elif (nwav == 1) and (multi):
-        return _starry_mono_128.Map(lmax, nwav)
+        return _load("_starry_mono_128")
     elif (nwav > 1) and (not multi):
-        return _starry_spectral_64.Map(lmax, nwav)
+        return _load("_starry_spectral_64")
     elif (nwav > 1) and (multi):
-        return _starry_spectral_128.Map(lmax, nwav)
+        return _load("_starry_spectral_128")
     else:
+        return None
+
+
+def _quad_module(nwav):
+    """Return the quadruple precision module for `nwav` wavelengths."""
+    module = _load(_QUAD_MODULES[0] if nwav == 1 else _QUAD_MODULES[1],
+                   optional=True)
+    if module is None:
+        raise ValueError("Quadruple precision is not available: starry "
+                         "was compiled without `__float128` support.")
+    return module
+
+
+from . import kepler
+
+
+# Class factory
+def Map(lmax=2, nwav=1, multi=False):
+    module = _module(nwav, multi)
+    if module is None:
         raise ValueError("Invalid argument(s) to `Map`.")
+    return module.Map(lmax, nwav)
 
 
 # Hack the docstring
 Map.__doc__ = _starry_mono_64.Map.__doc__
+
+
+def cache_info():
+    """
+    Statistics on the change of basis matrices shared by all maps of a
+    given degree. Each precision and map type keeps its own cache, so
+    this returns one dictionary per compiled module; see the
+    :py:obj:`cache_info` function of those modules for details.
+    Note that this imports all of the compiled modules.
+
+    """
+    info = dict(mono_64=_starry_mono_64.cache_info())
+    for name in _LAZY_MODULES + _QUAD_MODULES:
+        module = _load(name, optional=name in _QUAD_MODULES)
+        if module is not None:
+            info[name[len("_starry_"):]] = module.cache_info()
+    return info
@@ -10,10 +10,25 @@ TODO: Use legendre polynomial recurrence relation for numerical stability
 
 #include <iostream>
 #include <cmath>
+#include <cstdint>
+#include <cstdio>
+#include <cstdlib>
+#include <cstring>
+#include <fstream>
+#include <iomanip>
+#include <sstream>
+#include <string>
+#include <type_traits>
 #include <Eigen/Core>
 #include <Eigen/Dense>
+#ifndef _WIN32
+#include <unistd.h>
+#endif
 #include <Eigen/SparseLU>
 #include <limits>
+#include <map>
+#include <memory>
+#include <mutex>
 #include "errors.h"
 #include "utils.h"
 #include "tables.h"
@@ -525,6 +540,153 @@ namespace basis {
         return;
     }
 
+    //! Version of the basis file format
+    static const int64_t BASIS_VERSION = 1;
+
+    //! Version of the library that wrote the basis files
+#ifdef VERSION_INFO
+    static const char* const BASIS_RELEASE = VERSION_INFO;
+#else
+    static const char* const BASIS_RELEASE = "dev";
+#endif
+
+    /**
+    Header of a basis file. It is followed by the six sparse matrices
+    (dimensions, number of nonzeros, outer & inner indices and values)
+    and the three row vectors (size and values).
+
+    */
+    struct BasisHeader {
+        char magic[8];                                                          /**< Always `STARRYBS` */
+        char type[16];                                                          /**< The name of the scalar type */
+        char release[16];                                                       /**< The library version */
+        int64_t version;                                                        /**< The file format version */
+        int64_t lmax;                                                           /**< The highest degree of the map */
+        double norm;                                                            /**< Map normalization constant */
+    };
+
+    //! The name of the scalar type in the basis files
+    template <typename T>
+    inline std::string scalarName() {
+        return "multi" + std::to_string(STARRY_NMULTI);
+    }
+
+    //! The name of the scalar type in the basis files
+    template <>
+    inline std::string scalarName<double>() {
+        return "double";
+    }
+
+#ifdef STARRY_QUAD
+    //! The name of the scalar type in the basis files
+    template <>
+    inline std::string scalarName<Quad>() {
+        return "quad";
+    }
+#endif
+
+    //! Write `n` scalars to a binary stream
+    template <typename T>
+    inline typename std::enable_if<std::is_arithmetic<T>::value, void>::type
+    writeScalars(std::ostream& out, const T* x, int64_t n) {
+        out.write(reinterpret_cast<const char*>(x), n * sizeof(T));
+    }
+
+    /**
+    Write `n` scalars to a binary stream. Multiprecision types may
+    not be copied bytewise, so these are written as text with enough
+    digits to be read back exactly.
+
+    */
+    template <typename T>
+    inline typename std::enable_if<!std::is_arithmetic<T>::value, void>::type
+    writeScalars(std::ostream& out, const T* x, int64_t n) {
+        std::ostringstream os;
+        os << std::scientific
+           << std::setprecision(std::numeric_limits<T>::max_digits10);
+        for (int64_t i = 0; i < n; ++i)
+            os << x[i] << "\n";
+        std::string str = os.str();
+        int64_t len = str.size();
+        out.write(reinterpret_cast<const char*>(&len), sizeof(len));
+        out.write(str.data(), len);
+    }
+
+    //! Read `n` scalars from a binary stream
+    template <typename T>
+    inline typename std::enable_if<std::is_arithmetic<T>::value, bool>::type
+    readScalars(std::istream& in, T* x, int64_t n) {
+        in.read(reinterpret_cast<char*>(x), n * sizeof(T));
+        return bool(in);
+    }
+
+    //! Read `n` scalars written as text from a binary stream
+    template <typename T>
+    inline typename std::enable_if<!std::is_arithmetic<T>::value, bool>::type
+    readScalars(std::istream& in, T* x, int64_t n) {
+        int64_t len;
+        in.read(reinterpret_cast<char*>(&len), sizeof(len));
+        if (!in || (len < 0) || (len > (int64_t(1) << 32)))
+            return false;
+        std::string str(len, ' ');
+        in.read(&str[0], len);
+        if (!in)
+            return false;
+        std::istringstream is(str);
+        for (int64_t i = 0; i < n; ++i)
+            is >> x[i];
+        return bool(is);
+    }
+
+    //! Write a sparse matrix to a binary stream
+    template <typename T>
+    inline void writeSparse(std::ostream& out, Eigen::SparseMatrix<T> M) {
+        M.makeCompressed();
+        int64_t dims[3] = {M.rows(), M.cols(), M.nonZeros()};
+        out.write(reinterpret_cast<const char*>(dims), sizeof(dims));
+        out.write(reinterpret_cast<const char*>(M.outerIndexPtr()),
+                  (M.outerSize() + 1) * sizeof(int));
+        out.write(reinterpret_cast<const char*>(M.innerIndexPtr()),
+                  M.nonZeros() * sizeof(int));
+        writeScalars(out, M.valuePtr(), M.nonZeros());
+    }
+
+    //! Read a sparse matrix from a binary stream
+    template <typename T>
+    inline bool readSparse(std::istream& in, Eigen::SparseMatrix<T>& M) {
+        int64_t dims[3];
+        in.read(reinterpret_cast<char*>(dims), sizeof(dims));
+        if (!in || (dims[0] < 0) || (dims[1] < 0) || (dims[2] < 0) ||
+                (dims[2] > dims[0] * dims[1]))
+            return false;
+        M.resize(dims[0], dims[1]);
+        M.resizeNonZeros(dims[2]);
+        in.read(reinterpret_cast<char*>(M.outerIndexPtr()),
+                (M.outerSize() + 1) * sizeof(int));
+        in.read(reinterpret_cast<char*>(M.innerIndexPtr()),
+                dims[2] * sizeof(int));
+        return in && readScalars(in, M.valuePtr(), dims[2]);
+    }
+
+    //! Write a row vector to a binary stream
+    template <typename T>
+    inline void writeVector(std::ostream& out, const VectorT<T>& v) {
+        int64_t size = v.size();
+        out.write(reinterpret_cast<const char*>(&size), sizeof(size));
+        writeScalars(out, v.data(), size);
+    }
+
+    //! Read a row vector from a binary stream
+    template <typename T>
+    inline bool readVector(std::istream& in, VectorT<T>& v) {
+        int64_t size;
+        in.read(reinterpret_cast<char*>(&size), sizeof(size));
+        if (!in || (size < 0) || (size > (int64_t(1) << 32)))
+            return false;
+        v.resize(size);
+        return readScalars(in, v.data(), size);
+    }
+
     /**
     Basis transform matrices
 
@@ -545,10 +707,19 @@ namespace basis {
             VectorT<T> rTU1;                                                    /**< The rotation vector times the LD change of basis matrix */
             Eigen::SparseMatrix<T> U1;                                          /**< The limb darkening to polynomial change of basis matrix */
             Eigen::SparseMatrix<T> U;                                           /**< The full limb darkening change of basis matrix */
+            bool loaded;                                                        /**< Were the matrices loaded from disk? */
 
-            // Constructor: compute the matrices
-            explicit Basis(int lmax, T norm=2.0 / root_pi<T>()) :
-                    lmax(lmax), norm(norm) {
+            /**
+            Constructor: compute the matrices. If `file` is not empty,
+            the matrices are loaded from it if it holds a basis of the
+            same degree, scalar type, normalization and library version;
+            otherwise they are computed and saved to it.
+
+            */
+            explicit Basis(int lmax, T norm=2.0 / root_pi<T>(),
+                           const std::string& file="") :
+                    lmax(lmax), norm(static_cast<double>(norm)),
+                    loaded(false) {
 
                 /*
                 TODO: Disable spherical harmonic maps above l = 55,
@@ -569,6 +740,11 @@ namespace basis {
                 }
                 */
 
+                if (!file.empty() && load(file)) {
+                    loaded = true;
+                    return;
+                }
+
                 computeA1(lmax, A1, norm);
                 computeA(lmax, A1, A2, A);
                 computeA1Inv(lmax, A1, A1Inv);
@@ -576,10 +752,219 @@ namespace basis {
                 rTA1 = rT * A1;
                 computeU(lmax, A1, A, U1, U, norm);
                 rTU1 = rT * U1;
+
+                if (!file.empty())
+                    save(file);
+            }
+
+            inline bool load(const std::string& file);
+            inline bool save(const std::string& file) const;
+
+            //! The memory held by the matrices in bytes
+            size_t bytes() const {
+                size_t nbytes = 0;
+                for (auto M : {&A1, &A1Inv, &A2, &A, &U1, &U})
+                    nbytes += M->nonZeros() * (sizeof(T) + sizeof(int)) +
+                              (M->outerSize() + 1) * sizeof(int);
+                nbytes += (rT.size() + rTA1.size() + rTU1.size()) * sizeof(T);
+                return nbytes;
             }
 
     };
 
+    /**
+    Load the matrices from `file`. Returns `false` if the file
+    does not exist, is incomplete, or holds a different basis.
+
+    */
+    template <class T>
+    inline bool Basis<T>::load(const std::string& file) {
+        std::ifstream in(file, std::ios::binary);
+        if (!in)
+            return false;
+        BasisHeader header;
+        in.read(reinterpret_cast<char*>(&header), sizeof(header));
+        if (!in)
+            return false;
+        char type[16] = {0};
+        char release[16] = {0};
+        std::strncpy(type, scalarName<T>().c_str(), sizeof(type) - 1);
+        std::strncpy(release, BASIS_RELEASE, sizeof(release) - 1);
+        if ((std::memcmp(header.magic, "STARRYBS", 8) != 0) ||
+                (std::memcmp(header.type, type, sizeof(type)) != 0) ||
+                (std::memcmp(header.release, release, sizeof(release)) != 0) ||
+                (header.version != BASIS_VERSION) || (header.lmax != lmax) ||
+                (header.norm != norm))
+            return false;
+        int N = (lmax + 1) * (lmax + 1);
+        for (auto M : {&A1, &A1Inv, &A2, &A, &U1, &U})
+            if (!readSparse(in, *M))
+                return false;
+        for (auto v : {&rT, &rTA1, &rTU1})
+            if (!readVector(in, *v))
+                return false;
+        if ((rT.size() != N) || (rTA1.size() != N) ||
+                (rTU1.size() != lmax + 1) ||
+                (A1.rows() != N) || (A1.cols() != N) ||
+                (A.rows() != N) || (A.cols() != N) ||
+                (A1Inv.rows() != N) || (A1Inv.cols() != N) ||
+                (U1.rows() != N) || (U1.cols() != lmax + 1) ||
+                (in.peek() != std::ifstream::traits_type::eof()))
+            return false;
+        return true;
+    }
+
+    /**
+    Save the matrices to `file`. The basis is written to a temporary
+    file, which is then renamed, so that other processes never see an
+    incomplete basis. Returns `false` if the file could not be written.
+
+    */
+    template <class T>
+    inline bool Basis<T>::save(const std::string& file) const {
+#ifndef _WIN32
+        std::string tmp = file + ".tmp" + std::to_string(getpid());
+#else
+        std::string tmp = file + ".tmp";
+#endif
+        BasisHeader header;
+        std::memset(&header, 0, sizeof(header));
+        std::memcpy(header.magic, "STARRYBS", 8);
+        std::strncpy(header.type, scalarName<T>().c_str(),
+                     sizeof(header.type) - 1);
+        std::strncpy(header.release, BASIS_RELEASE,
+                     sizeof(header.release) - 1);
+        header.version = BASIS_VERSION;
+        header.lmax = lmax;
+        header.norm = norm;
+        std::ofstream out(tmp, std::ios::binary);
+        out.write(reinterpret_cast<const char*>(&header), sizeof(header));
+        for (auto M : {&A1, &A1Inv, &A2, &A, &U1, &U})
+            writeSparse(out, *M);
+        for (auto v : {&rT, &rTA1, &rTU1})
+            writeVector(out, *v);
+        out.close();
+        if (!out || std::rename(tmp.c_str(), file.c_str())) {
+            std::remove(tmp.c_str());
+            return false;
+        }
+        return true;
+    }
+
+    /**
+    Statistics of the `Basis` cache
+
+    */
+    struct CacheInfo {
+        size_t hits;                                                            /**< Number of lookups served from the cache */
+        size_t misses;                                                          /**< Number of lookups that computed a new basis */
+        size_t loads;                                                           /**< Number of misses served from the disk cache */
+        size_t entries;                                                         /**< Number of bases currently alive */
+        size_t bytes;                                                           /**< Memory held by the live bases */
+    };
+
+    /**
+    A process-wide registry of `Basis` instances, one per `lmax`.
+
+    The change of basis matrices depend only on `lmax` and the scalar
+    type, and they are never modified once computed, so all maps of a
+    given degree share a single read-only copy. The registry only holds
+    weak references: a basis is freed when the last map using it goes
+    away, and is recomputed the next time it is needed.
+
+    If the `STARRY_CACHE_DIR` environment variable is set, the bases
+    are also cached on disk in that directory, so that they are
+    computed only once across processes. The files are keyed by the
+    degree, the scalar type and the library version.
+
+    */
+    template <class T>
+    class BasisCache {
+
+        protected:
+
+            std::mutex mutex;                                                   /**< Guards the registry */
+            std::map<int, std::weak_ptr<const Basis<T>>> bases;                 /**< The cached bases, by `lmax` */
+            size_t hits;                                                        /**< Number of cache hits */
+            size_t misses;                                                      /**< Number of cache misses */
+            size_t loads;                                                       /**< Number of misses loaded from disk */
+
+            BasisCache() : hits(0), misses(0), loads(0) {}
+
+            //! The basis file in the disk cache (empty if disabled)
+            std::string file(int lmax) {
+                const char* dir = std::getenv("STARRY_CACHE_DIR");
+                if ((dir == nullptr) || (*dir == '\0'))
+                    return "";
+                char buf[128];
+                snprintf(buf, sizeof(buf), "starry_basis_%s_l%d_v%d_%s.bin",
+                         scalarName<T>().c_str(), lmax, int(BASIS_VERSION),
+                         BASIS_RELEASE);
+                return std::string(dir) + "/" + buf;
+            }
+
+        public:
+
+            //! The (per-scalar type) instance of the cache
+            static BasisCache& instance() {
+                static BasisCache cache;
+                return cache;
+            }
+
+            //! Get the basis for a given `lmax`, computing it if needed
+            std::shared_ptr<const Basis<T>> get(int lmax) {
+                std::lock_guard<std::mutex> lock(mutex);
+                std::shared_ptr<const Basis<T>> basis = bases[lmax].lock();
+                if (basis) {
+                    ++hits;
+                } else {
+                    ++misses;
+                    basis = std::make_shared<const Basis<T>>(
+                                lmax, 2.0 / root_pi<T>(), file(lmax));
+                    if (basis->loaded)
+                        ++loads;
+                    bases[lmax] = basis;
+                }
+                return basis;
+            }
+
+            //! Statistics on the cache usage
+            CacheInfo info() {
+                std::lock_guard<std::mutex> lock(mutex);
+                CacheInfo info {hits, misses, loads, 0, 0};
+                for (auto it = bases.begin(); it != bases.end(); ) {
+                    std::shared_ptr<const Basis<T>> basis = it->second.lock();
+                    if (basis) {
+                        ++info.entries;
+                        info.bytes += basis->bytes();
+                        ++it;
+                    } else {
+                        it = bases.erase(it);
+                    }
+                }
+                return info;
+            }
+
+    };
+
+    /**
+    Get the shared `Basis` instance for a given `lmax`
+
+    */
+    template <class T>
+    inline std::shared_ptr<const Basis<T>> getBasis(int lmax) {
+        return BasisCache<T>::instance().get(lmax);
+    }
+
+    /**
+    Statistics on the usage of the shared `Basis` instances
+
+    */
+    template <class T>
+    inline CacheInfo cacheInfo() {
+        return BasisCache<T>::instance().info();
+    }
+
 } // namespace basis
 } // namespace starry
 
@@ -19,6 +19,22 @@ namespace docstrings {
             with a sleek Python interface.
         )pbdoc";
 
+        const char* cache_info = R"pbdoc(
+            Statistics on the change of basis matrices shared by all maps
+            of a given degree. These are computed once for each value of
+            :py:obj:`lmax` and freed when the last map using them is
+            deleted. If the :py:obj:`STARRY_CACHE_DIR` environment variable
+            is set, they are also saved to that directory the first time
+            they are computed and loaded from it afterwards, including by
+            other processes.
+
+            Returns:
+                A dictionary with the number of :py:obj:`hits` and
+                :py:obj:`misses` of the cache, the number of misses that were
+                :py:obj:`loads` from disk, the number of :py:obj:`entries`
+                currently alive and the memory they hold in :py:obj:`bytes`.
+        )pbdoc";
+
     }
 
     namespace Map {
@@ -71,6 +87,16 @@ namespace docstrings {
             **experimental**, so please raise an issue on GitHub if you run
             into any trouble.
 
+            .. note:: The methods :py:meth:`flux()`, :py:meth:`__call__()`,
+                :py:meth:`show()` and :py:meth:`animate()` release the Python
+                global interpreter lock (GIL) while the light curve or image
+                is being computed, so separate :py:obj:`Map` instances may be
+                used concurrently from different Python threads. A single
+                map instance is **not** thread-safe: it must not be evaluated
+                or modified from more than one thread at a time. To
+                parallelize the computation of a single light curve, use the
+                :py:obj:`threads` keyword of :py:meth:`flux()` instead.
+
             Args:
                 lmax (int): Largest spherical harmonic degree \
                     in the surface map. Default 2.
@@ -79,10 +105,16 @@ namespace docstrings {
                     calculations? Default :py:obj:`False`. If :py:obj:`True`, \
                     defaults to 32-digit (approximately 128-bit) floating \
                     point precision. This can be adjusted by changing the \
-                    :py:obj:`STARRY_NMULTI` compiler macro.
+                    :py:obj:`STARRY_NMULTI` compiler macro. If \
+                    :py:obj:`"quad"`, uses the binary quadruple precision \
+                    (113-bit) type of the compiler, which is about as \
+                    accurate and several times faster. This requires \
+                    compiler support for :py:obj:`__float128`.
 
             .. automethod:: __call__(theta=0, x=0, y=0)
-            .. automethod:: flux(theta=0, xo=0, yo=0, ro=0, gradient=False)
+            .. automethod:: flux(theta=0, xo=0, yo=0, ro=0, gradient=False, threads=1)
+            .. automethod:: design_matrix(theta=0, xo=0, yo=0, ro=0)
+            .. automethod:: flux_batch(Y, theta=0, xo=0, yo=0, ro=0)
             .. automethod:: rotate(theta=0)
             .. automethod:: show(cmap='plasma', res=300)
             .. automethod:: animate(cmap='plasma', res=150, frames=50, interval=75, gif='')
@@ -90,6 +122,7 @@ namespace docstrings {
             .. automethod:: load_healpix(image, lmax=None)
             .. automethod:: add_gaussian(sigma=0.1, amp=1, lat=0, lon=0, lmax=None)
             .. automethod:: reset()
+            .. automethod:: tabulate(rmax, tol=1e-10, res=256, path='')
             .. autoattribute:: lmax
             .. autoattribute:: nwav
             .. autoattribute:: multi
@@ -101,6 +134,7 @@ namespace docstrings {
             .. autoattribute:: r
             .. autoattribute:: s
             .. autoattribute:: axis
+            .. autoattribute:: escalate
         )pbdoc";
 
         const char* reset = R"pbdoc(
@@ -126,7 +160,9 @@ namespace docstrings {
         )pbdoc";
 
         const char* multi = R"pbdoc(
-            Are calculations done using multi-precision? *Read-only.*
+            Are calculations done using multi-precision? This is
+            :py:obj:`"quad"` for maps using the binary quadruple
+            precision type. *Read-only.*
         )pbdoc";
 
         const char* y = R"pbdoc(
@@ -222,6 +258,12 @@ namespace docstrings {
             Computes the total flux received by the observer
             during or outside of an occultation.
 
+            Outside of occultation, the flux is a trigonometric polynomial
+            of degree :py:obj:`lmax` in :py:obj:`theta`. Its Fourier
+            coefficients are computed once for a given set of map
+            coefficients and rotation axis, so phase curves with many
+            samples are cheap to evaluate.
+
             Args:
                 theta (float or ndarray): Angle of rotation. Default 0.
                 xo (float or ndarray): The :py:obj:`x` position of the \
@@ -232,6 +274,14 @@ namespace docstrings {
                     body's radius. Default 0 (no occultation).
                 gradient (bool): Compute and return the gradient of the \
                     flux as well? Default :py:obj:`False`.
+                threads (int): Number of threads over which to split the \
+                    evaluation of array inputs. Each thread operates on its \
+                    own private copy of the map, so the result is identical \
+                    to that of the serial computation. The copies are kept \
+                    and reused in subsequent calls. If zero or negative, \
+                    uses all available cores. Fewer threads are used if \
+                    there are fewer than :py:obj:`STARRY_MIN_THREAD_CHUNK` \
+                    (default 32) points per thread. Default 1.
 
             Returns:
                 The flux received by the observer (a scalar or a vector). \
@@ -243,6 +293,60 @@ namespace docstrings {
                 and each of the map coefficients.
         )pbdoc";
 
+        const char* design_matrix = R"pbdoc(
+            Return the design matrix of the flux.
+            Since the flux is linear in the spherical harmonic coefficients,
+            the light curve of the map may be written as :py:obj:`X.dot(y)`,
+            where :py:obj:`X` is the design matrix, whose rows are the
+            derivatives of the flux at each point with respect to the
+            coefficients. This allows the map coefficients to be fit by
+            linear least squares.
+
+            .. note:: The design matrix is not available for limb-darkened \
+                maps, since their flux is not linear in the coefficients.
+
+            Args:
+                theta (float or ndarray): Angle of rotation. Default 0.
+                xo (float or ndarray): The :py:obj:`x` position of the \
+                    occultor (if any). Default 0.
+                yo (float or ndarray): The :py:obj:`y` position of the \
+                    occultor (if any). Default 0.
+                ro (float): The radius of the occultor in units of this \
+                    body's radius. Default 0 (no occultation).
+
+            Returns:
+                The design matrix, an array of shape :py:obj:`(npts, N)`, \
+                where :py:obj:`npts` is the size of the broadcast inputs.
+        )pbdoc";
+
+        const char* flux_batch = R"pbdoc(
+            Return the light curves of many maps with the same geometry.
+            Column :py:obj:`k` of the result is the flux of a map with
+            spherical harmonic coefficients :py:obj:`Y[:, k]`. The rotation
+            and the occultation solution are computed once per point, so
+            this is much faster than evaluating each map separately and is
+            useful for evaluating ensembles of maps, such as posterior
+            samples. The rotation axis is that of this map.
+
+            .. note:: This is not available for limb-darkened \
+                maps, since their flux is not linear in the coefficients.
+
+            Args:
+                Y (ndarray): The spherical harmonic coefficients of the \
+                    maps, an array of shape :py:obj:`(N, K)`.
+                theta (float or ndarray): Angle of rotation. Default 0.
+                xo (float or ndarray): The :py:obj:`x` position of the \
+                    occultor (if any). Default 0.
+                yo (float or ndarray): The :py:obj:`y` position of the \
+                    occultor (if any). Default 0.
+                ro (float): The radius of the occultor in units of this \
+                    body's radius. Default 0 (no occultation).
+
+            Returns:
+                The light curves, an array of shape :py:obj:`(npts, K)`, \
+                where :py:obj:`npts` is the size of the broadcast inputs.
+        )pbdoc";
+
         const char* rotate = R"pbdoc(
             Rotate the base map an angle :py:obj:`theta` about :py:obj:`axis`.
             This performs a permanent rotation to the base map. Subsequent
@@ -274,6 +378,46 @@ namespace docstrings {
                     numerical solver. Default 100
         )pbdoc";
 
+        const char* tabulate = R"pbdoc(
+            Tabulate the occultation solution vectors to speed up the
+            computation of occultation light curves. The solution vector
+            and its derivatives are computed once on a grid in the impact
+            parameter and the occultor radius and then interpolated with
+            bicubic Hermite polynomials. Close to the lines along which the
+            solution is not smooth (:math:`b = 1 \pm r` and :math:`b = r`),
+            in grid cells where the interpolant does not match the exact
+            solution to within :py:obj:`tol`, and for occultors larger
+            than :py:obj:`rmax`, the exact solution is computed instead.
+            The tables are computed the first time they are needed.
+
+            Args:
+                rmax (float): The largest occultor radius in the tables. \
+                    If zero, any existing tables are discarded.
+                tol (float): The largest error in the solution vector. \
+                    Derivatives are accurate to :py:obj:`4 * tol * res`. \
+                    Default :math:`10^{-10}`
+                res (int): The number of grid points per unit length in \
+                    the impact parameter and the occultor radius. Default 256
+                path (str): If set, the tables are saved to this directory \
+                    and memory-mapped, so that maps with the same settings \
+                    share them, even across processes. Default \
+                    :py:obj:`''` (not saved)
+        )pbdoc";
+
+        const char* escalate = R"pbdoc(
+            Recompute ill-conditioned occultations in multiprecision?
+            The spherical harmonic solution vector loses precision for
+            occultors with :math:`0.35 < r < 1.3` that are centered
+            close to the center of the map (:math:`b < 0.8`); the error
+            in this region grows quickly with the degree of the map and
+            can exceed :math:`10^{-4}` at :math:`l = 15` in double
+            precision. If :py:obj:`True`, the solution vector is
+            computed in multiprecision in this region only, and in double
+            precision everywhere else. Gradients are always computed in
+            the precision of the map. Only available for double precision
+            maps. Default :py:obj:`False`.
+        )pbdoc";
+
         const char* show = R"pbdoc(
             Convenience routine to quickly display the body's surface map.
 
@@ -588,14 +732,29 @@ namespace docstrings {
                 secondaries (:py:class:`Secondary`): The secondary body, or \
                     a sequence of secondaries.
 
+            .. note:: :py:meth:`compute()` releases the Python global
+                interpreter lock (GIL), so independent systems may be
+                computed concurrently from different Python threads.
+                Since :py:meth:`compute()` modifies the state of all of
+                the bodies in the system, two systems computed
+                concurrently must not share any :py:class:`Primary` or
+                :py:class:`Secondary` instances, and bodies must not be
+                modified while their system is being computed.
+
             .. autoattribute:: primary
             .. autoattribute:: secondaries
-            .. automethod:: compute(time, gradient=False)
+            .. automethod:: compute(time, gradient=False, exposure_time=None)
+            .. automethod:: design_matrix(time, body)
+            .. automethod:: compute_batch(time, params, names, exposure_time=None, threads=1)
+            .. automethod:: positions(time, gradient=False)
             .. autoattribute:: lightcurve
             .. autoattribute:: gradient
             .. autoattribute:: exposure_time
             .. autoattribute:: exposure_tol
             .. autoattribute:: exposure_max_depth
+            .. autoattribute:: exposure_mode
+            .. autoattribute:: exposure_order
+            .. autoattribute:: fold_tol
 
         )pbdoc";
 
@@ -617,10 +776,110 @@ namespace docstrings {
             store it in the :py:attr:`gradient` attribute of the system
             and each of the body instances.
 
+            If neither the time array nor the parameters of the primary
+            changed since the last call, the light curve is updated
+            incrementally: only the orbits of the secondaries whose
+            parameters changed are recomputed, and only the light curves
+            of the bodies whose maps or luminosities changed, or that
+            overlap with a body whose orbit changed, are recomputed. All
+            other light curves are reused. If only the maps changed, the
+            light curve of a body without limb darkening is a single
+            matrix-vector product with a cached design matrix
+            (see :py:meth:`design_matrix`).
+
             Args:
                 time (ndarray): Time array, measured in days.
                 gradient (bool): Compute the gradient of the light curve \
                     with respect to all body parameters? Default :py:obj:`False`
+                exposure_time (float or ndarray): The exposure time of each \
+                    point in days, for datasets with mixed cadences. \
+                    Overrides :py:attr:`exposure_time` for this call. \
+                    Default :py:obj:`None`
+        )pbdoc";
+
+        const char* compute_batch = R"pbdoc(
+            Compute the system light curve for many sets of parameters.
+            This is equivalent to setting the parameters of the bodies
+            and calling :py:meth:`compute` once for each row of
+            :py:obj:`params`, but the loop runs in C++ and may be split
+            among several threads. Each thread works on its own copy of
+            the system, so the attributes and light curves of the bodies
+            are not modified. This is compatible with the
+            :py:obj:`vectorize=True` mode of :py:obj:`emcee`.
+
+            Args:
+                time (ndarray): Time array, measured in days.
+                params (ndarray): The parameter sets, an array of shape \
+                    :py:obj:`(nsets, nparams)`.
+                names (list): The names of the :py:obj:`nparams` parameters, \
+                    as in :py:attr:`gradient`: the letter of the body \
+                    (:py:obj:`A` for the primary, :py:obj:`b`, :py:obj:`c`, \
+                    ... for the secondaries), a period, and the name of \
+                    the attribute, such as :py:obj:`b.inc`. The limb \
+                    darkening coefficients are :py:obj:`u1`, \
+                    :py:obj:`u2`, ... and the spherical harmonic \
+                    coefficients are :py:obj:`Y_{l,m}`, such as \
+                    :py:obj:`b.Y_{1,-1}`.
+                exposure_time (float or ndarray): The exposure time of each \
+                    point in days. Default :py:obj:`None`, in which case \
+                    :py:attr:`exposure_time` is used.
+                threads (int): The number of threads. If zero or negative, \
+                    use all available cores. Default 1.
+
+            Returns:
+                The light curves, an array of shape \
+                :py:obj:`(nsets, len(time))` (or \
+                :py:obj:`(nsets, len(time), nwav)` for spectral maps).
+        )pbdoc";
+
+        const char* design_matrix = R"pbdoc(
+            Return the design matrix of one of the bodies in the system.
+            This is the matrix :py:obj:`X` such that the light curve of
+            :py:obj:`body` at the times given by the :py:obj:`time` array
+            is :py:obj:`L * X.dot(y)`, where :py:obj:`L` is the luminosity
+            of the body and :py:obj:`y` is its vector of spherical harmonic
+            coefficients. The design matrix includes the occultations of the
+            body by all other bodies in the system, so the map coefficients
+            may be fit by linear least squares.
+
+            .. note:: The design matrix is not available for bodies with
+                limb darkening or for finite exposure times.
+
+            Args:
+                time (ndarray): Time array, measured in days.
+                body: The :py:class:`Primary` or :py:class:`Secondary` \
+                    instance whose design matrix should be computed.
+
+            Returns:
+                The design matrix, an array of shape \
+                :py:obj:`(len(time), N)`.
+        )pbdoc";
+
+        const char* positions = R"pbdoc(
+            Compute the sky positions of the secondaries.
+            Solve only for the orbits of all the secondary bodies at
+            the times given by the :py:obj:`time` array, without
+            computing any fluxes. This is much faster than
+            :py:meth:`compute` when only the positions are needed, e.g.,
+            to find transit windows. The light travel time delay is
+            included.
+
+            Args:
+                time (ndarray): Time array, measured in days.
+                gradient (bool): Compute the gradient of the positions \
+                    with respect to the time and the orbital parameters of \
+                    each secondary? Default :py:obj:`False`
+
+            Returns:
+                The Cartesian positions :py:obj:`X`, :py:obj:`Y` and \
+                :py:obj:`Z` of the secondaries in units of the primary's \
+                radius, each of shape (:py:obj:`len(time)`, \
+                :py:obj:`len(secondaries)`). If :py:obj:`gradient` is \
+                :py:obj:`True`, returns the tuple :py:obj:`(X, Y, Z)` and \
+                a dictionary with keys :py:obj:`X`, :py:obj:`Y` and \
+                :py:obj:`Z`, each a dictionary of derivatives with respect \
+                to the time and the parameters of each secondary, named as \
+                in :py:attr:`gradient`.
         )pbdoc";
 
         const char* lightcurve = R"pbdoc(
@@ -657,6 +916,46 @@ namespace docstrings {
             run times).
         )pbdoc";
 
+        const char* exposure_mode = R"pbdoc(
+            The exposure time integration scheme. One of :py:obj:`adaptive`
+            (default), :py:obj:`gauss`, :py:obj:`supersample` or
+            :py:obj:`contact`. The :py:obj:`adaptive` scheme recursively
+            subdivides each exposure until the tolerance
+            :py:attr:`exposure_tol` is met. The :py:obj:`gauss` scheme uses
+            a Gauss-Legendre quadrature rule with :py:attr:`exposure_order`
+            points, and the :py:obj:`supersample` scheme averages the flux
+            at :py:attr:`exposure_order` evenly spaced times within each
+            exposure. The :py:obj:`contact` scheme first finds the contact
+            points of all occultations within each exposure and splits the
+            exposure there. The flux is smooth on each piece, so a
+            Gauss-Legendre rule with :py:attr:`exposure_order` points per
+            piece is very accurate. These fixed-order schemes have a
+            predictable cost and evaluate all the sub-exposure times in a
+            single vectorized pass when the gradient is not requested.
+        )pbdoc";
+
+        const char* exposure_order = R"pbdoc(
+            Number of points per exposure in the :py:obj:`gauss` and
+            :py:obj:`supersample` exposure time integration schemes, and
+            per piece of each exposure in the :py:obj:`contact` scheme.
+            Default 5.
+        )pbdoc";
+
+        const char* fold_tol = R"pbdoc(
+            Tolerance of the phase-folded light curve. Default 0 (disabled).
+            If nonzero, and the light curve is strictly periodic in the
+            orbital period, :py:meth:`compute` computes the flux during
+            transits and eclipses over a single orbit only, and maps all
+            epochs onto it. The folded light curve is interpolated between
+            the contact points to within this tolerance. This is
+            much faster for long datasets spanning many orbits. Gradients
+            are supported. The light curve is strictly periodic if there is
+            a single secondary and the maps of both bodies are uniform
+            (limb darkening is allowed). If the gradient is requested, the
+            bodies must also not rotate. Otherwise, and for finite exposure
+            times, this setting is ignored.
+        )pbdoc";
+
     }
 }
 
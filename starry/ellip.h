@@ -40,6 +40,15 @@ namespace ellip {
     template <>
     inline Multi tol(){ return tol_Multi; }
 
+#ifdef STARRY_QUAD
+    using utils::Quad;
+    static const Quad tol_Quad = sqrt(std::numeric_limits<Quad>::epsilon());
+
+    //! Elliptic integral convergence tolerance (quadruple precision)
+    template <>
+    inline Quad tol(){ return tol_Quad; }
+#endif
+
     /**
     Complete elliptic integral of the first kind
 
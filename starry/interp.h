@@ -0,0 +1,552 @@
+/**
+Tabulated occultation solution vectors.
+
+The solution vector `s^T(b, r)` and its derivatives are computed once
+on a regular grid in `b` and `r` and interpolated with bicubic Hermite
+polynomials. Cells that straddle one of the lines along which `s^T` is
+not smooth (b = 1 - r, b = 1 + r, b = r - 1 and b = r) or in which the
+interpolant does not match the exact solution to within a tolerance
+are flagged, and lookups there fall back to the exact solver. Tables
+may be saved to disk, in which case they are memory-mapped so that
+different processes share a single read-only copy.
+
+*/
+
+#ifndef _STARRY_INTERP_H_
+#define _STARRY_INTERP_H_
+
+#include <cmath>
+#include <cstdint>
+#include <cstdio>
+#include <cstring>
+#include <fstream>
+#include <functional>
+#include <mutex>
+#include <string>
+#include <vector>
+#include <Eigen/Core>
+#ifndef _WIN32
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#endif
+#include "errors.h"
+#include "utils.h"
+
+namespace starry {
+namespace interp {
+
+    using namespace utils;
+    using std::abs;
+    using std::isfinite;
+    using std::max;
+    using std::min;
+
+    //! Version of the table file format
+    static const int64_t TABLE_VERSION = 1;
+
+    /**
+    Header of a table file. It is followed by the cell mask (one byte
+    per cell, padded to a multiple of eight bytes) and by the node data.
+
+    */
+    struct TableHeader {
+        char magic[8];                                                          /**< Always `STARRYTB` */
+        char name[8];                                                           /**< The name of the solver */
+        int64_t version;                                                        /**< The file format version */
+        int64_t K;                                                              /**< The size of the solution vector */
+        int64_t res;                                                            /**< The number of grid points per unit length */
+        int64_t nb;                                                             /**< The number of cells along `b` */
+        int64_t nr;                                                             /**< The number of cells along `r` */
+        double rmax;                                                            /**< The largest tabulated occultor radius */
+        double tol;                                                             /**< The tolerance on the solution vector */
+    };
+
+    /**
+    Cubic Hermite basis functions at `u` in [0, 1] and their
+    derivatives. The first two multiply the values at `u = 0` and
+    `u = 1`, the last two the derivatives there.
+
+    */
+    inline void hermite(const double& u, double* h, double* dh) {
+        double u2 = u * u;
+        double u3 = u2 * u;
+        h[0] = 2 * u3 - 3 * u2 + 1;
+        h[1] = 3 * u2 - 2 * u3;
+        h[2] = u3 - 2 * u2 + u;
+        h[3] = u3 - u2;
+        dh[0] = 6 * (u2 - u);
+        dh[1] = 6 * (u - u2);
+        dh[2] = 3 * u2 - 4 * u + 1;
+        dh[3] = 3 * u2 - 2 * u;
+    }
+
+    /**
+    Interpolation weights of the four node quantities (`s^T` and its
+    `b`, `r` and cross derivatives) at the four corners of a cell
+
+    */
+    struct Weights {
+        const double* node[4];                                                  /**< The node data at the corners */
+        double w[4][4];                                                         /**< Weights for `s^T` */
+        double wb[4][4];                                                        /**< Weights for `ds^T / db` */
+        double wr[4][4];                                                        /**< Weights for `ds^T / dr` */
+    };
+
+    /**
+    A table of the solution vector `s^T(b, r)` and its derivatives.
+
+    The grid spacing is `h = 1 / res` in both `b` and `r`; the grid
+    spans 0 <= b <= 1 + rmax and h <= r <= rmax. Each node stores
+    `s^T`, `ds^T / db`, `ds^T / dr` and the cross derivative, which
+    is computed by finite differences. The table is computed (or
+    loaded from disk) the first time it is needed; after that it is
+    read-only, so it may be shared by several maps and threads.
+
+    */
+    class Table {
+
+        public:
+
+            //! The exact solver: `solver(b, r, sT, dsTdb, dsTdr)`
+            typedef std::function<void(double, double, VectorT<double>&,
+                                       VectorT<double>&,
+                                       VectorT<double>&)> Solver;
+
+            const std::string name;                                             /**< The name of the solver */
+            const int K;                                                        /**< The size of the solution vector */
+            const double rmax;                                                  /**< The largest tabulated occultor radius */
+            const double tol;                                                   /**< The tolerance on the solution vector */
+            const int res;                                                      /**< The number of grid points per unit length */
+            const std::string file;                                             /**< The table file (empty if not saved) */
+
+        protected:
+
+            Solver solver;                                                      /**< The exact solver */
+            double h;                                                           /**< The grid spacing */
+            int nb;                                                             /**< The number of cells along `b` */
+            int nr;                                                             /**< The number of cells along `r` */
+            const unsigned char* mask;                                          /**< Is the interpolant valid in each cell? */
+            const double* data;                                                 /**< The node data */
+            std::vector<unsigned char> mask_buf;                                /**< In-memory cell mask */
+            std::vector<double> data_buf;                                       /**< In-memory node data */
+            void* addr;                                                         /**< Address of the memory-mapped file */
+            size_t length;                                                      /**< Size of the memory-mapped file */
+            std::once_flag initialized;                                         /**< Has the table been computed? */
+
+            inline size_t maskBytes() const;
+            inline size_t fileBytes() const;
+            inline bool singular(int i, int j) const;
+            inline void weights(int i, int j, double u, double v,
+                                Weights& W, bool gradient) const;
+            inline double interpolate(const Weights& W,
+                                      const double (&w)[4][4], int n) const;
+            inline bool exact(double b, double r, VectorT<double>& sT,
+                              VectorT<double>& dsTdb, VectorT<double>& dsTdr);
+            inline bool validate(int i, int j);
+            inline void init();
+            inline void build();
+            inline void save() const;
+            inline bool load();
+            inline void unload();
+
+        public:
+
+            Table(const std::string& name, int K, double rmax, double tol,
+                  int res, const std::string& file, Solver solver) :
+                name(name),
+                K(K),
+                rmax(rmax),
+                tol(tol),
+                res(res),
+                file(file),
+                solver(solver),
+                h(1.0 / res),
+                nb(static_cast<int>(std::ceil((1 + rmax) * res))),
+                nr(static_cast<int>(std::ceil((rmax - h) * res))),
+                mask(nullptr),
+                data(nullptr),
+                addr(nullptr),
+                length(0) {
+                    if (name.size() > 8)
+                        throw errors::ValueError("Invalid table name.");
+                    if ((tol <= 0) || (res < 1) || (nr < 1))
+                        throw errors::ValueError("Invalid table dimensions.");
+                }
+
+            ~Table() {
+                unload();
+            }
+
+            Table(const Table&) = delete;
+            Table& operator=(const Table&) = delete;
+
+            template <typename U>
+            inline bool compute(const U& b_, const U& r_, VectorT<U>& sT,
+                                VectorT<U>& dsTdb, VectorT<U>& dsTdr,
+                                bool gradient=false);
+
+    };
+
+    //! Size of the cell mask in bytes (a multiple of eight)
+    inline size_t Table::maskBytes() const {
+        size_t bytes = static_cast<size_t>(nb) * nr;
+        return 8 * ((bytes + 7) / 8);
+    }
+
+    //! Size of the table file in bytes
+    inline size_t Table::fileBytes() const {
+        return sizeof(TableHeader) + maskBytes() +
+               sizeof(double) * 4 * K * (nb + 1) * (nr + 1);
+    }
+
+    /**
+    Does cell (`i`, `j`) touch one of the lines along which
+    the solution vector is not smooth?
+
+    */
+    inline bool Table::singular(int i, int j) const {
+        // The lines are `alpha * b + beta * r + gamma = 0`
+        static const double lines[4][3] = {{1, 1, -1}, {1, -1, -1},
+                                           {-1, 1, -1}, {1, -1, 0}};
+        double b = i * h;
+        double r = (j + 1) * h;
+        for (int n = 0; n < 4; ++n) {
+            double g = lines[n][0] * b + lines[n][1] * r + lines[n][2];
+            double lo = g + h * (min(lines[n][0], 0.0) +
+                                 min(lines[n][1], 0.0));
+            double hi = g + h * (max(lines[n][0], 0.0) +
+                                 max(lines[n][1], 0.0));
+            if ((lo <= 0) && (hi >= 0))
+                return true;
+        }
+        return false;
+    }
+
+    /**
+    Compute the interpolation weights in cell (`i`, `j`) at
+    fractional coordinates (`u`, `v`). The weights of the
+    derivatives are only computed if `gradient` is set.
+
+    */
+    inline void Table::weights(int i, int j, double u, double v,
+                               Weights& W, bool gradient) const {
+        double hb[4], dhb[4], hr[4], dhr[4];
+        hermite(u, hb, dhb);
+        hermite(v, hr, dhr);
+        for (int c = 0; c < 4; ++c) {
+            int ci = c & 1;
+            int cj = c >> 1;
+            W.node[c] = data + 4 * K * ((j + cj) * (nb + 1) + i + ci);
+            W.w[c][0] = hb[ci] * hr[cj];
+            W.w[c][1] = h * hb[2 + ci] * hr[cj];
+            W.w[c][2] = h * hb[ci] * hr[2 + cj];
+            W.w[c][3] = h * h * hb[2 + ci] * hr[2 + cj];
+            if (gradient) {
+                W.wb[c][0] = res * dhb[ci] * hr[cj];
+                W.wb[c][1] = dhb[2 + ci] * hr[cj];
+                W.wb[c][2] = dhb[ci] * hr[2 + cj];
+                W.wb[c][3] = h * dhb[2 + ci] * hr[2 + cj];
+                W.wr[c][0] = res * hb[ci] * dhr[cj];
+                W.wr[c][1] = hb[2 + ci] * dhr[cj];
+                W.wr[c][2] = hb[ci] * dhr[2 + cj];
+                W.wr[c][3] = h * hb[2 + ci] * dhr[2 + cj];
+            }
+        }
+    }
+
+    //! Weighted sum of the node quantities for element `n`
+    inline double Table::interpolate(const Weights& W,
+                                     const double (&w)[4][4], int n) const {
+        double f = 0;
+        for (int c = 0; c < 4; ++c) {
+            for (int q = 0; q < 4; ++q)
+                f += w[c][q] * W.node[c][q * K + n];
+        }
+        return f;
+    }
+
+    /**
+    Evaluate the exact solver at (`b`, `r`). Returns `false` if
+    the solver fails or if the result is not finite.
+
+    */
+    inline bool Table::exact(double b, double r, VectorT<double>& sT,
+                             VectorT<double>& dsTdb,
+                             VectorT<double>& dsTdr) {
+        try {
+            solver(b, r, sT, dsTdb, dsTdr);
+        } catch (...) {
+            return false;
+        }
+        return sT.allFinite() && dsTdb.allFinite() && dsTdr.allFinite();
+    }
+
+    /**
+    Check that the interpolant in cell (`i`, `j`) matches the exact
+    solution to within `tol` at the center of the cell and halfway
+    between the center and each corner. The error in the derivatives
+    of a cubic Hermite interpolant is about `3 / h` times the error in
+    its value, so we require the derivatives to match to `4 * tol * res`.
+
+    */
+    inline bool Table::validate(int i, int j) {
+        static const double pts[5][2] = {{0.5, 0.5}, {0.25, 0.25},
+                                         {0.75, 0.25}, {0.25, 0.75},
+                                         {0.75, 0.75}};
+        double dtol = 4 * tol * res;
+        VectorT<double> sT(K), dsTdb(K), dsTdr(K);
+        Weights W;
+        for (int p = 0; p < 5; ++p) {
+            double u = pts[p][0];
+            double v = pts[p][1];
+            if (!exact((i + u) * h, (j + 1 + v) * h, sT, dsTdb, dsTdr))
+                return false;
+            weights(i, j, u, v, W, true);
+            for (int n = 0; n < K; ++n) {
+                if (!(abs(sT(n) - interpolate(W, W.w, n)) <= tol) ||
+                    !(abs(dsTdb(n) - interpolate(W, W.wb, n)) <= dtol) ||
+                    !(abs(dsTdr(n) - interpolate(W, W.wr, n)) <= dtol))
+                    return false;
+            }
+        }
+        return true;
+    }
+
+    /**
+    Compute the node data and the cell mask.
+
+    */
+    inline void Table::build() {
+
+        // Cells with partial occultations that don't touch one of
+        // the singular lines are candidates for interpolation
+        mask_buf.assign(maskBytes(), 0);
+        std::vector<bool> node_used((nb + 1) * (nr + 1), false);
+        for (int j = 0; j < nr; ++j) {
+            double r = (j + 1) * h;
+            for (int i = 0; i < nb; ++i) {
+                double b = i * h;
+                if ((b - r - h - 1 >= 0) || (b + h - r + 1 <= 0) ||
+                        singular(i, j))
+                    continue;
+                mask_buf[j * nb + i] = 1;
+                for (int c = 0; c < 4; ++c)
+                    node_used[(j + (c >> 1)) * (nb + 1) + i + (c & 1)] = true;
+            }
+        }
+
+        // Compute the nodes
+        data_buf.assign(4 * K * (nb + 1) * (nr + 1), NAN);
+        VectorT<double> sT(K), dsTdb(K), dsTdr(K);
+        VectorT<double> dsTdb1(K), dsTdb0(K);
+        double delta = STARRY_TABLE_DELTA * h;
+        for (int j = 0; j < nr + 1; ++j) {
+            double r = (j + 1) * h;
+            for (int i = 0; i < nb + 1; ++i) {
+                double b = i * h;
+                if (!node_used[j * (nb + 1) + i] ||
+                        !exact(b, r + delta, sT, dsTdb1, dsTdr) ||
+                        !exact(b, r - delta, sT, dsTdb0, dsTdr) ||
+                        !exact(b, r, sT, dsTdb, dsTdr))
+                    continue;
+                double* node = data_buf.data() + 4 * K * (j * (nb + 1) + i);
+                for (int n = 0; n < K; ++n) {
+                    node[n] = sT(n);
+                    node[K + n] = dsTdb(n);
+                    node[2 * K + n] = dsTdr(n);
+                    node[3 * K + n] = (dsTdb1(n) - dsTdb0(n)) / (2 * delta);
+                }
+            }
+        }
+        data = data_buf.data();
+
+        // Keep the candidates with well-defined nodes in which
+        // the interpolant is accurate
+        for (int j = 0; j < nr; ++j) {
+            for (int i = 0; i < nb; ++i) {
+                if (!mask_buf[j * nb + i])
+                    continue;
+                bool finite = true;
+                for (int c = 0; c < 4; ++c) {
+                    const double* node = data +
+                        4 * K * ((j + (c >> 1)) * (nb + 1) + i + (c & 1));
+                    finite = finite && isfinite(node[0]);
+                }
+                mask_buf[j * nb + i] = finite && validate(i, j);
+            }
+        }
+        mask = mask_buf.data();
+
+    }
+
+    /**
+    Save the table to `file`. The table is written to a temporary
+    file, which is then renamed, so that other processes never
+    see an incomplete table.
+
+    */
+    inline void Table::save() const {
+#ifndef _WIN32
+        std::string tmp = file + ".tmp" + std::to_string(getpid());
+#else
+        std::string tmp = file + ".tmp";
+#endif
+        TableHeader header;
+        std::memset(&header, 0, sizeof(header));
+        std::memcpy(header.magic, "STARRYTB", 8);
+        std::memcpy(header.name, name.data(), name.size());
+        header.version = TABLE_VERSION;
+        header.K = K;
+        header.res = res;
+        header.nb = nb;
+        header.nr = nr;
+        header.rmax = rmax;
+        header.tol = tol;
+        std::ofstream out(tmp, std::ios::binary);
+        out.write(reinterpret_cast<const char*>(&header), sizeof(header));
+        out.write(reinterpret_cast<const char*>(mask_buf.data()),
+                  mask_buf.size());
+        out.write(reinterpret_cast<const char*>(data_buf.data()),
+                  sizeof(double) * data_buf.size());
+        out.close();
+        if (!out || std::rename(tmp.c_str(), file.c_str())) {
+            std::remove(tmp.c_str());
+            throw errors::ValueError("Unable to write the table file `" +
+                                     file + "`.");
+        }
+    }
+
+    /**
+    Memory-map the table in `file`. Returns `false` if the file
+    does not exist or if it holds a different table.
+
+    */
+    inline bool Table::load() {
+        TableHeader header;
+#ifndef _WIN32
+        int fd = open(file.c_str(), O_RDONLY);
+        if (fd < 0)
+            return false;
+        struct stat st;
+        if ((fstat(fd, &st) != 0) ||
+                (static_cast<size_t>(st.st_size) != fileBytes())) {
+            close(fd);
+            return false;
+        }
+        void* ptr = mmap(nullptr, fileBytes(), PROT_READ, MAP_SHARED, fd, 0);
+        close(fd);
+        if (ptr == MAP_FAILED)
+            return false;
+        addr = ptr;
+        length = fileBytes();
+        std::memcpy(&header, addr, sizeof(header));
+        mask = static_cast<const unsigned char*>(addr) + sizeof(header);
+        data = reinterpret_cast<const double*>(mask + maskBytes());
+#else
+        // No memory mapping: read the whole thing into memory
+        std::ifstream in(file, std::ios::binary | std::ios::ate);
+        if (!in || (static_cast<size_t>(in.tellg()) != fileBytes()))
+            return false;
+        in.seekg(0);
+        mask_buf.resize(maskBytes());
+        data_buf.resize(4 * K * (nb + 1) * (nr + 1));
+        in.read(reinterpret_cast<char*>(&header), sizeof(header));
+        in.read(reinterpret_cast<char*>(mask_buf.data()), mask_buf.size());
+        in.read(reinterpret_cast<char*>(data_buf.data()),
+                sizeof(double) * data_buf.size());
+        if (!in)
+            return false;
+        mask = mask_buf.data();
+        data = data_buf.data();
+#endif
+        char name_[8] = {0};
+        std::memcpy(name_, name.data(), name.size());
+        if ((std::memcmp(header.magic, "STARRYTB", 8) != 0) ||
+                (std::memcmp(header.name, name_, 8) != 0) ||
+                (header.version != TABLE_VERSION) || (header.K != K) ||
+                (header.res != res) || (header.nb != nb) ||
+                (header.nr != nr) || (header.rmax != rmax) ||
+                (header.tol != tol)) {
+            unload();
+            return false;
+        }
+        return true;
+    }
+
+    //! Release the table data
+    inline void Table::unload() {
+#ifndef _WIN32
+        if (addr)
+            munmap(addr, length);
+#endif
+        addr = nullptr;
+        length = 0;
+        mask = nullptr;
+        data = nullptr;
+        mask_buf.clear();
+        data_buf.clear();
+    }
+
+    /**
+    Load the table from disk if it's there; otherwise compute it
+    (and save it to disk if requested).
+
+    */
+    inline void Table::init() {
+        if (file.empty()) {
+            build();
+        } else if (!load()) {
+            build();
+            save();
+            unload();
+            if (!load())
+                throw errors::ValueError("Unable to read the table file `" +
+                                         file + "`.");
+        }
+    }
+
+    /**
+    Interpolate the solution vector and (optionally) its derivatives
+    at (`b`, `r`). Returns `false` if (`b`, `r`) is not in the table
+    or if it falls in a cell flagged for the exact solver, in which
+    case the outputs are not modified.
+
+    */
+    template <typename U>
+    inline bool Table::compute(const U& b_, const U& r_, VectorT<U>& sT,
+                               VectorT<U>& dsTdb, VectorT<U>& dsTdr,
+                               bool gradient) {
+
+        // Compute the table the first time around
+        std::call_once(initialized, &Table::init, this);
+
+        // Locate the cell
+        double b = static_cast<double>(b_) * res;
+        double r = static_cast<double>(r_) * res - 1;
+        if (!((b >= 0) && (b < nb) && (r >= 0) && (r < nr)))
+            return false;
+        int i = static_cast<int>(b);
+        int j = static_cast<int>(r);
+        if (!mask[j * nb + i])
+            return false;
+
+        // Interpolate
+        Weights W;
+        weights(i, j, b - i, r - j, W, gradient);
+        for (int n = 0; n < K; ++n) {
+            sT(n) = interpolate(W, W.w, n);
+            if (gradient) {
+                dsTdb(n) = interpolate(W, W.wb, n);
+                dsTdr(n) = interpolate(W, W.wr, n);
+            }
+        }
+        return true;
+
+    }
+
+} // namespace interp
+} // namespace starry
+
+#endif
@@ -15,6 +15,7 @@ TODO: The biggest speedup may come from only computing the total flux
 #ifndef _STARRY_ORBITAL_H_
 #define _STARRY_ORBITAL_H_
 
+#include <algorithm>
 #include <iostream>
 #include <cmath>
 #include <Eigen/Core>
@@ -23,6 +24,7 @@ TODO: The biggest speedup may come from only computing the total flux
 #include <vector>
 #include "errors.h"
 #include "maps.h"
+#include "parallel.h"
 #include "utils.h"
 #include "rotation.h"
 
@@ -106,6 +108,73 @@ namespace kepler {
             return Eigen::AutoDiffScalar<T>(E_value, M.derivatives());
     }
 
+    /**
+    Compute the eccentric anomaly for an array of mean anomalies.
+    Rather than iterating on each element until convergence, we
+    start from the high-accuracy initial guess of Markley (1995,
+    Celestial Mechanics 63, 101) and apply a fixed number of
+    fifth-order corrections to the whole array at once. One
+    correction is enough for double precision. The rare elements
+    that do not reach `STARRY_KEPLER_TOL` fall back to the
+    iterative solver above.
+
+    */
+    template <typename T>
+    Vector<T> EccentricAnomaly(const Vector<T>& M_, const T& ecc) {
+        if (ecc == 0)
+            return M_;
+        using A = Eigen::Array<T, Eigen::Dynamic, 1>;
+        size_t npts = M_.size();
+        T pi_ = pi<T>(),
+          pi2 = pi_ * pi_;
+
+        // Reduce to [0, pi] using E(-M) = -E(M)
+        A M = M_.array();
+        M = (M > pi_).select(M - T(2 * pi_), M);
+        M = (M < -pi_).select(M + T(2 * pi_), M);
+        A sgn = (M < 0).select(A::Constant(npts, T(-1)), A::Constant(npts, T(1)));
+        M = M.abs();
+
+        // Markley's starter
+        A alpha = (T(3) * pi2 + T(1.6) * pi_ * (pi_ - M) / T(1 + ecc)) /
+                  T(pi2 - 6);
+        A d = T(3) * T(1 - ecc) + alpha * ecc;
+        A q = T(2) * alpha * d * T(1 - ecc) - M * M;
+        A r = T(3) * alpha * d * (d - T(1) + ecc) * M + M * M * M;
+        A w = (r.abs() + (q * q * q + r * r).sqrt()).pow(T(2) / T(3));
+        A E = (T(2) * r * w / (w * w + w * q + q * q) + M) / d;
+
+        // Fifth-order corrections: each one raises the error of
+        // the starter (~1e-3) to the fifth power
+        int niter = 0;
+        for (int digits = 3; digits < std::numeric_limits<T>::digits10;
+             digits *= 5)
+            ++niter;
+        A sE, cE, f0, f1, f2, d3, d4;
+        for (int iter = 0; iter < std::max(niter, 1); ++iter) {
+            sE = E.sin();
+            cE = E.cos();
+            f0 = E - ecc * sE - M;
+            f1 = T(1) - ecc * cE;
+            f2 = ecc * sE;
+            d3 = -f0 / (f1 - T(0.5) * f0 * f2 / f1);
+            d4 = -f0 / (f1 + T(0.5) * d3 * f2 + d3 * d3 * (T(1) - f1) / T(6));
+            E -= f0 / (f1 + T(0.5) * d4 * f2 + d4 * d4 * (T(1) - f1) / T(6)
+                       - d4 * d4 * d4 * f2 / T(24));
+        }
+
+        // Undo the range reduction
+        Vector<T> result = (M_.array() + sgn * (E - M)).matrix();
+
+        // Fall back to the iterative solver if needed
+        f0 = (result.array() - ecc * result.array().sin() - M_.array()).abs();
+        for (size_t i = 0; i < npts; ++i) {
+            if (!(f0(i) <= STARRY_KEPLER_TOL))
+                result(i) = EccentricAnomaly(M_(i), ecc);
+        }
+        return result;
+    }
+
     /**
     Compute the light travel time delay and apply
     it to the current (x, y, z) position of the body.
@@ -219,6 +288,148 @@ namespace kepler {
 
     }
 
+    /**
+    Compute the light travel time delay and apply it to the
+    (x, y, z) positions of the body at each time in `time`.
+    Vectorized version of the function above.
+
+    */
+    template <class U>
+    void applyLightDelay(const Vector<U>& time,
+        const U& a, const U& ecc, const U& ecc2,
+        const U& sqrtonepluse, const U& sqrtoneminuse,
+        const U& w, const U& angvelorb, const U& tref,
+        const U& M0, const U& cosO, const U& sinO, const U& sini,
+        const U& cosOcosi, const U& sinOcosi,
+        const U& vamp, const U& ecw, const U& z0, const U& c,
+        Vector<U>& cwf, Vector<U>& rorb, Vector<U>& x, Vector<U>& y,
+        Vector<U>& z, Vector<U>& delay) {
+
+        using A = Eigen::Array<U, Eigen::Dynamic, 1>;
+
+        // Velocity & acceleration out of the sky
+        A vz = vamp * sini * (ecw + cwf.array());
+        A az = -angvelorb * angvelorb * a * a * a /
+               (rorb.array() * rorb.array() * rorb.array()) * z.array();
+
+        // Time delay at the retarded position (see the scalar version)
+        A dz = z0 - z.array();
+        A small = (az.abs() < U(1e-10)).select(A::Ones(az.size()), A::Zero(az.size()));
+        A azsafe = (small > 0).select(A::Ones(az.size()), az);
+        A vzc = U(1) + vz / c;
+        A disc = vzc * vzc - U(2) * azsafe * dz / (c * c);
+        delay = (small > 0).select(dz / (c + vz),
+                                   (c / azsafe) * (vzc - disc.sqrt())).matrix();
+
+        // Re-compute Kepler's equation at the retarded position
+        Vector<U> M = (M0 + angvelorb * (time.array() - delay.array() - tref)
+                      ).matrix().unaryExpr([](const U& m) { return mod2pi(m); });
+        A f;
+        if (ecc > 0) {
+            A E2 = EccentricAnomaly(M, ecc).array() / U(2);
+            f = U(2) * (sqrtonepluse * E2.sin()).binaryExpr(
+                    sqrtoneminuse * E2.cos(),
+                    [](const U& s, const U& c) { return atan2(s, c); });
+            rorb = (a * (1. - ecc2) / (U(1) + ecc * f.cos())).matrix();
+        } else {
+            f = M.array();
+            rorb.setConstant(time.size(), a);
+        }
+        cwf = (w + f).cos().matrix();
+        A swf = (w + f).sin();
+        x = (-rorb.array() * (cosO * cwf.array() - sinOcosi * swf)).matrix();
+        y = (-rorb.array() * (sinO * cwf.array() + cosOcosi * swf)).matrix();
+        z = (rorb.array() * swf * sini).matrix();
+
+    }
+
+    /**
+    Compute the x, y, and z positions of the body at each
+    time in `time`. Vectorized version of the function above:
+    the whole orbit is solved with array operations.
+
+    */
+    template <class U>
+    void keplerStep(const Vector<U>& time,
+        const U& a, const U& ecc, const U& ecc2,
+        const U& sqrtonepluse, const U& sqrtoneminuse,
+        const U& w, const U& angvelorb, const U& tref,
+        const U& M0, const U& cosO, const U& sinO, const U& sini,
+        const U& cosOcosi, const U& sinOcosi,
+        const U& vamp, const U& ecw, const U& z0, const U& c,
+        Vector<U>& x, Vector<U>& y, Vector<U>& z, Vector<U>& delay) {
+
+        using A = Eigen::Array<U, Eigen::Dynamic, 1>;
+
+        // Mean anomaly
+        Vector<U> M = (M0 + angvelorb * (time.array() - tref)).matrix().unaryExpr(
+                      [](const U& m) { return mod2pi(m); });
+
+        // True anomaly and orbital radius
+        A f;
+        Vector<U> rorb;
+        if (ecc == 0) {
+            f = M.array();
+            rorb.setConstant(time.size(), a);
+        } else {
+            A E2 = EccentricAnomaly(M, ecc).array() / U(2);
+            f = U(2) * (sqrtonepluse * E2.sin()).binaryExpr(
+                    sqrtoneminuse * E2.cos(),
+                    [](const U& s, const U& c) { return atan2(s, c); });
+            rorb = (a * (1. - ecc2) / (U(1) + ecc * f.cos())).matrix();
+        }
+
+        // Sky positions (see the scalar version)
+        Vector<U> cwf = (w + f).cos().matrix();
+        A swf = (w + f).sin();
+        x = (-rorb.array() * (cosO * cwf.array() - sinOcosi * swf)).matrix();
+        y = (-rorb.array() * (sinO * cwf.array() + cosOcosi * swf)).matrix();
+        z = (rorb.array() * swf * sini).matrix();
+
+        // Compute the light travel time delay
+        if (!isInfinite(c))
+            applyLightDelay(time, a, ecc, ecc2, sqrtonepluse, sqrtoneminuse,
+                            w, angvelorb, tref, M0, cosO, sinO, sini,
+                            cosOcosi, sinOcosi, vamp, ecw, z0, c, cwf, rorb,
+                            x, y, z, delay);
+        else
+            delay.setZero(time.size());
+
+    }
+
+    /**
+    Nodes `x` and weights `w` of the `n`-point Gauss-Legendre
+    quadrature rule on the interval [-1, 1].
+
+    */
+    template <typename T>
+    inline void gaussLegendre(int n, Vector<T>& x, Vector<T>& w) {
+        x.resize(n);
+        w.resize(n);
+        T z, dz, p0, p1, p2, dp;
+        for (int i = 0; i < (n + 1) / 2; ++i) {
+            // Newton's method on the i-th root of P_n
+            z = cos(pi<T>() * (i + 0.75) / (n + 0.5));
+            for (int iter = 0; iter <= STARRY_KEPLER_MAX_ITER; ++iter) {
+                p0 = 1;
+                p1 = 0;
+                for (int j = 1; j <= n; ++j) {
+                    p2 = p1;
+                    p1 = p0;
+                    p0 = ((2 * j - 1) * z * p1 - (j - 1) * p2) / j;
+                }
+                dp = n * (z * p0 - p1) / (z * z - 1);
+                dz = p0 / dp;
+                z -= dz;
+                if (abs(dz) <= 10 * mach_eps<T>()) break;
+            }
+            x(i) = -z;
+            x(n - 1 - i) = z;
+            w(i) = 2 / ((1 - z * z) * dp * dp);
+            w(n - 1 - i) = w(i);
+        }
+    }
+
     /**
     Flux container for exposure time integration.
 
@@ -233,7 +444,7 @@ namespace kepler {
             size_t nsec;
             bool grad;
 
-            explicit Exposure(size_t nsec, bool grad) :
+            explicit Exposure(size_t nsec=0, bool grad=false) :
                     nsec(nsec), grad(grad) {
                 flux.resize(nsec + 1);
                 if (grad) gradient.resize(nsec + 1);
@@ -271,6 +482,57 @@ namespace kepler {
 
     };
 
+    /**
+    Piecewise quartic interpolant of the flux (and gradient) of each body
+    over a single orbit, used to phase-fold strictly periodic light curves.
+    Each piece stores the flux at five equally spaced times.
+
+    */
+    template <class T>
+    class PhaseTable {
+
+        public:
+
+            std::vector<Scalar<T>> a;                                           /**< The start time of each piece */
+            std::vector<Scalar<T>> b;                                           /**< The end time of each piece */
+            std::vector<std::vector<Exposure<T>>> f;                            /**< The flux at five equally spaced times in each piece */
+
+            //! Lagrange basis polynomial `j` at `s` in [0, 1]
+            static inline Scalar<T> basis(const Scalar<T>& s, int j) {
+                Scalar<T> l = 1;
+                for (int m = 0; m < 5; ++m) {
+                    if (m != j)
+                        l *= (4 * s - m) / (j - m);
+                }
+                return l;
+            }
+
+            //! Interpolate the five values `f` at `s` in [0, 1]
+            static inline Exposure<T> interpolate(
+                    const std::vector<Exposure<T>>& f, const Scalar<T>& s) {
+                Exposure<T> result = f[0] * basis(s, 0);
+                for (int j = 1; j < 5; ++j)
+                    result = result + f[j] * basis(s, j);
+                return result;
+            }
+
+            //! Append a piece; pieces must be appended in order
+            inline void add(const Scalar<T>& a_, const Scalar<T>& b_,
+                            const std::vector<Exposure<T>>& f_) {
+                a.push_back(a_);
+                b.push_back(b_);
+                f.push_back(f_);
+            }
+
+            //! Evaluate the interpolant at time `t`
+            inline Exposure<T> evaluate(const Scalar<T>& t) const {
+                size_t k = std::upper_bound(a.begin(), a.end(), t) - a.begin();
+                if (k > 0) --k;
+                return interpolate(f[k], (t - a[k]) / (b[k] - a[k]));
+            }
+
+    };
+
 
     /* ---------------- */
     /*        AD        */
@@ -406,6 +668,8 @@ namespace kepler {
             bool computed;                                                      /**< Did the user call `compute()`? */
 
             Matrix<Scalar<T>> lightcurve;                                       /**< The body's full light curve */
+            Vector<Scalar<T>> thetavec;                                         /**< The body's rotation angle in degrees at each time */
+            System<T>* system;                                                  /**< The system that last computed the body's light curve */
             Vector<T> dL;                                                       /**< The gradient of the body's light curve */
             std::vector<std::string> dL_names;                                  /**< Names of each of the params in the light curve gradient */
 
@@ -421,6 +685,73 @@ namespace kepler {
                 return this->flux(theta_deg, xo, yo, ro, gradient, numerical);
             }
 
+            //! Wrapper to get the flux at many positions (overriden in Secondary)
+            virtual inline void getFlux(const Vector<S>& theta_deg,
+                    const Vector<S>& xo, const Vector<S>& yo,
+                    const Vector<S>& ro, T& flux, bool numerical) {
+                this->flux(theta_deg, xo, yo, ro, flux, numerical);
+            }
+
+            //! Wrapper to get the unocculted flux at many angles (overriden in Secondary)
+            virtual inline void getPhaseCurve(const Vector<S>& theta_deg,
+                    T& flux, bool numerical) {
+                Vector<S> zero = Vector<S>::Zero(theta_deg.size());
+                this->flux(theta_deg, zero, zero, zero, flux, numerical);
+            }
+
+            //! Wrapper to get a design matrix row from the map (overriden in Secondary)
+            virtual inline void getDesignRow(const S& xo, const S& yo,
+                    const S& ro, VectorT<S>& row) {
+                this->designRow(xo, yo, ro, row);
+            }
+
+            //! Wrapper to rotate the design matrix (overriden in Secondary)
+            virtual inline void rotateDesignMatrix(const Vector<S>& theta_deg,
+                    Matrix<S>& X) {
+                Map<T>::rotateDesignMatrix(theta_deg, X);
+            }
+
+            //! Append the parameters that determine the geometry (extended in subclasses)
+            virtual void getGeometry(std::vector<S>& geo) const {
+                geo.push_back(r);
+                geo.push_back(prot);
+                geo.push_back(tref);
+                for (int i = 0; i < 3; ++i)
+                    geo.push_back(this->axis(i));
+            }
+
+            //! Append the map coefficients, the luminosity and the solver settings of the body
+            inline void getState(std::vector<S>& state) const {
+                for (long i = 0; i < this->y.size(); ++i)
+                    state.push_back(this->y.data()[i]);
+                for (long i = 0; i < this->u.size(); ++i)
+                    state.push_back(this->u.data()[i]);
+                for (int n = 0; n < nwav; ++n)
+                    state.push_back(getColumn(L, n));
+                getSolver(state);
+            }
+
+            //! Append the settings of the occultation solvers of the body
+            inline void getSolver(std::vector<S>& solver) const {
+                if (this->table_ld) {
+                    solver.push_back(this->table_ld->rmax);
+                    solver.push_back(this->table_ld->tol);
+                    solver.push_back(this->table_ld->res);
+                }
+                solver.push_back(this->escalate);
+            }
+
+            //! Copy the map, the luminosity and the rotation of another body (extended in subclasses)
+            void copyState(const Body<T>& other) {
+                Map<T>::copyState(other);
+                r = other.r;
+                L = other.L;
+                prot = other.prot;
+                tref = other.tref;
+                angvelrot_deg = other.angvelrot_deg;
+                computeTheta0();
+            }
+
             //! Compute the initial rotation angle (overriden in Secondary)
             virtual void computeTheta0() {
                 theta0_deg = 0;
@@ -449,6 +780,7 @@ namespace kepler {
                 setRefTime(0.0);
 
                 computed = false;
+                system = nullptr;
             }
 
         public:
@@ -625,6 +957,19 @@ namespace kepler {
             S r_meters;                                                         /**< Radius of the body in meters */
             S c_light;                                                          /**< Speed of light in units of primary radius / s */
 
+            //! Append the parameters that determine the geometry
+            void getGeometry(std::vector<S>& geo) const {
+                Body<T>::getGeometry(geo);
+                geo.push_back(c_light);
+            }
+
+            //! Copy the state of another primary
+            void copyState(const Primary<T>& other) {
+                Body<T>::copyState(other);
+                r_meters = other.r_meters;
+                c_light = other.c_light;
+            }
+
         public:
 
             //! Constructor
@@ -701,11 +1046,7 @@ namespace kepler {
     template <class T>
     std::string Primary<T>::info() {
         std::ostringstream os;
-        std::string multi;
-        if (isMulti(Scalar<T>(0.)))
-            multi = "True";
-        else
-            multi = "False";
+        std::string multi = multiName<Scalar<T>>();
         os << "<starry.kepler.Primary("
            << "lmax=" << this->lmax << ", "
            << "nwav=" << this->nwav << ", "
@@ -782,6 +1123,7 @@ namespace kepler {
             S x_cur;                                                            /**< Current Cartesian x position */
             S y_cur;                                                            /**< Current Cartesian y position */
             S z_cur;                                                            /**< Current Cartesian z position */
+            Vector<S> delayvec;                                                 /**< Light travel time delay at each time in seconds */
 
             // Auxiliary orbital vars
             S M0;                                                               /**< Value of the mean anomaly at the reference time */
@@ -809,10 +1151,25 @@ namespace kepler {
             // Private methods
             inline Row<T> getFlux(const S& theta_deg, const S& xo,
                 const S& yo, const S& ro, bool gradient, bool numerical);
+            inline void getFlux(const Vector<S>& theta_deg,
+                const Vector<S>& xo, const Vector<S>& yo,
+                const Vector<S>& ro, T& flux, bool numerical);
+            inline void getPhaseCurve(const Vector<S>& theta_deg, T& flux,
+                bool numerical);
+            inline void getDesignRow(const S& xo, const S& yo, const S& ro,
+                VectorT<S>& row);
+            inline void rotateDesignMatrix(const Vector<S>& theta_deg,
+                Matrix<S>& X);
+            void getGeometry(std::vector<S>& geo) const;
             void computeTheta0();
             inline void syncSkyMap();
+            void copyState(const Secondary<T>& other);
             inline void computeXYZ(const S& time, bool gradient);
-            inline void applyLightDelay(const S& time);
+            inline void computeXYZ(const Vector<S>& time, Vector<S>& x,
+                                   Vector<S>& y, Vector<S>& z,
+                                   Vector<S>& delay);
+            inline void computeXYZ(const Vector<S>& time);
+            inline void setXYZ(size_t t);
 
         public:
 
@@ -836,6 +1193,9 @@ namespace kepler {
             const Vector<Scalar<T>>& getXVector() const;
             const Vector<Scalar<T>>& getYVector() const;
             const Vector<Scalar<T>>& getZVector() const;
+            void tabulate(double rmax, double tol=1e-10, int res=256,
+                const std::string& path="");
+            void setEscalate(bool escalate_);
             std::string info();
 
             //! Constructor
@@ -907,16 +1267,17 @@ namespace kepler {
         // Sync the limb darkening
         skyMap.setU(u.block(1, 0, u.rows() - 1, nwav));
 
+        // Let's store the rotation matrices: we'll need them to correctly
+        // transform the derivatives of the map back to the user coordinates,
+        // even if the transformation is the identity
+        W1.update();
+        W1.compute(sini, cosi);
+        W2.update();
+        W2.compute(cosO, sinO);
+
         // If there's any inclination or rotation of the orbital plane,
         // we need to rotate the sky map as well as the rotation axis
         if ((Omega != 0) || (sini < 1. - 2 * mach_eps<Scalar<T>>())) {
-
-            // Let's store the rotation matrices: we'll need them to correctly
-            // transform the derivatives of the map back to the user coordinates
-            W1.update();
-            W1.compute(sini, cosi);
-            W2.update();
-            W2.compute(cosO, sinO);
             for (int l = 0; l < lmax + 1; ++l) {
                 RSky[l] = W1.R[l] * W2.R[l];
                 skyY.block(l * l, 0, 2 * l + 1, nwav) =
@@ -939,6 +1300,55 @@ namespace kepler {
 
     }
 
+    /**
+    Tabulate the occultation solution vectors of both the user-facing
+    map and the sky map, which is the one used to compute the flux.
+
+    */
+    template <class T>
+    void Secondary<T>::tabulate(double rmax, double tol, int res,
+                                const std::string& path) {
+        Map<T>::tabulate(rmax, tol, res, path);
+        skyMap.tabulate(rmax, tol, res, path);
+    }
+
+    /**
+    Enable or disable the precision escalation of both the user-facing
+    map and the sky map.
+
+    */
+    template <class T>
+    void Secondary<T>::setEscalate(bool escalate_) {
+        Map<T>::setEscalate(escalate_);
+        skyMap.setEscalate(escalate_);
+    }
+
+    /**
+    Compute the unocculted flux from the body at each of the
+    rotation angles `theta_deg` in a single batched call.
+
+    */
+    template <class T>
+    inline void Secondary<T>::getPhaseCurve(const Vector<Scalar<T>>& theta_deg,
+                                            T& flux, bool numerical) {
+        Vector<Scalar<T>> zero = Vector<Scalar<T>>::Zero(theta_deg.size());
+        skyMap.flux(theta_deg, zero, zero, zero, flux, numerical);
+    }
+
+    /**
+    Return the flux from the sky-projected map at many
+    positions. This overrides `getFlux` in the Body class.
+
+    */
+    template <class T>
+    inline void Secondary<T>::getFlux(const Vector<Scalar<T>>& theta_deg,
+                                      const Vector<Scalar<T>>& xo,
+                                      const Vector<Scalar<T>>& yo,
+                                      const Vector<Scalar<T>>& ro,
+                                      T& flux, bool numerical) {
+        skyMap.flux(theta_deg, xo, yo, ro, flux, numerical);
+    }
+
     /**
     Return the flux from the sky-projected map. This
     overrides `getFlux` in the Body class.
@@ -979,6 +1389,52 @@ namespace kepler {
         return F;
     }
 
+    /**
+    Return a row of the design matrix of the sky-projected map.
+    This overrides `getDesignRow` in the Body class.
+
+    */
+    template <class T>
+    inline void Secondary<T>::getDesignRow(const Scalar<T>& xo,
+                                           const Scalar<T>& yo,
+                                           const Scalar<T>& ro,
+                                           VectorT<Scalar<T>>& row) {
+        skyMap.designRow(xo, yo, ro, row);
+    }
+
+    /**
+    Rotate the design matrix of the sky-projected map and transform
+    it so that it operates on the user-facing map. Since ysky = R y,
+    we have X . ysky = (X . R) . y. This overrides `rotateDesignMatrix`
+    in the Body class.
+
+    */
+    template <class T>
+    inline void Secondary<T>::rotateDesignMatrix(const Vector<Scalar<T>>& theta_deg,
+                                                 Matrix<Scalar<T>>& X) {
+        skyMap.rotateDesignMatrix(theta_deg, X);
+        for (int l = 0; l < lmax + 1; ++l)
+            X.block(0, l * l, X.rows(), 2 * l + 1) =
+                X.block(0, l * l, X.rows(), 2 * l + 1) * RSky[l];
+    }
+
+    /**
+    Append the parameters that determine the geometry of the
+    body to `geo`. This extends `getGeometry` in the Body class.
+
+    */
+    template <class T>
+    void Secondary<T>::getGeometry(std::vector<Scalar<T>>& geo) const {
+        Body<T>::getGeometry(geo);
+        geo.push_back(a);
+        geo.push_back(porb);
+        geo.push_back(inc);
+        geo.push_back(ecc);
+        geo.push_back(w);
+        geo.push_back(Omega);
+        geo.push_back(lambda0);
+    }
+
     /**
     Map rotation angle in degrees at the reference time.
     The map is defined at the
@@ -1059,6 +1515,39 @@ namespace kepler {
     }
 
 
+    /**
+    Compute the position of the body and the light travel time delay
+    at each time in `time` in a single vectorized pass.
+
+    */
+    template <class T>
+    inline void Secondary<T>::computeXYZ(const Vector<Scalar<T>>& time,
+            Vector<Scalar<T>>& x, Vector<Scalar<T>>& y,
+            Vector<Scalar<T>>& z, Vector<Scalar<T>>& delay) {
+        keplerStep(time, a, ecc, ecc2, sqrtonepluse, sqrtoneminuse,
+                   w, angvelorb, tref, M0, cosO, sinO, sini, cosOcosi,
+                   sinOcosi, vamp, ecw, z0, *c_light, x, y, z, delay);
+    }
+
+    /**
+    Compute the position of the body at each time in `time` in a single
+    vectorized pass and store it in `xvec`, `yvec`, `zvec` and `delayvec`.
+
+    */
+    template <class T>
+    inline void Secondary<T>::computeXYZ(const Vector<Scalar<T>>& time) {
+        computeXYZ(time, xvec, yvec, zvec, delayvec);
+    }
+
+    //! Set the current position to the `t`-th precomputed position
+    template <class T>
+    inline void Secondary<T>::setXYZ(size_t t) {
+        x_cur = xvec(t);
+        y_cur = yvec(t);
+        z_cur = zvec(t);
+        delay = delayvec(t);
+    }
+
     /* --------------------- */
     /*     SECONDARY: I/O    */
     /* --------------------- */
@@ -1075,6 +1564,41 @@ namespace kepler {
         return skyMap.getS();
     }
 
+    /**
+    Copy the map, the orbital elements and the rotation of another
+    secondary. The derived orbital quantities are copied verbatim
+    rather than recomputed, so the two bodies have bit-for-bit
+    identical light curves.
+
+    */
+    template <class T>
+    void Secondary<T>::copyState(const Secondary<T>& other) {
+        a = other.a;
+        porb = other.porb;
+        inc = other.inc;
+        ecc = other.ecc;
+        w = other.w;
+        Omega = other.Omega;
+        lambda0 = other.lambda0;
+        M0 = other.M0;
+        cosi = other.cosi;
+        sini = other.sini;
+        cosO = other.cosO;
+        sinO = other.sinO;
+        sqrtonepluse = other.sqrtonepluse;
+        sqrtoneminuse = other.sqrtoneminuse;
+        ecc2 = other.ecc2;
+        cosOcosi = other.cosOcosi;
+        sinOcosi = other.sinOcosi;
+        ecw = other.ecw;
+        esw = other.esw;
+        angvelorb = other.angvelorb;
+        vamp = other.vamp;
+        aamp = other.aamp;
+        Body<T>::copyState(other);
+        skyMap.copyState(other.skyMap);
+    }
+
     //! Set the semi-major axis
     template <class T>
     void Secondary<T>::setSemi(const Scalar<T>& a_) {
@@ -1213,11 +1737,7 @@ namespace kepler {
     template <class T>
     std::string Secondary<T>::info() {
         std::ostringstream os;
-        std::string multi;
-        if (isMulti(Scalar<T>(0.)))
-            multi = "True";
-        else
-            multi = "False";
+        std::string multi = multiName<Scalar<T>>();
         os << "<starry.kepler.Secondary("
            << "lmax=" << this->lmax << ", "
            << "nwav=" << this->nwav << ", "
@@ -1241,12 +1761,27 @@ namespace kepler {
             Vector<T> dL;                                                       /**< The gradient of the system light curve */
             std::vector<std::string> dL_names;                                  /**< The names of each of the derivatives in the gradient */
             Scalar<T> exptime;                                                  /**< Exposure time in days */
+            Vector<S> texp;                                                     /**< Exposure time of each point in the current light curve, in seconds */
             Scalar<T> exptol;                                                   /**< Exposure integration tolerance */
             int expmaxdepth;                                                    /**< Maximum recursion depth in the exposure integration */
+            std::string expmode;                                                /**< Exposure integration scheme: "adaptive", "gauss", "supersample" or "contact" */
+            int exporder;                                                       /**< Number of points in the fixed-order exposure integration schemes */
             size_t t;                                                           /** The current index in the time array */
             size_t ngrad;                                                       /** Number of derivatives to compute */
             size_t g;                                                           /** The current gradient index */
             bool computed;                                                      /** Did the user call `compute()` yet? */
+            std::vector<S> geometry;                                            /**< The time array & primary parameters of the last light curve */
+            bool geometry_cached;                                               /**< Are the positions & rotation angles from the last light curve cached? */
+            std::vector<std::vector<S>> body_geometry;                          /**< The orbital & rotational parameters of each body in the last light curve */
+            std::vector<std::vector<S>> body_state;                             /**< The map coefficients & luminosity of each body in the last light curve */
+            std::vector<S> body_r;                                              /**< The radius of each body in the last light curve */
+            std::vector<std::vector<S>> body_solver;                            /**< The solver settings of each body in the last light curve */
+            std::vector<Matrix<S>> X;                                           /**< Cached design matrix of each body */
+            std::vector<bool> X_cached;                                         /**< Is the design matrix of each body cached? */
+            S foldtol;                                                          /**< Tolerance of the phase-folded light curve (zero to disable phase folding) */
+            Exposure<T> f_boundary;                                             /**< The flux at the end of the previous exposure */
+            S t_boundary;                                                       /**< The time at the end of the previous exposure */
+            bool boundary_cached;                                               /**< Can we reuse `f_boundary` for the next exposure? */
 
             // Protected methods
             inline void step(const S& time_cur, bool gradient, bool numerical);
@@ -1254,7 +1789,45 @@ namespace kepler {
             Exposure<T> integrate(const Exposure<T>& f1, const Exposure<T>& f2,
                                   const S& t1, const S& t2,
                                   int depth, bool gradient, bool numerical);
-            inline void integrate(const S& time_cur, bool gradient, bool numerical);
+            inline void integrate(const S& time_cur, const S& texp_cur,
+                                  bool gradient, bool numerical);
+            inline void getExposureNodes(Vector<S>& nodes, Vector<S>& weights);
+            inline void getContacts(const Vector<S>& tgrid, size_t M,
+                                    std::vector<std::vector<S>>& contacts);
+            inline void getExposureSamples(const Vector<S>& time,
+                                           const Vector<S>& exptime,
+                                           std::vector<size_t>& start,
+                                           Vector<S>& tsub, Vector<S>& wsub);
+            inline void integrateSamples(const Vector<S>& time, bool numerical);
+            inline bool isPeriodic(bool gradient);
+            bool refineFold(PhaseTable<T>& table, const S& a, const S& b,
+                            const std::vector<Exposure<T>>& f, int depth,
+                            size_t& count, size_t budget, bool gradient,
+                            bool numerical);
+            inline void computeFolded(const Vector<S>& time, bool gradient,
+                                      bool numerical);
+            inline void computeSamples(const Vector<S>& time, bool numerical);
+            template <typename Func>
+            inline void occultations(Body<T>* body, Func func);
+            inline void getDesignRow(Body<T>* body, VectorT<S>& row);
+            inline void getEvents(std::vector<size_t>& events);
+            inline void computeFlux(Body<T>* body,
+                                    const std::vector<size_t>& events,
+                                    bool numerical);
+            inline std::vector<Body<T>*> getBodies();
+            inline void getGeometry(const Vector<S>& time, std::vector<S>& geo);
+            inline bool isCached(const Vector<S>& time);
+            inline void cache(const Vector<S>& time);
+            inline void setPositions(size_t t);
+            inline bool overlap(size_t i, size_t k,
+                                const std::vector<Vector<S>>& x,
+                                const std::vector<Vector<S>>& y,
+                                const std::vector<S>& r);
+            inline void computeBody(size_t i, bool occulted,
+                                    const std::vector<size_t>& events,
+                                    bool numerical);
+            inline void computeIncremental(const Vector<S>& time,
+                                           bool numerical);
 
             inline void computePrimaryTotalGradient(const S& time_cur);
             inline void computeSecondaryTotalGradient(const S& time_cur,
@@ -1280,7 +1853,12 @@ namespace kepler {
                 setExposureTime(0.0);
                 setExposureTol(sqrt(mach_eps<Scalar<T>>()));
                 setExposureMaxDepth(4);
+                setExposureMode("adaptive");
+                setExposureOrder(5);
+                setFoldTol(0.0);
                 computed = false;
+                geometry_cached = false;
+                boundary_cached = false;
             }
 
             //! Constructor: multiple secondaries
@@ -1292,11 +1870,32 @@ namespace kepler {
                 setExposureTime(0.0);
                 setExposureTol(sqrt(mach_eps<Scalar<T>>()));
                 setExposureMaxDepth(4);
+                setExposureMode("adaptive");
+                setExposureOrder(5);
+                setFoldTol(0.0);
                 computed = false;
+                geometry_cached = false;
+                boundary_cached = false;
             }
 
             // Public methods
             void compute(const Vector<S>& time, bool gradient=false, bool numerical=false);
+            void compute(const Vector<S>& time, const Vector<S>& exptime,
+                         bool gradient=false, bool numerical=false);
+            void designMatrix(const Vector<S>& time, Body<T>* body, Matrix<S>& Xbody);
+            void computeBatch(const Vector<S>& time, const Vector<S>& exptime,
+                              const Matrix<S>& params,
+                              const std::vector<std::string>& names,
+                              Matrix<S>& flux, int nthreads=1);
+            void setParameter(const std::string& name, const S& value);
+            void positions(const Vector<S>& time, Matrix<S>& xpos,
+                           Matrix<S>& ypos, Matrix<S>& zpos);
+            void positions(const Vector<S>& time, Matrix<S>& xpos,
+                           Matrix<S>& ypos, Matrix<S>& zpos,
+                           std::vector<std::string>& names,
+                           std::vector<Matrix<S>>& dxpos,
+                           std::vector<Matrix<S>>& dypos,
+                           std::vector<Matrix<S>>& dzpos);
             const Matrix<S>& getLightcurve() const;
             const Vector<T>& getLightcurveGradient() const;
             const std::vector<std::string>& getLightcurveGradientNames() const;
@@ -1307,6 +1906,12 @@ namespace kepler {
             S getExposureTol() const;
             void setExposureMaxDepth(const int d_);
             int getExposureMaxDepth() const;
+            void setExposureMode(const std::string& mode_);
+            std::string getExposureMode() const;
+            void setExposureOrder(const int n_);
+            int getExposureOrder() const;
+            void setFoldTol(const S& tol_);
+            S getFoldTol() const;
 
     };
 
@@ -1346,6 +1951,50 @@ namespace kepler {
         return expmaxdepth;
     }
 
+    //! Set the exposure integration scheme
+    template <class T>
+    void System<T>::setExposureMode(const std::string& mode_) {
+        if ((mode_ == "adaptive") || (mode_ == "gauss") ||
+            (mode_ == "supersample") || (mode_ == "contact"))
+            expmode = mode_;
+        else
+            throw errors::ValueError("Exposure mode must be one of "
+                                     "`adaptive`, `gauss`, `supersample` "
+                                     "or `contact`.");
+    }
+
+    //! Get the exposure integration scheme
+    template <class T>
+    std::string System<T>::getExposureMode() const {
+        return expmode;
+    }
+
+    //! Set the order of the fixed-order exposure integration schemes
+    template <class T>
+    void System<T>::setExposureOrder(const int n_) {
+        if (n_ > 0) exporder = n_;
+        else throw errors::ValueError("Exposure order must be positive.");
+    }
+
+    //! Get the order of the fixed-order exposure integration schemes
+    template <class T>
+    int System<T>::getExposureOrder() const {
+        return exporder;
+    }
+
+    //! Set the tolerance of the phase-folded light curve
+    template <class T>
+    void System<T>::setFoldTol(const Scalar<T>& tol_) {
+        if (tol_ >= 0) foldtol = tol_;
+        else throw errors::ValueError("Tolerance must be non-negative.");
+    }
+
+    //! Get the tolerance of the phase-folded light curve
+    template <class T>
+    Scalar<T> System<T>::getFoldTol() const {
+        return foldtol;
+    }
+
     //! Return a human-readable info string
     template <class T>
     std::string System<T>::info() {
@@ -1409,19 +2058,54 @@ namespace kepler {
     }
 
     /**
-    Recursive exposure time integration function
+    Exposure time integration function
 
     */
     template <class T>
-    inline void System<T>::integrate(const Scalar<T>& time_cur, bool gradient, bool numerical) {
+    inline void System<T>::integrate(const Scalar<T>& time_cur,
+                                     const Scalar<T>& texp_cur,
+                                     bool gradient, bool numerical) {
         Exposure<T> exposure(secondaries.size(), gradient);
-        Scalar<T> dt = 0.5 * exptime,
-                  t1 = time_cur - dt,
-                  t2 = time_cur + dt,
-                  invdt = 1. / (t2 - t1);
-        exposure = integrate(step(t1, gradient, numerical, false),
-                             step(t2, gradient, numerical, false),
-                             t1, t2, 0, gradient, numerical) * invdt;
+
+        if (expmode == "adaptive") {
+
+            // Recursive integration
+            Scalar<T> dt = 0.5 * texp_cur,
+                      t1 = time_cur - dt,
+                      t2 = time_cur + dt,
+                      invdt = 1. / (t2 - t1);
+
+            // If this exposure starts where the previous one ended (as is
+            // the case for back-to-back cadences), the flux at `t1` is the
+            // flux at the end of the previous exposure, so we reuse it.
+            // We allow for a little roundoff error in the time array.
+            Exposure<T> f1(secondaries.size(), gradient);
+            if (boundary_cached && (abs(t1 - t_boundary) <=
+                    10 * mach_eps<Scalar<T>>() * (abs(t1) + texp_cur)))
+                f1 = f_boundary;
+            else
+                f1 = step(t1, gradient, numerical, false);
+            f_boundary = step(t2, gradient, numerical, false);
+            t_boundary = t2;
+            boundary_cached = true;
+            exposure = integrate(f1, f_boundary, t1, t2, 0,
+                                 gradient, numerical) * invdt;
+
+        } else {
+
+            // Fixed-order integration: a weighted sum of steps
+            std::vector<size_t> start;
+            Vector<Scalar<T>> tsub, wsub;
+            getExposureSamples(Vector<Scalar<T>>::Constant(1, time_cur),
+                               Vector<Scalar<T>>::Constant(1, texp_cur),
+                               start, tsub, wsub);
+            exposure = step(tsub(0), gradient, numerical, false) * wsub(0);
+            for (long k = 1; k < tsub.size(); ++k)
+                exposure = exposure + step(tsub(k), gradient, numerical,
+                                           false) * wsub(k);
+
+        }
+
         primary->flux_cur = exposure.flux[0];
         if (gradient)
             primary->dflux_cur = exposure.gradient[0];
@@ -1432,6 +2116,196 @@ namespace kepler {
         }
     }
 
+    /**
+    Nodes and weights of the fixed-order exposure integration schemes,
+    in units of the exposure time relative to its midpoint. The weights
+    sum to unity.
+
+    */
+    template <class T>
+    inline void System<T>::getExposureNodes(Vector<Scalar<T>>& nodes,
+                                            Vector<Scalar<T>>& weights) {
+        if ((expmode == "gauss") || (expmode == "contact")) {
+            gaussLegendre(exporder, nodes, weights);
+            nodes *= 0.5;
+            weights *= 0.5;
+        } else {
+            nodes.resize(exporder);
+            weights.setConstant(exporder, 1. / exporder);
+            for (int k = 0; k < exporder; ++k)
+                nodes(k) = (k + 0.5) / exporder - 0.5;
+        }
+    }
+
+    /**
+    Find the times at which the disks of any two bodies touch, i.e.,
+    the contact points of all the transits, eclipses and mutual
+    occultations. The flux is not smooth at these times. The array
+    `tgrid` consists of `N` sorted blocks of `M + 1` times each; we look
+    for sign changes of the squared separation minus the squared contact
+    distance between consecutive times within each block and refine them
+    with the Illinois method. The sorted contacts within the `n`-th block
+    are stored in `contacts[n]`. Grazing contacts that begin and end
+    between two grid points are missed.
+
+    */
+    template <class T>
+    inline void System<T>::getContacts(const Vector<Scalar<T>>& tgrid,
+                                       size_t M,
+                                       std::vector<std::vector<Scalar<T>>>& contacts) {
+        size_t N = tgrid.size() / (M + 1);
+        size_t NS = secondaries.size();
+        contacts.assign(N, std::vector<Scalar<T>>());
+
+        // Sky positions on the grid. Body 0 is the primary
+        std::vector<Vector<Scalar<T>>> x(NS + 1), y(NS + 1);
+        std::vector<Scalar<T>> r(NS + 1);
+        Vector<Scalar<T>> z, delay;
+        x[0].setZero(tgrid.size());
+        y[0].setZero(tgrid.size());
+        r[0] = 1;
+        for (size_t i = 0; i < NS; ++i) {
+            secondaries[i]->computeXYZ(tgrid, x[i + 1], y[i + 1], z, delay);
+            r[i + 1] = secondaries[i]->r;
+        }
+
+        // The squared separation of bodies `i` < `k` at time `tc`
+        Vector<Scalar<T>> tc(1), xi, yi, xk, yk;
+        auto sepsq = [&](size_t i, size_t k) {
+            xi.setZero(1);
+            yi.setZero(1);
+            if (i > 0)
+                secondaries[i - 1]->computeXYZ(tc, xi, yi, z, delay);
+            secondaries[k - 1]->computeXYZ(tc, xk, yk, z, delay);
+            return (xk(0) - xi(0)) * (xk(0) - xi(0)) +
+                   (yk(0) - yi(0)) * (yk(0) - yi(0));
+        };
+
+        Scalar<T> a, b, fa, fb, c, fc, tol;
+        bool done;
+        Eigen::Array<Scalar<T>, Eigen::Dynamic, 1> d2;
+        for (size_t i = 0; i < NS + 1; ++i) {
+            for (size_t k = i + 1; k < NS + 1; ++k) {
+                d2 = (x[k] - x[i]).array().square() +
+                     (y[k] - y[i]).array().square();
+                for (Scalar<T> R : {r[i] + r[k], r[i] - r[k]}) {
+                    if (R == 0) continue;
+                    for (size_t n = 0; n < N; ++n) {
+                        tol = 10 * mach_eps<Scalar<T>>() *
+                              (abs(tgrid(n * (M + 1))) +
+                               abs(tgrid(n * (M + 1) + M)));
+                        for (size_t m = 0; m < M; ++m) {
+                            fa = d2(n * (M + 1) + m) - R * R;
+                            fb = d2(n * (M + 1) + m + 1) - R * R;
+                            if ((fa > 0) == (fb > 0)) continue;
+
+                            // Illinois method
+                            a = tgrid(n * (M + 1) + m);
+                            b = tgrid(n * (M + 1) + m + 1);
+                            for (int iter = 0; iter < STARRY_CONTACT_MAX_ITER;
+                                 ++iter) {
+                                c = (a * fb - b * fa) / (fb - fa);
+                                tc(0) = c;
+                                fc = sepsq(i, k) - R * R;
+                                if ((fc > 0) == (fb > 0)) {
+                                    fa *= 0.5;
+                                } else {
+                                    a = b;
+                                    fa = fb;
+                                }
+                                done = (abs(c - b) <= tol) || (fc == 0);
+                                b = c;
+                                fb = fc;
+                                if (done) break;
+                            }
+                            contacts[n].push_back(b);
+                        }
+                    }
+                }
+            }
+        }
+
+        // Sort the contacts within each exposure
+        for (size_t n = 0; n < N; ++n) {
+            std::sort(contacts[n].begin(), contacts[n].end());
+            contacts[n].erase(std::unique(contacts[n].begin(),
+                                          contacts[n].end()),
+                              contacts[n].end());
+        }
+    }
+
+    /**
+    The times `tsub` and weights `wsub` at which to evaluate the flux
+    in the fixed-order exposure integration schemes. The samples of
+    the `n`-th point start at index `start[n]`; its weights sum to
+    unity. Points with zero exposure time are sampled once. In the
+    `contact` scheme, exposures are split at the contact points and
+    each piece is integrated separately.
+
+    */
+    template <class T>
+    inline void System<T>::getExposureSamples(const Vector<Scalar<T>>& time,
+                                              const Vector<Scalar<T>>& exptime,
+                                              std::vector<size_t>& start,
+                                              Vector<Scalar<T>>& tsub,
+                                              Vector<Scalar<T>>& wsub) {
+        size_t N = time.size();
+        Vector<Scalar<T>> nodes, weights;
+        getExposureNodes(nodes, weights);
+
+        // The edges of the pieces of each exposure
+        std::vector<std::vector<Scalar<T>>> edges(N);
+        if (expmode == "contact") {
+            Vector<Scalar<T>> t1 = time - 0.5 * exptime,
+                              t2 = time + 0.5 * exptime;
+            size_t M = STARRY_CONTACT_GRID;
+            Vector<Scalar<T>> tgrid(N * (M + 1));
+            for (size_t n = 0; n < N; ++n) {
+                for (size_t m = 0; m <= M; ++m)
+                    tgrid(n * (M + 1) + m) = t1(n) + (t2(n) - t1(n)) * m / M;
+            }
+            getContacts(tgrid, M, edges);
+            for (size_t n = 0; n < N; ++n) {
+                edges[n].insert(edges[n].begin(), t1(n));
+                edges[n].push_back(t2(n));
+            }
+        } else {
+            for (size_t n = 0; n < N; ++n)
+                edges[n] = {time(n) - 0.5 * exptime(n),
+                            time(n) + 0.5 * exptime(n)};
+        }
+
+        // Lay out the samples
+        start.resize(N + 1);
+        start[0] = 0;
+        for (size_t n = 0; n < N; ++n) {
+            if (exptime(n) > 0)
+                start[n + 1] = start[n] + exporder * (edges[n].size() - 1);
+            else
+                start[n + 1] = start[n] + 1;
+        }
+        tsub.resize(start[N]);
+        wsub.resize(start[N]);
+        Scalar<T> dt;
+        size_t j;
+        for (size_t n = 0; n < N; ++n) {
+            if (exptime(n) > 0) {
+                j = start[n];
+                for (size_t p = 0; p < edges[n].size() - 1; ++p) {
+                    dt = edges[n][p + 1] - edges[n][p];
+                    tsub.segment(j, exporder) = Vector<Scalar<T>>::Constant(
+                        exporder, 0.5 * (edges[n][p] + edges[n][p + 1])) +
+                        dt * nodes;
+                    wsub.segment(j, exporder) = dt / exptime(n) * weights;
+                    j += exporder;
+                }
+            } else {
+                tsub(start[n]) = time(n);
+                wsub(start[n]) = 1;
+            }
+        }
+    }
+
     /**
     Take a single orbital + photometric step.
 
@@ -1549,9 +2423,29 @@ namespace kepler {
     */
     template <class T>
     void System<T>::compute(const Vector<Scalar<T>>& time_, bool gradient, bool numerical) {
+        compute(time_, Vector<Scalar<T>>::Constant(time_.size(), getExposureTime()),
+                gradient, numerical);
+    }
+
+    /**
+    Compute the full system light curve, given the
+    exposure time of each point in days.
+
+    */
+    template <class T>
+    void System<T>::compute(const Vector<Scalar<T>>& time_,
+                            const Vector<Scalar<T>>& exptime_,
+                            bool gradient, bool numerical) {
 
         size_t NT = time_.size();
+        if ((size_t)exptime_.size() != NT)
+            throw errors::ValueError("The exposure time array must have "
+                                     "the same length as the time array.");
+        if ((exptime_.array() < 0).any())
+            throw errors::ValueError("Exposure times must be non-negative.");
         Vector<Scalar<T>> time = time_ * units::DayToSeconds;
+        texp = exptime_ * units::DayToSeconds;
+        bool integrated = (texp.array() > 0).any();
         int iletter = 98;                                                       // This is the ASCII code for 'b'
         std::string letter;                                                     // The secondary letter designation
         computed = true;
@@ -1632,16 +2526,62 @@ namespace kepler {
             }
         }
 
+        // If the time array and the primary are unchanged since the last
+        // call, only recompute the bodies whose parameters changed and
+        // the bodies they occult; reuse all other light curves
+        bool fold = (foldtol > 0) && !integrated && isPeriodic(gradient);
+        if (!gradient && !integrated && !fold && isCached(time)) {
+            computeIncremental(time, numerical);
+            return;
+        }
+        geometry_cached = false;
+        X.resize(secondaries.size() + 1);
+        X_cached.assign(secondaries.size() + 1, false);
+        for (auto body : getBodies())
+            body->system = this;
+        primary->thetavec.resize(NT);
+        for (auto secondary : secondaries)
+            secondary->thetavec.resize(NT);
+
+        // If the light curve is strictly periodic, compute a single orbit
+        if (fold) {
+            computeFolded(time, gradient, numerical);
+            return;
+        }
+
+        // Without gradients or exposure time integration, solve for all
+        // the orbits in a single vectorized pass, find the times at which
+        // any bodies overlap, and only run the occultation machinery then.
+        // Everywhere else the flux is the batched phase curve of each body.
+        if (!gradient && !integrated) {
+            computeSamples(time, numerical);
+            cache(time);
+            return;
+        }
+
+        // Same for the fixed-order exposure time integration schemes,
+        // where we evaluate all the sub-exposure times at once. Points
+        // with different exposure times are all handled in one pass.
+        if (!gradient && (expmode != "adaptive")) {
+            integrateSamples(time, numerical);
+            return;
+        }
+
+        // Otherwise, take one step at a time
+
         // Loop through the timeseries
+        boundary_cached = false;
         for (t = 0; t < NT; ++t){
 
             // Take an orbital step and compute the fluxes
-            if (exptime == 0)
+            if (texp(t) == 0)
                 step(time(t), gradient, numerical);
             else
-                integrate(time(t), gradient, numerical);
+                integrate(time(t), texp(t), gradient, numerical);
 
-            // Update the light curves and orbital positions
+            // Update the light curves, orbital positions and rotation angles
+            if (texp(t) == 0)
+                primary->thetavec(t) = primary->theta_deg(time(t));
             for (int n = 0; n < primary->nwav; ++n) {
                 primary->lightcurve(t, n) = getColumn(primary->flux_cur, n);
                 lightcurve(t, n) = getColumn(primary->flux_cur, n);
@@ -1651,10 +2591,11 @@ namespace kepler {
                 dL(t) = primary->dL(t);
             }
             for (auto secondary : secondaries) {
-                if (exptime == 0) {
+                if (texp(t) == 0) {
                     secondary->xvec(t) = secondary->x_cur;
                     secondary->yvec(t) = secondary->y_cur;
                     secondary->zvec(t) = secondary->z_cur;
+                    secondary->thetavec(t) = secondary->theta_deg(time(t));
                 }
                 for (int n = 0; n < primary->nwav; ++n) {
                     secondary->lightcurve(t, n) =
@@ -1668,6 +2609,1049 @@ namespace kepler {
             }
 
         }
+
+        // The fixed-order schemes don't necessarily sample the middle
+        // of the exposure, so compute the positions there separately
+        if (integrated && (expmode != "adaptive")) {
+            for (auto secondary : secondaries)
+                secondary->computeXYZ(time);
+        }
+
+    }
+
+    /**
+    Call `func(xo, yo, ro)` for each of the occultations of `body`
+    at the current positions of the bodies. This mirrors the
+    occultation logic in `step`.
+
+    */
+    template <class T>
+    template <typename Func>
+    inline void System<T>::occultations(Body<T>* body, Func func) {
+
+        Scalar<T> xo, yo, ro, bsq;
+
+        // Occultations involving the primary
+        for (auto secondary : secondaries) {
+            bsq = secondary->x_cur * secondary->x_cur +
+                  secondary->y_cur * secondary->y_cur;
+            if (bsq < (1 + secondary->r) * (1 + secondary->r)) {
+                if ((secondary->z_cur > 0) && (body == primary)) {
+                    func(secondary->x_cur, secondary->y_cur, secondary->r);
+                } else if ((secondary->z_cur <= 0) && (body == secondary)) {
+                    ro = 1. / secondary->r;
+                    func(-ro * secondary->x_cur, -ro * secondary->y_cur, ro);
+                }
+            }
+        }
+
+        // Occultations among the secondaries
+        size_t NS = secondaries.size();
+        size_t o, p;
+        for (size_t i = 0; i < NS; i++) {
+            for (size_t j = i + 1; j < NS; j++) {
+                if (secondaries[j]->z_cur > secondaries[i]->z_cur) {
+                    o = j;
+                    p = i;
+                } else {
+                    o = i;
+                    p = j;
+                }
+                if (body == secondaries[p]) {
+                    ro = 1. / secondaries[p]->r;
+                    xo = ro * (secondaries[o]->x_cur - secondaries[p]->x_cur);
+                    yo = ro * (secondaries[o]->y_cur - secondaries[p]->y_cur);
+                    ro = ro * secondaries[o]->r;
+                    if (xo * xo + yo * yo < (1 + ro) * (1 + ro))
+                        func(xo, yo, ro);
+                }
+            }
+        }
+
+    }
+
+    /**
+    Compute the row of the design matrix of `body` at the current
+    positions of the bodies, prior to the rotation of its map.
+
+    */
+    template <class T>
+    inline void System<T>::getDesignRow(Body<T>* body, VectorT<Scalar<T>>& row) {
+        VectorT<Scalar<T>> row_tot, row_occ;
+        body->getDesignRow(0, 0, 0, row_tot);
+        row = row_tot;
+        occultations(body,
+            [&](const Scalar<T>& xo, const Scalar<T>& yo, const Scalar<T>& ro) {
+                body->getDesignRow(xo, yo, ro, row_occ);
+                row += row_occ - row_tot;
+            }
+        );
+    }
+
+    /**
+    Find the indices of the times at which any two bodies overlap,
+    given the positions of the secondaries in `xvec` and `yvec`.
+    Occultations can only occur at these times. The test is slightly
+    conservative, since `occultations` does the exact test anyway.
+
+    */
+    template <class T>
+    inline void System<T>::getEvents(std::vector<size_t>& events) {
+        size_t NT = lightcurve.rows();
+        size_t NS = secondaries.size();
+        Scalar<T> slack = 1 + 1e-8;
+        Scalar<T> rsum;
+        Eigen::Array<bool, Eigen::Dynamic, 1> mask(NT);
+        Eigen::Array<Scalar<T>, Eigen::Dynamic, 1> dx, dy;
+        mask.setConstant(false);
+
+        // Occultations involving the primary
+        for (auto secondary : secondaries) {
+            rsum = (1 + secondary->r) * slack;
+            mask = mask || ((secondary->xvec.array().square() +
+                             secondary->yvec.array().square()) < rsum * rsum);
+        }
+
+        // Occultations among the secondaries
+        for (size_t i = 0; i < NS; i++) {
+            for (size_t j = i + 1; j < NS; j++) {
+                rsum = (secondaries[i]->r + secondaries[j]->r) * slack;
+                dx = secondaries[i]->xvec.array() - secondaries[j]->xvec.array();
+                dy = secondaries[i]->yvec.array() - secondaries[j]->yvec.array();
+                mask = mask || ((dx.square() + dy.square()) < rsum * rsum);
+            }
+        }
+
+        events.clear();
+        for (size_t k = 0; k < NT; ++k) {
+            if (mask(k))
+                events.push_back(k);
+        }
+    }
+
+    /**
+    Compute the light curve of `body` from the cached positions and
+    rotation angles. The unocculted flux is computed in a single
+    batched call; the occultations are only computed at the times
+    in `events`.
+
+    */
+    template <class T>
+    inline void System<T>::computeFlux(Body<T>* body,
+                                       const std::vector<size_t>& events,
+                                       bool numerical) {
+        if (allZero(body->L)) {
+            body->lightcurve.setZero();
+            return;
+        }
+
+        // The total flux
+        T flux_tot;
+        Row<T> flux, tot;
+        body->getPhaseCurve(body->thetavec, flux_tot, numerical);
+        for (long k = 0; k < body->thetavec.size(); ++k) {
+            tot = cwiseProduct(body->L, Row<T>(getRow(flux_tot, k)));
+            for (int n = 0; n < body->nwav; ++n)
+                body->lightcurve(k, n) = getColumn(tot, n);
+        }
+
+        // Collect the occultations at all the events...
+        std::vector<size_t> count;
+        std::vector<Scalar<T>> theta, xo, yo, ro;
+        for (size_t k : events) {
+            setPositions(k);
+            size_t n0 = xo.size();
+            occultations(body,
+                [&](const Scalar<T>& xo_, const Scalar<T>& yo_,
+                    const Scalar<T>& ro_) {
+                    theta.push_back(body->thetavec(k));
+                    xo.push_back(xo_);
+                    yo.push_back(yo_);
+                    ro.push_back(ro_);
+                }
+            );
+            count.push_back(xo.size() - n0);
+        }
+        if (xo.size() == 0) return;
+
+        // ...and compute the occulted flux in a single batched call
+        T flux_occ;
+        typedef Eigen::Map<const Vector<Scalar<T>>> VectorMap;
+        body->getFlux(VectorMap(theta.data(), theta.size()),
+                      VectorMap(xo.data(), xo.size()),
+                      VectorMap(yo.data(), yo.size()),
+                      VectorMap(ro.data(), ro.size()),
+                      flux_occ, numerical);
+        size_t j = 0;
+        for (size_t e = 0; e < events.size(); ++e) {
+            size_t k = events[e];
+            tot = cwiseProduct(body->L, Row<T>(getRow(flux_tot, k)));
+            flux = tot;
+            for (size_t m = 0; m < count[e]; ++m, ++j)
+                flux += cwiseProduct(body->L, Row<T>(getRow(flux_occ, j))) - tot;
+            for (int n = 0; n < body->nwav; ++n)
+                body->lightcurve(k, n) = getColumn(flux, n);
+        }
+    }
+
+    /**
+    Compute the light curves of all the bodies at each time in `time`
+    without exposure time integration: solve for all the orbits at once,
+    find the times at which any bodies overlap, and only run the
+    occultation machinery then.
+
+    */
+    template <class T>
+    inline void System<T>::computeSamples(const Vector<Scalar<T>>& time,
+                                          bool numerical) {
+        size_t NT = time.size();
+        lightcurve.resize(NT, primary->nwav);
+        for (auto body : getBodies()) {
+            body->lightcurve.resize(NT, primary->nwav);
+            body->thetavec.resize(NT);
+        }
+        for (auto secondary : secondaries)
+            secondary->computeXYZ(time);
+        for (t = 0; t < NT; ++t) {
+            primary->thetavec(t) = primary->theta_deg(time(t));
+            for (auto secondary : secondaries) {
+                secondary->setXYZ(t);
+                secondary->thetavec(t) = secondary->theta_deg(time(t));
+            }
+        }
+        std::vector<size_t> events;
+        getEvents(events);
+        lightcurve.setZero();
+        for (auto body : getBodies()) {
+            computeFlux(body, events, numerical);
+            lightcurve += body->lightcurve;
+        }
+    }
+
+    /**
+    Fixed-order exposure time integration: compute the light curves at
+    all the sub-exposure times in a single vectorized pass, then take
+    the weighted sum over each exposure. Points with zero exposure
+    time are evaluated once.
+
+    */
+    template <class T>
+    inline void System<T>::integrateSamples(const Vector<Scalar<T>>& time,
+                                            bool numerical) {
+        size_t NT = time.size();
+        std::vector<size_t> start;
+        Vector<Scalar<T>> tsub, wsub;
+        getExposureSamples(time, texp, start, tsub, wsub);
+        computeSamples(tsub, numerical);
+
+        // Integrate over each exposure
+        Matrix<Scalar<T>> lc;
+        size_t K;
+        std::vector<Matrix<Scalar<T>>*> curves;
+        for (auto body : getBodies())
+            curves.push_back(&(body->lightcurve));
+        curves.push_back(&lightcurve);
+        for (auto curve : curves) {
+            lc = *curve;
+            curve->resize(NT, primary->nwav);
+            for (size_t n = 0; n < NT; ++n) {
+                K = start[n + 1] - start[n];
+                curve->row(n) = wsub.segment(start[n], K).transpose() *
+                                lc.block(start[n], 0, K, lc.cols());
+            }
+        }
+
+        // Positions and rotation angles at the middle of the exposure
+        for (auto secondary : secondaries)
+            secondary->computeXYZ(time);
+        for (auto body : getBodies()) {
+            body->thetavec.resize(NT);
+            for (size_t n = 0; n < NT; ++n)
+                body->thetavec(n) = body->theta_deg(time(n));
+        }
+    }
+
+    /**
+    Is the light curve strictly periodic in the orbital period? This is
+    the case for a single secondary if the maps of both bodies are
+    uniform (up to limb darkening), so that their rotation doesn't
+    matter. The derivatives with respect to the map coefficients do
+    depend on the rotation, so for the gradient the bodies must also
+    not rotate.
+
+    */
+    template <class T>
+    inline bool System<T>::isPeriodic(bool gradient) {
+        if (secondaries.size() != 1)
+            return false;
+        for (auto body : getBodies()) {
+            if (body->y_deg > 0)
+                return false;
+            if (gradient && (body->prot != INFINITY))
+                return false;
+        }
+        return true;
+    }
+
+    /**
+    Refine the piece [`a`, `b`] of the phase-folded light curve, given
+    the flux `f` at five equally spaced times. We bisect the piece until
+    the quartic interpolant predicts the flux at the midpoints of its
+    four sub-intervals to within `foldtol`. Returns false if more than
+    `budget` flux evaluations are needed in total.
+
+    */
+    template <class T>
+    bool System<T>::refineFold(PhaseTable<T>& table, const Scalar<T>& a,
+                               const Scalar<T>& b,
+                               const std::vector<Exposure<T>>& f, int depth,
+                               size_t& count, size_t budget, bool gradient,
+                               bool numerical) {
+        Scalar<T> h = (b - a) / 8;
+        std::vector<Exposure<T>> fmid;
+        for (int j = 0; j < 4; ++j)
+            fmid.push_back(step(a + (2 * j + 1) * h, gradient, numerical, false));
+        count += 4;
+        if (count > budget)
+            return false;
+
+        // Compare to the interpolant
+        bool converged = true;
+        for (int j = 0; (j < 4) && converged; ++j) {
+            Exposure<T> d = fmid[j] -
+                PhaseTable<T>::interpolate(f, (2 * j + 1) / 8.);
+            for (size_t i = 0; i < secondaries.size() + 1; ++i) {
+                for (int n = 0; n < primary->nwav; ++n) {
+                    if (abs(getIndex(d.flux[i], n)) > foldtol)
+                        converged = false;
+                }
+            }
+        }
+
+        // Split the piece in two
+        Scalar<T> mid = 0.5 * (a + b);
+        std::vector<Exposure<T>> left = {f[0], fmid[0], f[1], fmid[1], f[2]},
+                                 right = {f[2], fmid[2], f[3], fmid[3], f[4]};
+        if (converged || (depth >= STARRY_FOLD_MAX_DEPTH)) {
+            table.add(a, mid, left);
+            table.add(mid, b, right);
+            return true;
+        }
+        return refineFold(table, a, mid, left, depth + 1, count, budget,
+                          gradient, numerical) &&
+               refineFold(table, mid, b, right, depth + 1, count, budget,
+                          gradient, numerical);
+    }
+
+    /**
+    Compute the light curve of a strictly periodic system. We fold the
+    times at which any bodies overlap onto a single orbit, split the
+    folded orbit at the contact points, and interpolate the flux within
+    each piece from a table computed to within `foldtol`. Everywhere
+    else the flux is the (constant) unocculted flux. Since
+    F(t) = F(t - k porb), the derivative with respect to `porb` at the
+    `k`-th epoch picks up a term -k dF/dt. If the table would take more
+    flux evaluations than the occultations themselves, we compute
+    the occultations directly instead.
+
+    */
+    template <class T>
+    inline void System<T>::computeFolded(const Vector<Scalar<T>>& time,
+                                         bool gradient, bool numerical) {
+        size_t NT = time.size();
+        Secondary<T>* secondary = secondaries[0];
+        Scalar<T> porb = secondary->porb;
+        std::vector<Body<T>*> bodies = getBodies();
+
+        // Positions, rotation angles and occultation events
+        secondary->computeXYZ(time);
+        for (t = 0; t < NT; ++t) {
+            primary->thetavec(t) = primary->theta_deg(time(t));
+            secondary->setXYZ(t);
+            secondary->thetavec(t) = secondary->theta_deg(time(t));
+        }
+        std::vector<size_t> events;
+        getEvents(events);
+        size_t NE = events.size();
+
+        // Store the flux and gradient of each body at index `k`
+        auto store = [&](size_t k, const Exposure<T>& f) {
+            for (size_t i = 0; i < bodies.size(); ++i) {
+                for (int n = 0; n < primary->nwav; ++n)
+                    bodies[i]->lightcurve(k, n) = getColumn(f.flux[i], n);
+                if (gradient)
+                    bodies[i]->dL(k) = f.gradient[i];
+            }
+        };
+
+        // The unocculted flux
+        if (gradient) {
+            std::vector<bool> occulted(NT, false);
+            for (size_t k : events)
+                occulted[k] = true;
+            for (size_t k = 0; k < NT; ++k) {
+                if (!occulted[k]) {
+                    Exposure<T> f = step(time(k), gradient, numerical, false);
+                    for (size_t j = 0; j < NT; ++j)
+                        store(j, f);
+                    break;
+                }
+            }
+        } else {
+            for (auto body : bodies)
+                computeFlux(body, std::vector<size_t>(), numerical);
+        }
+
+        if (NE > 0) {
+
+            // Fold the events onto a single orbit that starts
+            // in the middle of the largest gap between them
+            std::vector<Scalar<T>> phase(NE);
+            Scalar<T> x;
+            for (size_t j = 0; j < NE; ++j) {
+                x = time(events[j]) - time(events[0]);
+                phase[j] = x - porb * floor(x / porb);
+            }
+            std::sort(phase.begin(), phase.end());
+            Scalar<T> gap = phase[0] + porb - phase[NE - 1],
+                      start = phase[NE - 1];
+            for (size_t j = 1; j < NE; ++j) {
+                if (phase[j] - phase[j - 1] > gap) {
+                    gap = phase[j] - phase[j - 1];
+                    start = phase[j - 1];
+                }
+            }
+            Scalar<T> t0 = time(events[0]) + start + 0.5 * gap;
+            std::vector<Scalar<T>> epoch(NE);
+            Vector<Scalar<T>> tfold(NE);
+            for (size_t j = 0; j < NE; ++j) {
+                epoch[j] = floor((time(events[j]) - t0) / porb);
+                tfold(j) = time(events[j]) - epoch[j] * porb;
+            }
+
+            // Split the folded orbit at the contact points. We look for
+            // them at the events and halfway between consecutive events,
+            // so we also find the contacts in the gaps between the events
+            std::vector<Scalar<T>> tsort(tfold.data(), tfold.data() + NE);
+            std::sort(tsort.begin(), tsort.end());
+            Vector<Scalar<T>> tgrid(2 * NE - 1);
+            for (size_t j = 0; j < NE; ++j) {
+                tgrid(2 * j) = tsort[j];
+                if (j < NE - 1)
+                    tgrid(2 * j + 1) = 0.5 * (tsort[j] + tsort[j + 1]);
+            }
+            std::vector<std::vector<Scalar<T>>> contacts;
+            getContacts(tgrid, 2 * NE - 2, contacts);
+            std::vector<Scalar<T>> edges = contacts[0];
+            edges.insert(edges.begin(), tsort[0]);
+            edges.push_back(tsort[NE - 1]);
+
+            // Tabulate the flux on each piece
+            PhaseTable<T> table;
+            size_t count = 0;
+            bool success = false;
+            for (size_t p = 0; p < edges.size() - 1; ++p) {
+                // Skip empty pieces
+                Scalar<T> a = edges[p], b = edges[p + 1];
+                auto next = std::lower_bound(tsort.begin(), tsort.end(), a);
+                if (!(b > a) || (next == tsort.end()) || (*next > b))
+                    continue;
+                std::vector<Exposure<T>> f;
+                for (int m = 0; m < 5; ++m)
+                    f.push_back(step(a + m * (b - a) / 4, gradient,
+                                     numerical, false));
+                count += 5;
+                success = (count <= NE) &&
+                          refineFold(table, a, b, f, 0, count, NE,
+                                     gradient, numerical);
+                if (!success) break;
+            }
+
+            // Interpolate, or compute the occultations directly
+            long ip = std::find(dL_names.begin(), dL_names.end(), "b.porb") -
+                      dL_names.begin();
+            for (size_t j = 0; j < NE; ++j) {
+                if (success) {
+                    Exposure<T> f = table.evaluate(tfold(j));
+                    if (gradient) {
+                        for (size_t i = 0; i < bodies.size(); ++i)
+                            f.gradient[i].row(ip) -=
+                                epoch[j] * f.gradient[i].row(0);
+                    }
+                    store(events[j], f);
+                } else {
+                    store(events[j], step(time(events[j]), gradient,
+                                          numerical, false));
+                }
+            }
+
+        }
+
+        // The system light curve
+        lightcurve.setZero();
+        for (auto body : bodies)
+            lightcurve += body->lightcurve;
+        if (gradient) {
+            for (size_t k = 0; k < NT; ++k) {
+                dL(k) = primary->dL(k);
+                dL(k) += secondary->dL(k);
+            }
+        }
+    }
+
+    //! Return the primary and the secondaries in a single vector
+    template <class T>
+    inline std::vector<Body<T>*> System<T>::getBodies() {
+        std::vector<Body<T>*> bodies;
+        bodies.push_back(primary);
+        for (auto secondary : secondaries)
+            bodies.push_back(secondary);
+        return bodies;
+    }
+
+    /**
+    Append the time array, the exposure time and the parameters of the
+    primary to `geo`. If any of these change, the positions of all the
+    bodies must be recomputed.
+
+    */
+    template <class T>
+    inline void System<T>::getGeometry(const Vector<Scalar<T>>& time,
+                                       std::vector<Scalar<T>>& geo) {
+        geo.reserve(time.size() + 16);
+        for (long i = 0; i < time.size(); ++i)
+            geo.push_back(time(i));
+        geo.push_back(exptime);
+        primary->getGeometry(geo);
+    }
+
+    /**
+    Are the positions, rotation angles and light curves of all the bodies
+    from the last call to `compute` still valid for the time array `time`,
+    up to changes in the parameters of individual secondaries?
+
+    */
+    template <class T>
+    inline bool System<T>::isCached(const Vector<Scalar<T>>& time) {
+        if (!geometry_cached)
+            return false;
+        for (auto body : getBodies()) {
+            if (body->system != this)
+                return false;
+        }
+        std::vector<Scalar<T>> geo;
+        getGeometry(time, geo);
+        return geo == geometry;
+    }
+
+    /**
+    Store the parameters that determined the last light curve.
+
+    */
+    template <class T>
+    inline void System<T>::cache(const Vector<Scalar<T>>& time) {
+        std::vector<Body<T>*> bodies = getBodies();
+        geometry.clear();
+        getGeometry(time, geometry);
+        body_geometry.assign(bodies.size(), std::vector<Scalar<T>>());
+        body_state.assign(bodies.size(), std::vector<Scalar<T>>());
+        body_solver.assign(bodies.size(), std::vector<Scalar<T>>());
+        body_r.resize(bodies.size());
+        for (size_t i = 0; i < bodies.size(); ++i) {
+            bodies[i]->getGeometry(body_geometry[i]);
+            bodies[i]->getState(body_state[i]);
+            bodies[i]->getSolver(body_solver[i]);
+            body_r[i] = bodies[i]->r;
+        }
+        geometry_cached = true;
+    }
+
+    /**
+    Restore the cached positions of the secondaries at the `t`-th
+    time in the light curve.
+
+    */
+    template <class T>
+    inline void System<T>::setPositions(size_t t) {
+        for (auto secondary : secondaries) {
+            secondary->x_cur = secondary->xvec(t);
+            secondary->y_cur = secondary->yvec(t);
+            secondary->z_cur = secondary->zvec(t);
+        }
+    }
+
+    /**
+    Do the disks of bodies `i` and `k` (0 is the primary) overlap at
+    any time, given their sky positions `x` and `y` and their radii `r`?
+
+    */
+    template <class T>
+    inline bool System<T>::overlap(size_t i, size_t k,
+                                   const std::vector<Vector<Scalar<T>>>& x,
+                                   const std::vector<Vector<Scalar<T>>>& y,
+                                   const std::vector<Scalar<T>>& r) {
+        Scalar<T> rsum = r[i] + r[k];
+        Vector<Scalar<T>> dx = x[k] - x[i],
+                          dy = y[k] - y[i];
+        return ((dx.array() * dx.array() + dy.array() * dy.array()) <
+                rsum * rsum).any();
+    }
+
+    /**
+    Compute the light curve of the `i`-th body (0 is the primary) from
+    the cached positions and rotation angles. If the body was not
+    `occulted` by a body whose orbit changed, its cached design matrix
+    is still valid. The light curve of a body without limb darkening
+    is linear in its spherical harmonic coefficients, so we cache its
+    design matrix and evaluate the light curve as a single matrix-vector
+    product.
+
+    */
+    template <class T>
+    inline void System<T>::computeBody(size_t i, bool occulted,
+                                       const std::vector<size_t>& events,
+                                       bool numerical) {
+        Body<T>* body = getBodies()[i];
+        size_t NT = lightcurve.rows();
+        if (occulted)
+            X_cached[i] = false;
+        if (allZero(body->L)) {
+            body->lightcurve.setZero();
+        } else if ((body->u_deg == 0) && !occulted) {
+            // Linear in the map coefficients
+            if (!X_cached[i]) {
+                VectorT<Scalar<T>> row;
+                X[i].resize(NT, body->N);
+                for (size_t k = 0; k < NT; ++k) {
+                    setPositions(k);
+                    getDesignRow(body, row);
+                    X[i].row(k) = row;
+                }
+                body->rotateDesignMatrix(body->thetavec, X[i]);
+                X_cached[i] = true;
+            }
+            for (int n = 0; n < body->nwav; ++n)
+                body->lightcurve.col(n) = getColumn(body->L, n) *
+                                          (X[i] * getColumn(body->y, n));
+        } else {
+            // Evaluate the flux at each of the cached positions
+            computeFlux(body, events, numerical);
+        }
+    }
+
+    /**
+    Recompute the system light curve, reusing as much as possible
+    from the last call to `compute`. The orbits of the secondaries whose
+    orbital or rotational parameters changed are recomputed. A body's
+    light curve is recomputed only if its map or luminosity changed, if
+    its orbit changed, or if it overlaps with a body whose orbit changed
+    (before or after the change). The light curves of all other bodies
+    are reused. This is called when the time array and the primary's
+    parameters are unchanged.
+
+    */
+    template <class T>
+    inline void System<T>::computeIncremental(const Vector<Scalar<T>>& time,
+                                              bool numerical) {
+
+        std::vector<Body<T>*> bodies = getBodies();
+        size_t NB = bodies.size();
+        size_t NT = time.size();
+        std::vector<bool> moved(NB, false),
+                          occulted(NB, false),
+                          dirty(NB, false);
+        std::vector<Vector<Scalar<T>>> x0(NB), y0(NB), x(NB), y(NB);
+        std::vector<Scalar<T>> geo, state, solver, r0(body_r), r(NB);
+
+        // Figure out which bodies changed. A change in the solver
+        // settings also invalidates the cached design matrix.
+        for (size_t i = 0; i < NB; ++i) {
+            geo.clear();
+            bodies[i]->getGeometry(geo);
+            if (geo != body_geometry[i]) {
+                moved[i] = true;
+                body_geometry[i] = geo;
+            }
+            state.clear();
+            bodies[i]->getState(state);
+            if (state != body_state[i]) {
+                dirty[i] = true;
+                body_state[i] = state;
+            }
+            solver.clear();
+            bodies[i]->getSolver(solver);
+            if (solver != body_solver[i]) {
+                X_cached[i] = false;
+                body_solver[i] = solver;
+            }
+            r[i] = bodies[i]->r;
+        }
+        body_r = r;
+
+        // Recompute the orbits of the secondaries that moved,
+        // keeping track of their old & new sky positions
+        x0[0].setZero(NT);
+        y0[0].setZero(NT);
+        for (size_t i = 1; i < NB; ++i) {
+            Secondary<T>* secondary = secondaries[i - 1];
+            x0[i] = secondary->xvec;
+            y0[i] = secondary->yvec;
+            if (moved[i]) {
+                secondary->computeXYZ(time);
+                for (size_t k = 0; k < NT; ++k) {
+                    secondary->setXYZ(k);
+                    secondary->thetavec(k) = secondary->theta_deg(time(k));
+                }
+            }
+        }
+        x = x0;
+        y = y0;
+        for (size_t i = 1; i < NB; ++i) {
+            x[i] = secondaries[i - 1]->xvec;
+            y[i] = secondaries[i - 1]->yvec;
+        }
+
+        // A body must be recomputed if it moved or if it overlaps
+        // with a body that moved, either before the move (with the
+        // old radii) or after it (with the new radii)
+        for (size_t k = 0; k < NB; ++k) {
+            if (!moved[k])
+                continue;
+            occulted[k] = true;
+            for (size_t i = 0; i < NB; ++i) {
+                if ((i != k) && !occulted[i])
+                    occulted[i] = overlap(i, k, x0, y0, r0) ||
+                                 overlap(i, k, x, y, r);
+            }
+        }
+
+        // Update the light curves
+        std::vector<size_t> events;
+        getEvents(events);
+        lightcurve.setZero();
+        for (size_t i = 0; i < NB; ++i) {
+            if (occulted[i] || dirty[i])
+                computeBody(i, occulted[i], events, numerical);
+            lightcurve += bodies[i]->lightcurve;
+        }
+
+    }
+
+    /**
+    Set the parameter `name` of one of the bodies to `value`. Names
+    are those of the gradient of the light curve: the letter of the
+    body (`A` for the primary, `b`, `c`, ... for the secondaries),
+    a period, and the name of the parameter in the units of the
+    corresponding attribute. The limb darkening coefficients are
+    `u1`, `u2`, ... and the spherical harmonic coefficients are
+    `Y_{l,m}`. Spectral parameters are set to `value` at all
+    wavelengths.
+
+    */
+    template <class T>
+    void System<T>::setParameter(const std::string& name,
+                                 const Scalar<T>& value) {
+
+        // Find the body
+        Body<T>* body = nullptr;
+        Secondary<T>* secondary = nullptr;
+        if ((name.size() > 2) && (name[1] == '.')) {
+            if (name[0] == 'A') {
+                body = primary;
+            } else if ((name[0] >= 'b') &&
+                       (size_t(name[0] - 'b') < secondaries.size())) {
+                secondary = secondaries[name[0] - 'b'];
+                body = secondary;
+            }
+        }
+        if (!body)
+            throw errors::ValueError("Invalid parameter name `" + name + "`.");
+        std::string param = name.substr(2);
+        Row<T> coeff;
+        resize(coeff, 1, body->nwav);
+        setOnes(coeff);
+        coeff *= value;
+
+        // Map coefficients. Note that `pos` is only set if
+        // the whole format matched.
+        int l, m, pos = -1;
+        sscanf(param.c_str(), "u%d%n", &l, &pos);
+        if (pos == int(param.size())) {
+            body->setU(l, coeff);
+            return;
+        }
+        pos = -1;
+        sscanf(param.c_str(), "Y_{%d,%d}%n", &l, &m, &pos);
+        if (pos == int(param.size())) {
+            body->setY(l, m, coeff);
+            return;
+        }
+
+        // Parameters of all bodies
+        if (param == "prot") {
+            body->setRotPer(value);
+            return;
+        } else if (param == "tref") {
+            body->setRefTime(value);
+            return;
+        } else if (param == "L") {
+            if (secondary)
+                secondary->setLuminosity(coeff);
+            else
+                primary->setLuminosity(coeff);
+            return;
+        }
+
+        // Parameters of the secondaries
+        if (secondary) {
+            if (param == "r") {
+                secondary->setRadius(value);
+                return;
+            } else if (param == "a") {
+                secondary->setSemi(value);
+                return;
+            } else if (param == "porb") {
+                secondary->setOrbPer(value);
+                return;
+            } else if (param == "inc") {
+                secondary->setInc(value);
+                return;
+            } else if (param == "ecc") {
+                secondary->setEcc(value);
+                return;
+            } else if (param == "w") {
+                secondary->setVarPi(value);
+                return;
+            } else if (param == "Omega") {
+                secondary->setOmega(value);
+                return;
+            } else if (param == "lambda0") {
+                secondary->setLambda0(value);
+                return;
+            }
+        }
+        throw errors::ValueError("Invalid parameter name `" + name + "`.");
+
+    }
+
+    /**
+    Compute the light curve for each of the parameter sets in the rows
+    of `params`, whose columns are the parameters in `names` (see
+    `setParameter`). Row `k` of `flux` is the light curve of the `k`-th
+    set, with the wavelengths of each time contiguous. The parameter sets
+    are split among `nthreads` threads, each of which works on its own
+    copy of the system, so the bodies of this system are left untouched.
+    Within a thread, consecutive parameter sets reuse the cached geometry
+    whenever only the maps change.
+
+    */
+    template <class T>
+    void System<T>::computeBatch(const Vector<Scalar<T>>& time,
+                                 const Vector<Scalar<T>>& exptime,
+                                 const Matrix<Scalar<T>>& params,
+                                 const std::vector<std::string>& names,
+                                 Matrix<Scalar<T>>& flux, int nthreads) {
+        if (size_t(params.cols()) != names.size())
+            throw errors::ValueError("The number of columns of the parameter "
+                                     "array must match the number of names.");
+        size_t nsets = params.rows();
+        int nwav = primary->nwav;
+        flux.resize(nsets, time.size() * nwav);
+        nthreads = parallel::getNumThreads(nthreads, nsets);
+        parallel::parallelFor(nsets, nthreads,
+            [&](int thread, size_t start, size_t stop) {
+
+                // Copy the bodies and the settings of the system
+                Primary<T> primary_(primary->lmax, nwav);
+                primary_.copyState(*primary);
+                std::vector<std::unique_ptr<Secondary<T>>> owner;
+                std::vector<Secondary<T>*> secondaries_;
+                for (auto secondary : secondaries) {
+                    owner.emplace_back(new Secondary<T>(secondary->lmax, nwav));
+                    owner.back()->copyState(*secondary);
+                    secondaries_.push_back(owner.back().get());
+                }
+                System<T> system(&primary_, secondaries_);
+                system.setExposureTime(getExposureTime());
+                system.setExposureTol(getExposureTol());
+                system.setExposureMaxDepth(getExposureMaxDepth());
+                system.setExposureMode(getExposureMode());
+                system.setExposureOrder(getExposureOrder());
+                system.setFoldTol(getFoldTol());
+
+                // Compute the light curves
+                for (size_t k = start; k < stop; ++k) {
+                    for (size_t j = 0; j < names.size(); ++j)
+                        system.setParameter(names[j], params(k, j));
+                    system.compute(time, exptime);
+                    for (long t = 0; t < time.size(); ++t) {
+                        for (int n = 0; n < nwav; ++n)
+                            flux(k, t * nwav + n) = system.lightcurve(t, n);
+                    }
+                }
+
+            }
+        );
+    }
+
+    /**
+    Compute the design matrix of `body`: the (ntime x N) matrix `X`
+    such that the light curve of the body is `L * X . y`, where `L` is
+    its luminosity and `y` its vector of spherical harmonic coefficients.
+
+    */
+    template <class T>
+    void System<T>::designMatrix(const Vector<Scalar<T>>& time_, Body<T>* body,
+                                 Matrix<Scalar<T>>& Xbody) {
+
+        // Check that the body is part of this system
+        bool found = (body == primary);
+        for (auto secondary : secondaries)
+            found = found || (body == secondary);
+        if (!found)
+            throw errors::ValueError("The body is not part of this system.");
+        if (exptime > 0)
+            throw errors::NotImplementedError("The design matrix is not "
+                                              "available for finite "
+                                              "exposure times.");
+
+        // Sync the orbital and sky maps and the speed of light
+        for (auto secondary : secondaries) {
+            secondary->syncSkyMap();
+            secondary->c_light = &(primary->c_light);
+        }
+
+        // Solve for the orbits. We don't store the positions in the
+        // secondaries, so their light curves and the cached geometry
+        // of the last call to `compute` are left untouched.
+        size_t NT = time_.size();
+        size_t NS = secondaries.size();
+        Vector<Scalar<T>> time = time_ * units::DayToSeconds;
+        std::vector<Vector<Scalar<T>>> x(NS), y(NS), z(NS), delay(NS);
+        for (size_t j = 0; j < NS; ++j)
+            secondaries[j]->computeXYZ(time, x[j], y[j], z[j], delay[j]);
+
+        // Compute the unrotated design matrix
+        Vector<Scalar<T>> theta_deg(NT);
+        VectorT<Scalar<T>> row;
+        Xbody.resize(NT, body->N);
+        for (size_t i = 0; i < NT; ++i) {
+            for (size_t j = 0; j < NS; ++j) {
+                secondaries[j]->x_cur = x[j](i);
+                secondaries[j]->y_cur = y[j](i);
+                secondaries[j]->z_cur = z[j](i);
+                secondaries[j]->delay = delay[j](i);
+            }
+            getDesignRow(body, row);
+            Xbody.row(i) = row;
+            theta_deg(i) = body->theta_deg(time(i));
+        }
+
+        // Rotate it
+        body->rotateDesignMatrix(theta_deg, Xbody);
+
+    }
+
+    /**
+    Compute the sky positions of all the secondaries at the times
+    `time_` (in days) without computing any fluxes. Column `i` of the
+    (ntime x nsecondaries) matrices `xpos`, `ypos` and `zpos` is the
+    position of the `i`-th secondary in units of the primary radius.
+
+    */
+    template <class T>
+    void System<T>::positions(const Vector<Scalar<T>>& time_,
+                              Matrix<Scalar<T>>& xpos,
+                              Matrix<Scalar<T>>& ypos,
+                              Matrix<Scalar<T>>& zpos) {
+        size_t NT = time_.size();
+        size_t NS = secondaries.size();
+        Vector<Scalar<T>> time = time_ * units::DayToSeconds;
+        Vector<Scalar<T>> x, y, z, delay;
+        xpos.resize(NT, NS);
+        ypos.resize(NT, NS);
+        zpos.resize(NT, NS);
+        for (size_t i = 0; i < NS; ++i) {
+            secondaries[i]->c_light = &(primary->c_light);
+            secondaries[i]->computeXYZ(time, x, y, z, delay);
+            xpos.col(i) = x;
+            ypos.col(i) = y;
+            zpos.col(i) = z;
+        }
+    }
+
+    /**
+    Compute the sky positions of all the secondaries at the times
+    `time_` (in days) and their derivatives with respect to the time
+    and the orbital parameters of each secondary. The derivatives are
+    stored in `dxpos`, `dypos` and `dzpos`, one (ntime x nsecondaries)
+    matrix per parameter, with the parameter names in `names`.
+
+    */
+    template <class T>
+    void System<T>::positions(const Vector<Scalar<T>>& time_,
+                              Matrix<Scalar<T>>& xpos,
+                              Matrix<Scalar<T>>& ypos,
+                              Matrix<Scalar<T>>& zpos,
+                              std::vector<std::string>& names,
+                              std::vector<Matrix<Scalar<T>>>& dxpos,
+                              std::vector<Matrix<Scalar<T>>>& dypos,
+                              std::vector<Matrix<Scalar<T>>>& dzpos) {
+        size_t NT = time_.size();
+        size_t NS = secondaries.size();
+        Vector<Scalar<T>> time = time_ * units::DayToSeconds;
+        Scalar<T> deg = pi<Scalar<T>>() / 180.0;
+        int iletter = 98;                                                       // This is the ASCII code for 'b'
+        std::string letter;                                                     // The secondary letter designation
+
+        // The names of the derivatives
+        names.clear();
+        names.push_back("time");
+        for (size_t i = 0; i < NS; ++i) {
+            letter = (char) iletter++;
+            for (std::string name : {"a", "porb", "inc", "ecc", "w", "Omega",
+                                     "lambda0", "tref"})
+                names.push_back(letter + "." + name);
+        }
+
+        // Allocate
+        xpos.resize(NT, NS);
+        ypos.resize(NT, NS);
+        zpos.resize(NT, NS);
+        dxpos.assign(names.size(), Matrix<Scalar<T>>::Zero(NT, NS));
+        dypos.assign(names.size(), Matrix<Scalar<T>>::Zero(NT, NS));
+        dzpos.assign(names.size(), Matrix<Scalar<T>>::Zero(NT, NS));
+
+        // Chain rule from the AutoDiff variables to the user parameters
+        auto chain = [&](const Vector<Scalar<T>>& d,
+                         std::vector<Matrix<Scalar<T>>>& dpos,
+                         size_t t, size_t i) {
+            size_t g = 1 + 8 * i;
+            dpos[0](t, i) = d(0) * units::DayToSeconds;                         // time
+            dpos[g](t, i) = d(1);                                               // a
+            dpos[g + 1](t, i) = d(5) * units::DayToSeconds;                     // porb
+            dpos[g + 2](t, i) = d(8) * deg;                                     // inc
+            dpos[g + 3](t, i) = d(2);                                           // ecc
+            dpos[g + 4](t, i) = (d(6) - d(3)) * deg;                            // w
+            dpos[g + 5](t, i) = d(7) * deg;                                     // Omega
+            dpos[g + 6](t, i) = d(3) * deg;                                     // lambda0
+            dpos[g + 7](t, i) = d(4) * units::DayToSeconds;                     // tref
+        };
+
+        // Take a step with the AutoDiff solver at each time
+        for (size_t i = 0; i < NS; ++i) {
+            Secondary<T>* secondary = secondaries[i];
+            secondary->c_light = &(primary->c_light);
+            for (size_t t = 0; t < NT; ++t) {
+                secondary->computeXYZ(time(t), true);
+                xpos(t, i) = secondary->x_cur;
+                ypos(t, i) = secondary->y_cur;
+                zpos(t, i) = secondary->z_cur;
+                chain(secondary->AD.x.derivatives(), dxpos, t, i);
+                chain(secondary->AD.y.derivatives(), dypos, t, i);
+                chain(secondary->AD.z.derivatives(), dzpos, t, i);
+            }
+        }
     }
 
     /**
@@ -1,48 +1,29 @@
 # -*- coding: utf-8 -*-
-from . import _starry_mono_64, _starry_mono_128, \
-              _starry_spectral_64, _starry_spectral_128
+from . import _starry_mono_64, _module
 
 
 # Class factory
 def Primary(lmax=2, nwav=1, multi=False):
-    if (nwav == 1) and (not multi):
-        return _starry_mono_64.kepler.Primary(lmax, nwav)
-    elif (nwav == 1) and (multi):
-        return _starry_mono_128.kepler.Primary(lmax, nwav)
-    elif (nwav > 1) and (not multi):
-        return _starry_spectral_64.kepler.Primary(lmax, nwav)
-    elif (nwav > 1) and (multi):
-        return _starry_spectral_128.kepler.Primary(lmax, nwav)
-    else:
+    module = _module(nwav, multi)
+    if module is None:
         raise ValueError("Invalid argument(s) to `Primary`.")
+    return module.kepler.Primary(lmax, nwav)
 
 
 # Class factory
 def Secondary(lmax=2, nwav=1, multi=False):
-    if (nwav == 1) and (not multi):
-        return _starry_mono_64.kepler.Secondary(lmax, nwav)
-    elif (nwav == 1) and (multi):
-        return _starry_mono_128.kepler.Secondary(lmax, nwav)
-    elif (nwav > 1) and (not multi):
-        return _starry_spectral_64.kepler.Secondary(lmax, nwav)
-    elif (nwav > 1) and (multi):
-        return _starry_spectral_128.kepler.Secondary(lmax, nwav)
-    else:
+    module = _module(nwav, multi)
+    if module is None:
         raise ValueError("Invalid argument(s) to `Secondary`.")
+    return module.kepler.Secondary(lmax, nwav)
 
 
 # Class factory
 def System(primary, *secondaries):
-    if (primary.nwav == 1) and (not primary.multi):
-        return _starry_mono_64.kepler.System(primary, secondaries)
-    elif (primary.nwav == 1) and (primary.multi):
-        return _starry_mono_128.kepler.System(primary, secondaries)
-    elif (primary.nwav > 1) and (not primary.multi):
-        return _starry_spectral_64.kepler.System(primary, secondaries)
-    elif (primary.nwav > 1) and (primary.multi):
-        return _starry_spectral_128.kepler.System(primary, secondaries)
-    else:
+    module = _module(primary.nwav, primary.multi)
+    if module is None:
         raise ValueError("Invalid argument(s) to `System`.")
+    return module.kepler.System(primary, secondaries)
 
 
 # Hack the docstrings
@@ -245,6 +245,36 @@ namespace limbdark {
 
     }
 
+    /**
+    The normalized `c_n` coefficients of a quadratically limb-darkened
+    map, `I(mu) = 1 - u1 (1 - mu) - u2 (1 - mu)^2`, written directly in
+    terms of `u1` and `u2`, so that the flux is `S . c` for the first
+    three terms of the solution vector. This is equivalent to
+    `computeC(u) * normC(c)` for `u = (0, u1, u2)`. Also compute the
+    derivative matrix `dc / du` (one row per `u` coefficient).
+
+    */
+    template <class T>
+    inline Vector<T> quadraticC(const T& u1, const T& u2, Matrix<T>& dcdu) {
+        T norm = 1.0 / (pi<T>() * (1 - u1 / 3.0 - u2 / 6.0));
+        Vector<T> c(3);
+        c(0) = (1 - u1 - 1.5 * u2) * norm;
+        c(1) = (u1 + 2 * u2) * norm;
+        c(2) = -0.25 * u2 * norm;
+
+        // The derivatives of the log of the normalization
+        T dlnormdu1 = pi<T>() * norm / 3.0;
+        T dlnormdu2 = pi<T>() * norm / 6.0;
+        dcdu.resize(2, 3);
+        dcdu(0, 0) = -norm + c(0) * dlnormdu1;
+        dcdu(0, 1) = norm + c(1) * dlnormdu1;
+        dcdu(0, 2) = c(2) * dlnormdu1;
+        dcdu(1, 0) = -1.5 * norm + c(0) * dlnormdu2;
+        dcdu(1, 1) = 2 * norm + c(1) * dlnormdu2;
+        dcdu(1, 2) = -0.25 * norm + c(2) * dlnormdu2;
+        return c;
+    }
+
     /**
     Greens integration housekeeping data
 
@@ -313,6 +343,11 @@ namespace limbdark {
             VectorT<T> dSdb;
             VectorT<T> dSdr;
 
+            // The batched solution vectors (one row per sample)
+            Matrix<T> S_batch;
+            Matrix<T> dSdb_batch;
+            Matrix<T> dSdr_batch;
+
             // Constructor
             explicit GreensLimbDark(int lmax) :
                 lmax(lmax),
@@ -356,6 +391,10 @@ namespace limbdark {
             }
 
             inline void compute(const T& b_, const T& r_, bool gradient=false);
+            inline void compute(const Vector<T>& b_, const Vector<T>& r_,
+                                bool gradient=false);
+            inline void computeS0(const T& b_, const T& r_, bool gradient=false);
+            inline void computeSn(const T& b_, const T& r_, bool gradient=false);
             inline void computeI(bool gradient=false);
             inline void computeJ(bool gradient=false);
             inline void computeIcoeffs();
@@ -611,6 +650,150 @@ namespace limbdark {
     */
     template <class T>
     inline void GreensLimbDark<T>::compute(const T& b, const T& r, bool gradient) {
+        computeS0(b, r, gradient);
+        if (lmax > 0)
+            computeSn(b, r, gradient);
+    }
+
+    /**
+    Compute the `s^T` occultation solution vector for a batch of
+    samples. The basic variables and the uniform disk term `S(0)`
+    are computed for all samples at once as array expressions;
+    the elliptic integrals and the recursions for the higher
+    order terms are then evaluated sample by sample. Row `i`
+    of `S_batch` (and `dSdb_batch`, `dSdr_batch`) is the
+    solution vector for sample `i`.
+
+    */
+    template <class T>
+    inline void GreensLimbDark<T>::compute(const Vector<T>& b_,
+                                           const Vector<T>& r_,
+                                           bool gradient) {
+
+        typedef Eigen::Array<T, Eigen::Dynamic, 1> Array;
+        typedef Eigen::Array<bool, Eigen::Dynamic, 1> Mask;
+        size_t npts = b_.size();
+        S_batch.resize(npts, lmax + 1);
+        if (gradient) {
+            dSdb_batch.resize(npts, lmax + 1);
+            dSdr_batch.resize(npts, lmax + 1);
+        }
+        if (npts == 0) return;
+
+        // Initialize the basic variables
+        const Array b = b_.array();
+        const Array r = r_.array();
+        const Array zero = Array::Zero(npts);
+        const Array one = Array::Ones(npts);
+        const Array inf = Array::Constant(npts, T(INFINITY));
+        const Array b2_ = b * b;
+        const Array r2_ = r * r;
+        const Array invr_ = r.inverse();
+        const Array invb_ = b.inverse();
+        const Array bmr_ = b - r;
+        const Array bpr_ = b + r;
+        const Array fourbr_ = T(4) * b * r;
+        const Array invfourbr_ = T(0.25) * invr_ * invb_;
+        const Array onembmr2_ = (T(1) + bmr_) * (T(1) - bmr_);
+        const Array onembmr2inv_ = onembmr2_.inverse();
+        const Array onembpr2_ = (T(1) - r - b) * (T(1) + r + b);
+        const Array sqonembmr2_ = onembmr2_.sqrt();
+
+        // Sort the samples into the three branches of `computeS0`
+        const Mask trivial = (b == T(0)) || (r == T(0));
+        const Array ksq_ = trivial.select(inf, onembpr2_ * invfourbr_ + T(1.0));
+        const Mask nolens = trivial || (ksq_ > T(1));
+
+        // The k^2 variables
+        const Array invksq_ = trivial.select(zero, ksq_.inverse());
+        const Array k_ = trivial.select(inf, ksq_.sqrt());
+        const Array kcsq_ = trivial.select(one,
+                            nolens.select(onembpr2_ * onembmr2inv_,
+                                          -onembpr2_ * invfourbr_));
+        const Array kc_ = trivial.select(one, kcsq_.sqrt());
+
+        // Eric Agol's "kite" method; the sides are sorted
+        // with a branch-free median of three
+        const Array p0 = b.max(r).max(T(1.0));
+        const Array p2 = b.min(r).min(T(1.0));
+        const Array p1 = b.min(T(1.0)).max(b.max(T(1.0)).min(r));
+        const Array term = ((p0 + (p1 + p2)) * (p2 - (p0 - p1)) *
+                            (p2 + (p0 - p1)) * (p0 + (p1 - p2))).max(T(0.0));
+        const Array kite = nolens.select(zero, term.sqrt());
+        const Array kkc_ = trivial.select(inf,
+                           nolens.select(k_ * kc_, kite * invfourbr_));
+        const Array den0 = (r - T(1)) * (r + T(1)) + b2_;
+        const Array den1 = (T(1) - r) * (T(1) + r) + b2_;
+        Array kap0_(npts), kap1_(npts);
+        for (size_t i = 0; i < npts; ++i) {
+            if (nolens(i)) {
+                kap0_(i) = 0;
+                kap1_(i) = 0;
+            } else {
+                kap0_(i) = atan2(kite(i), den0(i));
+                kap1_(i) = atan2(kite(i), den1(i));
+            }
+        }
+
+        // The uniform disk term
+        S_batch.col(0) = nolens.select(pi<T>() * (T(1) - r2_),
+                                       pi<T>() - (kap1_ + r2_ * kap0_ -
+                                                  kite * T(0.5))).matrix();
+        if (gradient) {
+            dSdb_batch.col(0) = nolens.select(zero, kite * invb_).matrix();
+            dSdr_batch.col(0) = nolens.select(T(-2) * pi<T>() * r,
+                                              T(-2.0) * r * kap0_).matrix();
+        }
+
+        // Special case
+        if (lmax == 0) return;
+
+        // The higher order terms
+        for (size_t i = 0; i < npts; ++i) {
+            b2 = b2_(i);
+            r2 = r2_(i);
+            invr = invr_(i);
+            invb = invb_(i);
+            bmr = bmr_(i);
+            bpr = bpr_(i);
+            fourbr = fourbr_(i);
+            invfourbr = invfourbr_(i);
+            onembmr2 = onembmr2_(i);
+            onembmr2inv = onembmr2inv_(i);
+            onembpr2 = onembpr2_(i);
+            sqonembmr2 = sqonembmr2_(i);
+            ksq = ksq_(i);
+            invksq = invksq_(i);
+            k = k_(i);
+            kcsq = kcsq_(i);
+            kc = kc_(i);
+            kkc = kkc_(i);
+            kap0 = kap0_(i);
+            kap1 = kap1_(i);
+            kite_area2 = kite(i);
+            S(0) = S_batch(i, 0);
+            if (gradient) {
+                dSdb(0) = dSdb_batch(i, 0);
+                dSdr(0) = dSdr_batch(i, 0);
+            }
+            computeSn(b(i), r(i), gradient);
+            S_batch.row(i) = S;
+            if (gradient) {
+                dSdb_batch.row(i) = dSdb;
+                dSdr_batch.row(i) = dSdr;
+            }
+        }
+
+    }
+
+    /**
+    Compute the basic variables and the uniform disk
+    term of the `s^T` occultation solution vector
+
+    */
+    template <class T>
+    inline void GreensLimbDark<T>::computeS0(const T& b, const T& r,
+                                             bool gradient) {
 
         // Initialize the basic variables
         b2 = b * b;
@@ -686,8 +869,17 @@ namespace limbdark {
             }
         }
 
-        // Special case
-        if (lmax == 0) return;
+    }
+
+    /**
+    Compute the higher order terms of the `s^T` occultation
+    solution vector. Requires the basic variables and `S(0)`
+    to have been computed.
+
+    */
+    template <class T>
+    inline void GreensLimbDark<T>::computeSn(const T& b, const T& r,
+                                             bool gradient) {
 
         // Compute the linear limb darkening term
         // and the elliptic integrals
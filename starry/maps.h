@@ -30,6 +30,8 @@ TODO: Speed up limb-darkened map rotations, since
 #include <iostream>
 #include <cmath>
 #include <Eigen/Core>
+#include <cstdio>
+#include <memory>
 #include <type_traits>
 #include <vector>
 #include "rotation.h"
@@ -41,6 +43,7 @@ TODO: Speed up limb-darkened map rotations, since
 #include "sturm.h"
 #include "minimize.h"
 #include "numeric.h"
+#include "interp.h"
 
 namespace starry {
 namespace kepler {
@@ -64,6 +67,7 @@ namespace maps {
     using limbdark::GreensLimbDark;
     using limbdark::computeC;
     using limbdark::normC;
+    using limbdark::quadraticC;
     using solver::Power;
     using minimize::Minimizer;
 
@@ -86,6 +90,9 @@ namespace maps {
             Scalar<T> theta;                                                    /**< Cached rotation angle */
             T p;                                                                /**< Cached polynomial map */
             T y;                                                                /**< Cached Ylm map */
+            bool fourier;                                                       /**< Are the phase curve Fourier coefficients up to date? */
+            T fourier_a;                                                        /**< Cached phase curve cosine coefficients */
+            T fourier_b;                                                        /**< Cached phase curve sine coefficients */
 
             //! Default constructor
             Cache() {
@@ -96,6 +103,7 @@ namespace maps {
             inline void clear() {
                 oper = NONE;
                 theta = NAN;
+                fourier = false;
             }
 
 
@@ -201,11 +209,19 @@ namespace maps {
             T g;                                                                /**< The map coefficients in the Green's basis */
             int y_deg;                                                          /**< Highest degree set by the user in the spherical harmonic vector */
             UnitVector<Scalar<T>> axis;                                         /**< The axis of rotation for the map */
-            Basis<Scalar<T>> B;                                                 /**< Basis transform stuff */
+            std::shared_ptr<const Basis<Scalar<T>>> B_ptr;                      /**< The shared basis transform stuff */
+            const Basis<Scalar<T>>& B;                                          /**< Basis transform stuff */
             Wigner<T> W;                                                        /**< The class controlling rotations */
             Greens<Scalar<T>> G;                                                /**< The occultation integral solver class */
             Greens<ADScalar<Scalar<T>, 2>> G_grad;                              /**< The occultation integral solver class w/ AutoDiff capability */
+            std::unique_ptr<Greens<Multi>> G_multi;                             /**< The multiprecision solver for ill-conditioned occultations (created on demand) */
+            bool escalate;                                                      /**< Recompute ill-conditioned occultations in multiprecision? */
             GreensLimbDark<Scalar<T>> L;                                        /**< The occultation integral solver class (optimized for limb darkening) */
+            GreensLimbDark<Scalar<T>> L_quad;                                   /**< The closed-form solver for at most quadratic limb darkening */
+            std::shared_ptr<interp::Table> table_ylm;                           /**< Tabulated solution vector (optional) */
+            std::shared_ptr<interp::Table> table_ld;                            /**< Tabulated limb darkening solution vector (optional) */
+            VectorT<Scalar<T>> dsTdb;                                           /**< Derivative of the tabulated solution vector w/ respect to `b` */
+            VectorT<Scalar<T>> dsTdr;                                           /**< Derivative of the tabulated solution vector w/ respect to `ro` */
             Minimizer<T> M;                                                     /**< Map minimization class */
             Scalar<T> tol;                                                      /**< Machine epsilon */
             std::vector<string> dF_orbital_names;                               /**< Names of each of the orbital params in the flux gradient */
@@ -224,6 +240,8 @@ namespace maps {
             Vector<Matrix<Scalar<T>>> dp_udu;                                   /**< Deriv of limb darkening polynomial w/ respect to limb darkening coeffs */
             Vector<Matrix<Scalar<T>>> dg_udu;                                   /**< Deriv of limb darkening Green's polynomials w/ respect to limb darkening coeffs */
             Vector<Matrix<Scalar<T>>> dagol_cdu;                                /**< Deriv of Agol `c` coeffs w/ respect to the limb darkening ceoffs */
+            T quad_c;                                                           /**< The normalized `c` coeffs for at most quadratic limb darkening */
+            Vector<Matrix<Scalar<T>>> dquad_cdu;                                /**< Deriv of the quadratic `c` coeffs w/ respect to `u1` and `u2` */
             VectorT<Matrix<Scalar<T>>> dLDdp;                                   /**< Derivative of the limb-darkened polynomial w.r.t `p` */
             VectorT<Matrix<Scalar<T>>> dLDdp_u;                                 /**< Derivative of the limb-darkened polynomial w.r.t `p_u` */
             T p_uy;                                                             /**< The instantaneous limb-darkened map in the polynomial basis */
@@ -234,6 +252,11 @@ namespace maps {
             Cache<T> cache;
             bool update_p_u_derivs;
             bool update_c_basis;
+            bool update_quad_c;
+
+            // Private copies of the map for multi-threaded evaluation
+            std::vector<std::unique_ptr<Map<T>>> workers;                       /**< Private copies of the map for the worker threads (created on demand) */
+            bool update_workers;                                                /**< Do the worker copies need to be synchronized with this map? */
 
             // Private methods
             void update();
@@ -243,6 +266,16 @@ namespace maps {
             inline void updateU();
             inline void limbDarken(const T& poly, T& poly_ld,
                 bool gradient=false);
+            inline void computeGreens(const Scalar<T>& b,
+                const Scalar<T>& ro);
+            inline void computeGreens(const ADScalar<Scalar<T>, 2>& b,
+                const ADScalar<Scalar<T>, 2>& ro);
+            inline void computeGreensMulti(const Scalar<T>& b,
+                const Scalar<T>& ro);
+            inline GreensLimbDark<Scalar<T>>& computeGreensLD(
+                const Scalar<T>& b, const Scalar<T>& ro,
+                bool gradient=false);
+            inline void computeQuadraticC();
             template <typename U>
             inline void polyBasis(Power<U>& xpow, Power<U>& ypow,
                 VectorT<U>& basis);
@@ -253,6 +286,10 @@ namespace maps {
             inline Row<T> fluxLD(const Scalar<T>& xo_,
                 const Scalar<T>& yo_,
                 const Scalar<T>& ro_);
+            inline void fluxLD(const Vector<Scalar<T>>& xo_,
+                const Vector<Scalar<T>>& yo_,
+                const Vector<Scalar<T>>& ro_,
+                T& result);
             inline Row<T> fluxLDWithGradient(const Scalar<T>& xo_,
                 const Scalar<T>& yo_,
                 const Scalar<T>& ro_);
@@ -263,6 +300,14 @@ namespace maps {
             inline Row<T> fluxConstant(const Scalar<T>& xo_,
                 const Scalar<T>& yo_,
                 const Scalar<T>& ro_);
+            inline void computeFourier();
+            inline Row<T> phaseCurve(const Scalar<T>& theta);
+            inline void phaseCurve(const Vector<Scalar<T>>& theta, T& result);
+            inline Row<T> fluxRotated(T& Ry, const Scalar<T>& theta,
+                                      const Scalar<T>& xo,
+                                      const Scalar<T>& yo,
+                                      const Scalar<T>& ro,
+                                      bool numerical);
             inline Row<T> fluxConstantWithGradient(const Scalar<T>& xo_,
                 const Scalar<T>& yo_,
                 const Scalar<T>& ro_);
@@ -277,16 +322,20 @@ namespace maps {
                 N((lmax + 1) * (lmax + 1)),
                 nwav(nwav),
                 type_valid(checkType(*this)),
-                B(lmax),
+                B_ptr(basis::getBasis<Scalar<T>>(lmax)),
+                B(*B_ptr),
                 W(lmax, nwav, (*this).y, (*this).axis),
                 G(lmax),
                 G_grad(lmax),
+                escalate(false),
                 L(lmax),
+                L_quad(std::min(lmax, 2)),
                 M(lmax),
                 tol(mach_eps<Scalar<T>>()),
                 dp_udu(nwav),
                 dg_udu(nwav),
                 dagol_cdu(nwav),
+                dquad_cdu(nwav),
                 tmp(N, nwav),
                 cache() {
 
@@ -314,9 +363,12 @@ namespace maps {
                 g.resize(N, nwav);
                 u.resize(lmax + 1, nwav);
                 agol_c.resize(lmax + 1, nwav);
+                quad_c.resize(3, nwav);
                 resize(agol_norm, 0, nwav);
                 p_u.resize(N, nwav);
                 g_u.resize(N, nwav);
+                dsTdb.resize(N);
+                dsTdr.resize(N);
 
                 // Reset & update the map coeffs
                 reset();
@@ -339,6 +391,13 @@ namespace maps {
             virtual VectorT<Scalar<T>> getS() const;
             void setAxis(const UnitVector<Scalar<T>>& axis_);
             UnitVector<Scalar<T>> getAxis() const;
+            void copyState(const Map<T>& other);
+            void initWorkers(int nthreads);
+            Map<T>& getWorker(int thread);
+            virtual void tabulate(double rmax, double tol=1e-10,
+                int res=256, const std::string& path="");
+            virtual void setEscalate(bool escalate_);
+            bool getEscalate() const;
             virtual std::string info();
             inline void resizeGradient();
             const T& getGradient() const;
@@ -359,6 +418,31 @@ namespace maps {
                 const Scalar<T>& ro_=0,
                 bool gradient=false,
                 bool numerical=false);
+            inline void flux(const Vector<Scalar<T>>& theta_,
+                const Vector<Scalar<T>>& xo_,
+                const Vector<Scalar<T>>& yo_,
+                const Vector<Scalar<T>>& ro_,
+                T& result,
+                bool numerical=false);
+
+            // The flux as a linear operator on the map coefficients
+            inline void designMatrix(const Vector<Scalar<T>>& theta_,
+                const Vector<Scalar<T>>& xo_,
+                const Vector<Scalar<T>>& yo_,
+                const Vector<Scalar<T>>& ro_,
+                Matrix<Scalar<T>>& X);
+            inline void designRow(const Scalar<T>& xo_,
+                const Scalar<T>& yo_,
+                const Scalar<T>& ro_,
+                VectorT<Scalar<T>>& row);
+            inline void rotateDesignMatrix(const Vector<Scalar<T>>& theta_,
+                Matrix<Scalar<T>>& X);
+            inline void fluxBatch(const Matrix<Scalar<T>>& Y,
+                const Vector<Scalar<T>>& theta_,
+                const Vector<Scalar<T>>& xo_,
+                const Vector<Scalar<T>>& yo_,
+                const Vector<Scalar<T>>& ro_,
+                Matrix<Scalar<T>>& result);
 
             // Is the map physical?
             inline RowBool<T> isPhysical(const Scalar<T>& epsilon=1.e-6,
@@ -407,6 +491,9 @@ namespace maps {
         // Update the rotation matrix
         W.update();
 
+        // Set flags
+        update_workers = true;
+
         // Clear the cache
         cache.clear();
     }
@@ -442,7 +529,9 @@ namespace maps {
 
         // Set flags
         update_c_basis = true;
+        update_quad_c = true;
         update_p_u_derivs = true;
+        update_workers = true;
 
         // Clear the cache
         cache.clear();
@@ -475,6 +564,7 @@ namespace maps {
         axis = yhat<Scalar<T>>();
         update_p_u_derivs = false;
         update_c_basis = false;
+        update_quad_c = false;
         update();
     }
 
@@ -708,6 +798,9 @@ namespace maps {
         // Update the rotation matrix
         W.update();
 
+        // Set flags
+        update_workers = true;
+
         // Clear the cache
         cache.clear();
 
@@ -722,6 +815,164 @@ namespace maps {
         return axis;
     }
 
+    /**
+    Copy the map coefficients and the rotation axis of `other`
+    into this map. Unlike `setY`, `setU` and `setAxis`, the values
+    are copied verbatim (the axis is not re-normalized), so the two
+    maps produce bit-for-bit identical results. This is used to give
+    each worker thread its own private copy of a map.
+
+    */
+    template <class T>
+    void Map<T>::copyState(const Map<T>& other) {
+        if ((other.lmax != lmax) || (other.nwav != nwav))
+            throw errors::ValueError("Dimension mismatch in `copyState`.");
+        y = other.y;
+        y_deg = other.y_deg;
+        u = other.u;
+        u_deg = other.u_deg;
+        axis = other.axis;
+        table_ylm = other.table_ylm;
+        table_ld = other.table_ld;
+        escalate = other.escalate;
+        update();
+    }
+
+    /**
+    Make sure there are private copies of this map for `nthreads - 1`
+    worker threads and that they are in the same state as this map.
+    The copies are kept between calls, so they are only created the
+    first time they are needed and only synchronized (via `copyState`)
+    after the state of this map has changed. This must be called from
+    a single thread before the workers are started.
+
+    */
+    template <class T>
+    void Map<T>::initWorkers(int nthreads) {
+        if (update_workers) {
+            for (auto& worker : workers)
+                worker->copyState(*this);
+            update_workers = false;
+        }
+        while (int(workers.size()) < nthreads - 1) {
+            workers.emplace_back(new Map<T>(lmax, nwav));
+            workers.back()->copyState(*this);
+        }
+    }
+
+    /**
+    Return the map to be used by worker thread number `thread`: the
+    map itself for the first thread and one of the private copies
+    created by `initWorkers` for the others.
+
+    */
+    template <class T>
+    Map<T>& Map<T>::getWorker(int thread) {
+        if (thread == 0)
+            return *this;
+        return *workers[thread - 1];
+    }
+
+    /**
+    Enable or disable the automatic precision escalation: occultations
+    in the ill-conditioned region of the `(b, ro)` plane (see
+    `solver::unstable`) are recomputed in multiprecision, while all
+    others are computed in double precision as usual. This only applies
+    to the flux of spherical harmonic maps; the limb darkening solver
+    is stable everywhere. Maps that are already computed in extended
+    precision don't need it.
+
+    */
+    template <class T>
+    void Map<T>::setEscalate(bool escalate_) {
+        if (escalate_ && !std::is_same<Scalar<T>, double>::value)
+            throw errors::ValueError("Precision escalation is only "
+                                     "available for double precision maps.");
+        escalate = escalate_;
+        update_workers = true;
+    }
+
+    /**
+    Is the automatic precision escalation enabled?
+
+    */
+    template <class T>
+    bool Map<T>::getEscalate() const {
+        return escalate;
+    }
+
+    /**
+    Tabulate the occultation solution vectors for occultors with
+    radii up to `rmax` on a grid with `res` points per unit length
+    in `b` and `ro`. Occultations are then computed by interpolating
+    in the tables wherever the interpolant matches the exact solution
+    to within `tol`. If `path` is not empty, the tables are saved to
+    that directory and memory-mapped, so that maps with the same
+    settings (in this or any other process) share them. The tables
+    are computed the first time they are needed. If `rmax` is zero,
+    the tables are discarded.
+
+    */
+    template <class T>
+    void Map<T>::tabulate(double rmax, double tol, int res,
+                          const std::string& path) {
+
+        // Discard the current tables
+        table_ylm.reset();
+        table_ld.reset();
+        update_workers = true;
+        if (rmax == 0)
+            return;
+
+        // Sanity checks
+        if (rmax < 0)
+            throw errors::ValueError("The occultor radius must be "
+                                     "non-negative.");
+        if (tol <= 0)
+            throw errors::ValueError("The tolerance must be positive.");
+        if (rmax * res <= 1)
+            throw errors::ValueError("The table resolution is too coarse "
+                                     "for this occultor radius.");
+
+        // Unique file names for each solver & set of settings
+        auto file = [&](const char* name) -> std::string {
+            if (path.empty())
+                return path;
+            char buf[256];
+            snprintf(buf, sizeof(buf), "starry_%s_l%d_r%.10g_t%.10g_n%d.tab",
+                     name, lmax, rmax, tol, res);
+            return path + "/" + buf;
+        };
+
+        // The spherical harmonic solver
+        auto G_ = std::make_shared<Greens<ADScalar<double, 2>>>(lmax);
+        table_ylm.reset(new interp::Table("ylm", N, rmax, tol, res,
+            file("ylm"), [G_](double b, double r, VectorT<double>& sT,
+                              VectorT<double>& dsTdb,
+                              VectorT<double>& dsTdr) {
+                G_->compute(ADScalar<double, 2>(b, 2, 0),
+                            ADScalar<double, 2>(r, 2, 1));
+                for (int n = 0; n < sT.size(); ++n) {
+                    sT(n) = G_->sT(n).value();
+                    dsTdb(n) = G_->sT(n).derivatives()(0);
+                    dsTdr(n) = G_->sT(n).derivatives()(1);
+                }
+            }));
+
+        // The limb darkening solver
+        auto L_ = std::make_shared<GreensLimbDark<double>>(lmax);
+        table_ld.reset(new interp::Table("ld", lmax + 1, rmax, tol, res,
+            file("ld"), [L_](double b, double r, VectorT<double>& sT,
+                             VectorT<double>& dsTdb,
+                             VectorT<double>& dsTdr) {
+                L_->compute(b, r, true);
+                sT = L_->S;
+                dsTdb = L_->dSdb;
+                dsTdr = L_->dSdr;
+            }));
+
+    }
+
     /**
     Resize the gradient vector and set the string vector of gradient names
 
@@ -757,11 +1008,7 @@ namespace maps {
     template <class T>
     std::string Map<T>::info() {
         std::ostringstream os;
-        std::string multi;
-        if (isMulti(Scalar<T>(0.)))
-            multi = "True";
-        else
-            multi = "False";
+        std::string multi = multiName<Scalar<T>>();
         os << "<starry.Map("
            << "lmax=" << lmax << ", "
            << "nwav=" << nwav << ", "
@@ -1063,6 +1310,115 @@ namespace maps {
     /*      FLUX     */
     /* ------------- */
 
+    /**
+    Compute the `s^T` occultation solution vector, interpolating
+    in the table if there is one.
+
+    */
+    template <class T>
+    inline void Map<T>::computeGreens(const Scalar<T>& b,
+                                      const Scalar<T>& ro) {
+        if (table_ylm && table_ylm->compute(b, ro, G.sT, dsTdb, dsTdr))
+            return;
+        if (escalate && solver::unstable(b, ro))
+            computeGreensMulti(b, ro);
+        else
+            G.compute(b, ro);
+    }
+
+    /**
+    Compute the `s^T` occultation solution vector in multiprecision
+    and round it to the precision of the map. If the multiprecision
+    solver fails (it returns NaN for some of the singular points that
+    the double precision solver handles), we fall back to the latter.
+
+    */
+    template <class T>
+    inline void Map<T>::computeGreensMulti(const Scalar<T>& b,
+                                           const Scalar<T>& ro) {
+        // Escalation is only enabled for double precision maps,
+        // so the cast is exact
+        if (!G_multi)
+            G_multi.reset(new Greens<Multi>(lmax));
+        G_multi->skip = G.skip;
+        G_multi->compute(Multi(static_cast<double>(b)),
+                         Multi(static_cast<double>(ro)));
+        for (int n = 0; n < N; ++n) {
+            if (!G_multi->skip(n) && !isfinite(G_multi->sT(n))) {
+                G.compute(b, ro);
+                return;
+            }
+        }
+        for (int n = 0; n < N; ++n)
+            G.sT(n) = static_cast<Scalar<T>>(G_multi->sT(n));
+    }
+
+    /**
+    Compute the `s^T` occultation solution vector and its
+    derivatives with respect to `b` and `ro` (seeded as the first
+    and second derivatives), interpolating in the table if there is one.
+
+    */
+    template <class T>
+    inline void Map<T>::computeGreens(const ADScalar<Scalar<T>, 2>& b,
+                                      const ADScalar<Scalar<T>, 2>& ro) {
+        if (table_ylm && table_ylm->compute(b.value(), ro.value(), G.sT,
+                                            dsTdb, dsTdr, true)) {
+            for (int n = 0; n < N; ++n) {
+                G_grad.sT(n).value() = G.sT(n);
+                G_grad.sT(n).derivatives() << dsTdb(n), dsTdr(n);
+            }
+        } else {
+            G_grad.compute(b, ro);
+        }
+    }
+
+    /**
+    Compute the limb darkening solution vector (and optionally its
+    derivatives), interpolating in the table if there is one.
+    Returns the solver holding the result.
+
+    If the map is at most quadratically limb-darkened, the higher
+    order terms of the solution vector don't contribute to the flux,
+    so we use the closed-form quadratic solver. We can't do this for
+    the gradient of higher degree maps, since the derivatives of the
+    flux with respect to the higher order coefficients don't vanish.
+    (Maps of degree two or less use the closed-form solver either way.)
+
+    */
+    template <class T>
+    inline GreensLimbDark<Scalar<T>>& Map<T>::computeGreensLD(
+            const Scalar<T>& b, const Scalar<T>& ro, bool gradient) {
+        if (table_ld && table_ld->compute(b, ro, L.S, L.dSdb, L.dSdr,
+                                          gradient))
+            return L;
+        GreensLimbDark<Scalar<T>>& solver =
+            ((u_deg <= 2) && (!gradient)) ? L_quad : L;
+        solver.compute(b, ro, gradient);
+        return solver;
+    }
+
+    /**
+    Compute the normalized `c` coefficients of an at most
+    quadratically limb-darkened map and their derivatives
+    directly from `u1` and `u2`, skipping the general
+    change of basis.
+
+    */
+    template <class T>
+    inline void Map<T>::computeQuadraticC() {
+        if (!update_quad_c)
+            return;
+        Scalar<T> u1, u2 = 0;
+        for (int n = 0; n < nwav; ++n) {
+            u1 = getIndex(getRow(u, 1), n);
+            if (lmax > 1)
+                u2 = getIndex(getRow(u, 2), n);
+            quad_c.col(n) = quadraticC(u1, u2, dquad_cdu(n));
+        }
+        update_quad_c = false;
+    }
+
     /**
     Compute the flux during or outside of an occultation
     for the general case of a spherical harmonic map
@@ -1103,10 +1459,6 @@ namespace maps {
         // Bind references to temporaries for speed
         Row<T>& result(tmp.tmpRow[0]);
         T& Ry(tmp.tmpT[0]);
-        T& A1Ry(tmp.tmpT[1]);
-        T& RRy(tmp.tmpT[2]);
-        T& ARRy(tmp.tmpT[3]);
-        Vector<Scalar<T>>& A1Ryn(tmp.tmpColumnVector[0]);
 
         // Convert to internal types
         Scalar<T> xo = xo_;
@@ -1123,6 +1475,11 @@ namespace maps {
             return result;
         }
 
+        // No occultation: evaluate the phase curve. Note that
+        // limb-darkening does not affect the total disk-integrated flux!
+        if ((b >= 1 + ro) || (ro == 0))
+            return phaseCurve(theta);
+
         // Rotate the map into view
         if (y_deg > 0) {
             W.rotate(cos(theta), sin(theta), Ry);
@@ -1130,6 +1487,364 @@ namespace maps {
             Ry = y;
         }
 
+        // Compute the flux
+        return fluxRotated(Ry, theta, xo, yo, ro, numerical);
+
+    }
+
+    /**
+    Compute the flux for a batch of samples. The map is rotated
+    into view for all values of `theta` at once, which is much
+    faster than rotating it sample by sample. Row `i` of `result`
+    is the flux at the `i`-th sample.
+
+    */
+    template <class T>
+    inline void Map<T>::flux(const Vector<Scalar<T>>& theta_,
+                             const Vector<Scalar<T>>& xo_,
+                             const Vector<Scalar<T>>& yo_,
+                             const Vector<Scalar<T>>& ro_,
+                             T& result,
+                             bool numerical) {
+
+        size_t npts = theta_.size();
+        if ((xo_.size() != theta_.size()) || (yo_.size() != theta_.size()) ||
+            (ro_.size() != theta_.size()))
+            throw errors::ValueError("Mismatch in argument dimensions.");
+        resize(result, npts, nwav);
+
+        // Pure limb darkening: batch the occultation solution vectors
+        if ((y_deg == 0) && (u_deg > 0) && (!numerical)) {
+            fluxLD(xo_, yo_, ro_, result);
+            return;
+        }
+
+        // If the map is not rotationally variable, there's
+        // nothing to batch: compute the flux sample by sample
+        if (y_deg == 0) {
+            for (size_t i = 0; i < npts; ++i)
+                setRow(result, i, flux(theta_(i), xo_(i), yo_(i), ro_(i),
+                                       false, numerical));
+            return;
+        }
+
+        // Convert to internal types
+        Vector<Scalar<T>> theta = theta_ * (pi<Scalar<T>>() / 180.);
+
+        // Sort the samples by occultation state
+        std::vector<size_t> free, occ;
+        Scalar<T> b;
+        for (size_t i = 0; i < npts; ++i) {
+            b = sqrt(xo_(i) * xo_(i) + yo_(i) * yo_(i));
+            if (b <= ro_(i) - 1)
+                setRow(result, i, 0.0);
+            else if ((b >= 1 + ro_(i)) || (ro_(i) == 0))
+                free.push_back(i);
+            else
+                occ.push_back(i);
+        }
+
+        // Evaluate the phase curve for the samples outside of occultation
+        if (free.size()) {
+            Vector<Scalar<T>> theta_free(free.size());
+            T& result_free(tmp.tmpT[1]);
+            for (size_t j = 0; j < free.size(); ++j)
+                theta_free(j) = theta(free[j]);
+            phaseCurve(theta_free, result_free);
+            for (size_t j = 0; j < free.size(); ++j)
+                setRow(result, free[j], getRow(result_free, j));
+        }
+
+        // Rotate the map into view for the occulted samples in batches
+        // to keep the memory footprint small, then compute the flux
+        size_t nocc = occ.size();
+        Vector<Scalar<T>> costheta, sintheta;
+        Matrix<Scalar<T>> RyBatch;
+        T& Ry(tmp.tmpT[0]);
+        size_t i;
+        for (size_t start = 0; start < nocc; start += STARRY_ROTATION_BATCH) {
+            size_t nbatch = std::min(nocc - start, size_t(STARRY_ROTATION_BATCH));
+            costheta.resize(nbatch);
+            sintheta.resize(nbatch);
+            for (size_t j = 0; j < nbatch; ++j) {
+                costheta(j) = cos(theta(occ[start + j]));
+                sintheta(j) = sin(theta(occ[start + j]));
+            }
+            W.rotate(costheta, sintheta, RyBatch);
+            for (size_t j = 0; j < nbatch; ++j) {
+                i = occ[start + j];
+                Ry = Eigen::Map<Matrix<Scalar<T>>, 0, Eigen::OuterStride<>>(
+                        RyBatch.data() + j * N, N, nwav,
+                        Eigen::OuterStride<>(nbatch * N));
+                setRow(result, i, fluxRotated(Ry, theta(i), xo_(i), yo_(i),
+                                              ro_(i), numerical));
+            }
+        }
+
+    }
+
+    /**
+    Compute the row of the design matrix for an occultor at (`xo`, `yo`)
+    of radius `ro`, prior to the rotation of the map by `theta`.
+    This is the row vector `w` such that the flux is `w . R(theta) . y`:
+    either `sT . A . Rz` during an occultation, where `Rz` aligns the
+    occultor with the +y axis, or `rTA1` outside of one.
+
+    */
+    template <class T>
+    inline void Map<T>::designRow(const Scalar<T>& xo_,
+                                  const Scalar<T>& yo_,
+                                  const Scalar<T>& ro_,
+                                  VectorT<Scalar<T>>& row) {
+
+        // The limb darkening normalization depends on the map coefficients
+        if (u_deg > 0)
+            throw errors::NotImplementedError("The design matrix is not "
+                                              "available for limb-darkened "
+                                              "maps, since their flux is not "
+                                              "linear in the map coefficients.");
+
+        // Bind references to temporaries for speed
+        VectorT<Scalar<T>>& sTA(tmp.tmpRowVector[0]);
+
+        // Convert to internal types
+        Scalar<T> xo = xo_;
+        Scalar<T> yo = yo_;
+        Scalar<T> ro = ro_;
+
+        // Impact parameter
+        Scalar<T> b = sqrt(xo * xo + yo * yo);
+
+        // Complete occultation
+        if (b <= ro - 1) {
+            row.setZero(N);
+
+        // No occultation
+        } else if ((b >= 1 + ro) || (ro == 0)) {
+            row = B.rTA1;
+
+        // Occultation
+        } else {
+            G.skip.setZero();
+            computeGreens(b, ro);
+            sTA = G.sT * B.A;
+            if ((b > 0) && ((xo != 0) || (yo < 0)))
+                W.rotatezRow(yo / b, xo / b, sTA, row);
+            else
+                row = sTA;
+        }
+
+    }
+
+    /**
+    Right-multiply each row `i` of the design matrix `X` by
+    the rotation matrix `R(theta_i)`, where `theta` is in degrees.
+
+    */
+    template <class T>
+    inline void Map<T>::rotateDesignMatrix(const Vector<Scalar<T>>& theta_,
+                                           Matrix<Scalar<T>>& X) {
+        size_t npts = theta_.size();
+        Vector<Scalar<T>> costheta, sintheta;
+        Matrix<Scalar<T>> Xbatch;
+        Scalar<T> theta;
+        for (size_t start = 0; start < npts; start += STARRY_ROTATION_BATCH) {
+            size_t nbatch = std::min(npts - start, size_t(STARRY_ROTATION_BATCH));
+            costheta.resize(nbatch);
+            sintheta.resize(nbatch);
+            for (size_t j = 0; j < nbatch; ++j) {
+                theta = theta_(start + j) * (pi<Scalar<T>>() / 180.);
+                costheta(j) = cos(theta);
+                sintheta(j) = sin(theta);
+            }
+            Xbatch = X.block(start, 0, nbatch, N);
+            W.rotateRows(costheta, sintheta, Xbatch);
+            X.block(start, 0, nbatch, N) = Xbatch;
+        }
+    }
+
+    /**
+    Compute the design matrix `X`, whose row `i` is the derivative of
+    the flux at the `i`-th sample with respect to the spherical harmonic
+    coefficients. Since the flux of a map without limb darkening is linear
+    in the coefficients, the light curve is simply `X . y`.
+
+    */
+    template <class T>
+    inline void Map<T>::designMatrix(const Vector<Scalar<T>>& theta_,
+                                     const Vector<Scalar<T>>& xo_,
+                                     const Vector<Scalar<T>>& yo_,
+                                     const Vector<Scalar<T>>& ro_,
+                                     Matrix<Scalar<T>>& X) {
+        size_t npts = theta_.size();
+        if ((xo_.size() != theta_.size()) || (yo_.size() != theta_.size()) ||
+            (ro_.size() != theta_.size()))
+            throw errors::ValueError("Mismatch in argument dimensions.");
+        VectorT<Scalar<T>>& row(tmp.tmpRowVector[1]);
+        X.resize(npts, N);
+        for (size_t i = 0; i < npts; ++i) {
+            designRow(xo_(i), yo_(i), ro_(i), row);
+            X.row(i) = row;
+        }
+        rotateDesignMatrix(theta_, X);
+    }
+
+    /**
+    Compute the flux of many maps at the same geometry: column `k` of
+    `result` is the light curve of a map with coefficients `Y.col(k)`.
+    The rotation and the solution vector are computed once per sample
+    and the light curves follow from a single matrix product with the
+    design matrix, which we build in batches to keep the memory
+    footprint small.
+
+    */
+    template <class T>
+    inline void Map<T>::fluxBatch(const Matrix<Scalar<T>>& Y,
+                                  const Vector<Scalar<T>>& theta_,
+                                  const Vector<Scalar<T>>& xo_,
+                                  const Vector<Scalar<T>>& yo_,
+                                  const Vector<Scalar<T>>& ro_,
+                                  Matrix<Scalar<T>>& result) {
+        size_t npts = theta_.size();
+        if ((xo_.size() != theta_.size()) || (yo_.size() != theta_.size()) ||
+            (ro_.size() != theta_.size()))
+            throw errors::ValueError("Mismatch in argument dimensions.");
+        if (Y.rows() != N)
+            throw errors::ValueError("The coefficient matrix must have "
+                                     "`N` rows.");
+        VectorT<Scalar<T>>& row(tmp.tmpRowVector[1]);
+        Matrix<Scalar<T>> X;
+        result.resize(npts, Y.cols());
+        for (size_t start = 0; start < npts; start += STARRY_ROTATION_BATCH) {
+            size_t nbatch = std::min(npts - start, size_t(STARRY_ROTATION_BATCH));
+            X.resize(nbatch, N);
+            for (size_t j = 0; j < nbatch; ++j) {
+                designRow(xo_(start + j), yo_(start + j), ro_(start + j), row);
+                X.row(j) = row;
+            }
+            rotateDesignMatrix(theta_.segment(start, nbatch), X);
+            result.middleRows(start, nbatch) = X * Y;
+        }
+    }
+
+    /**
+    Compute the Fourier coefficients of the phase curve (the flux
+    outside of occultation as a function of the rotational phase).
+    These only depend on the map coefficients and the rotation axis,
+    so they are cached until either of them changes.
+
+    */
+    template <class T>
+    inline void Map<T>::computeFourier() {
+        if (cache.fourier)
+            return;
+        W.fourier(B.rTA1, cache.fourier_a, cache.fourier_b);
+        cache.fourier = true;
+    }
+
+    /**
+    Compute the flux outside of occultation at a rotational phase
+    `theta` (in radians) from the Fourier coefficients of the phase
+    curve. This is equivalent to (but much faster than) rotating the
+    map and computing `rTA1 * Ry`.
+
+    */
+    template <class T>
+    inline Row<T> Map<T>::phaseCurve(const Scalar<T>& theta) {
+
+        // Compute the Fourier coefficients
+        computeFourier();
+
+        // Sum the series, computing cos(k theta) and
+        // sin(k theta) by recurrence
+        Row<T> result = getRow(cache.fourier_a, 0);
+        Scalar<T> cos1 = cos(theta),
+                  sin1 = sin(theta);
+        Scalar<T> cosk = cos1, sink = sin1,
+                  coskm1 = 1, sinkm1 = 0,
+                  cosk_, sink_;
+        for (int k = 1; k < lmax + 1; ++k) {
+            result += cosk * getRow(cache.fourier_a, k) +
+                      sink * getRow(cache.fourier_b, k);
+            cosk_ = 2.0 * cosk * cos1 - coskm1;
+            sink_ = 2.0 * sink * cos1 - sinkm1;
+            coskm1 = cosk;
+            sinkm1 = sink;
+            cosk = cosk_;
+            sink = sink_;
+        }
+        return result;
+
+    }
+
+    /**
+    Compute the flux outside of occultation for a vector of rotational
+    phases `theta` (in radians) from the Fourier coefficients of the phase
+    curve. Row `i` of `result` is the flux at the `i`-th phase.
+
+    */
+    template <class T>
+    inline void Map<T>::phaseCurve(const Vector<Scalar<T>>& theta, T& result) {
+
+        // Compute the Fourier coefficients
+        computeFourier();
+
+        // Compute cos(k theta) and sin(k theta) by recurrence
+        size_t npts = theta.size();
+        Matrix<Scalar<T>>& cosnt(tmp.tmpMatrix[0]);
+        Matrix<Scalar<T>>& sinnt(tmp.tmpMatrix[1]);
+        cosnt.resize(npts, lmax + 1);
+        sinnt.resize(npts, lmax + 1);
+        cosnt.col(0).setOnes();
+        sinnt.col(0).setZero();
+        if (lmax > 0) {
+            for (size_t i = 0; i < npts; ++i) {
+                cosnt(i, 1) = cos(theta(i));
+                sinnt(i, 1) = sin(theta(i));
+            }
+        }
+        for (int k = 2; k < lmax + 1; ++k) {
+            cosnt.col(k) = 2.0 * cosnt.col(k - 1).cwiseProduct(cosnt.col(1)) -
+                           cosnt.col(k - 2);
+            sinnt.col(k) = 2.0 * sinnt.col(k - 1).cwiseProduct(cosnt.col(1)) -
+                           sinnt.col(k - 2);
+        }
+
+        // Sum the series. We accumulate one order at a time so that
+        // the result for each sample is independent of the batch size
+        // and identical to that of the scalar version above.
+        result = cosnt.col(0) * cache.fourier_a.row(0);
+        for (int k = 1; k < lmax + 1; ++k)
+            result += cosnt.col(k) * cache.fourier_a.row(k) +
+                      sinnt.col(k) * cache.fourier_b.row(k);
+
+    }
+
+    /**
+    Compute the flux during or outside of an occultation
+    given the map already rotated into view, `Ry`. This
+    is the rotation-independent part of `flux`. Note that
+    `Ry` may be modified in place.
+
+    */
+    template <class T>
+    inline Row<T> Map<T>::fluxRotated(T& Ry,
+                                      const Scalar<T>& theta,
+                                      const Scalar<T>& xo,
+                                      const Scalar<T>& yo,
+                                      const Scalar<T>& ro,
+                                      bool numerical) {
+
+        // Bind references to temporaries for speed
+        Row<T>& result(tmp.tmpRow[0]);
+        T& A1Ry(tmp.tmpT[1]);
+        T& RRy(tmp.tmpT[2]);
+        T& ARRy(tmp.tmpT[3]);
+        Vector<Scalar<T>>& A1Ryn(tmp.tmpColumnVector[0]);
+
+        // Impact parameter
+        Scalar<T> b = sqrt(xo * xo + yo * yo);
+
         // No occultation
         if ((b >= 1 + ro) || (ro == 0)) {
 
@@ -1192,7 +1907,7 @@ namespace maps {
             // Compute the sT vector (sparsely)
             for (int n = 0; n < N; ++n)
                 G.skip(n) = !(ARRy.block(n, 0, 1, nwav).array() != 0.0).any();
-            G.compute(b, ro);
+            computeGreens(b, ro);
 
             // Dot the result in and we're done
             return G.sT * ARRy;
@@ -1242,7 +1957,16 @@ namespace maps {
         } else {
 
             // Compute the Agol S vector
-            L.compute(b, ro);
+            GreensLimbDark<Scalar<T>>& LD = computeGreensLD(b, ro);
+
+            // At most quadratic limb darkening: dot the first
+            // terms of S into the closed-form `c` coefficients
+            if (u_deg <= 2) {
+                computeQuadraticC();
+                int nq = L_quad.lmax + 1;
+                T prod = quad_c.topRows(nq);
+                return LD.S.head(nq) * colwiseProduct(prod, getRow(y, 0));
+            }
 
             // Compute the Agol `c` basis
             if (update_c_basis) {
@@ -1254,13 +1978,93 @@ namespace maps {
             }
 
             // Dot the result in and we're done
-            auto prod = colwiseProduct(agol_c, agol_norm);
-            return L.S * colwiseProduct(prod, getRow(y, 0));
+            T prod = colwiseProduct(agol_c, agol_norm).topRows(LD.S.size());
+            return LD.S * colwiseProduct(prod, getRow(y, 0));
 
         }
 
     }
 
+    /**
+    Compute the flux for a batch of samples for a pure limb-darkened
+    map. The solution vectors of all the occulted samples are computed
+    in a single call to the batched kernel (except for those we can
+    interpolate in the table) and dotted into the `c` basis at once.
+
+    */
+    template <class T>
+    inline void Map<T>::fluxLD(const Vector<Scalar<T>>& xo_,
+                               const Vector<Scalar<T>>& yo_,
+                               const Vector<Scalar<T>>& ro_,
+                               T& result) {
+
+        // Sort the samples by occultation state
+        size_t npts = xo_.size();
+        std::vector<size_t> occ;
+        Vector<Scalar<T>> b(npts);
+        for (size_t i = 0; i < npts; ++i) {
+            b(i) = sqrt(xo_(i) * xo_(i) + yo_(i) * yo_(i));
+            if (b(i) <= ro_(i) - 1)
+                setRow(result, i, 0.0);
+            else if ((b(i) >= 1 + ro_(i)) || (ro_(i) == 0))
+                setRow(result, i, getRow(y, 0));
+            else
+                occ.push_back(i);
+        }
+        size_t nocc = occ.size();
+        if (nocc == 0) return;
+
+        // Interpolate the Agol S vectors in the table where we can
+        // and queue up the remaining samples for the batched kernel.
+        // As in `computeGreensLD`, we only need the first three terms
+        // if the map is at most quadratically limb-darkened.
+        GreensLimbDark<Scalar<T>>& solver = (u_deg <= 2) ? L_quad : L;
+        int nld = solver.lmax + 1;
+        Matrix<Scalar<T>> S(nocc, nld);
+        std::vector<size_t> exact;
+        for (size_t j = 0; j < nocc; ++j) {
+            if (table_ld && table_ld->compute(b(occ[j]), ro_(occ[j]), L.S,
+                                              L.dSdb, L.dSdr))
+                S.row(j) = L.S.head(nld);
+            else
+                exact.push_back(j);
+        }
+        if (exact.size()) {
+            Vector<Scalar<T>> b_exact(exact.size()), ro_exact(exact.size());
+            for (size_t j = 0; j < exact.size(); ++j) {
+                b_exact(j) = b(occ[exact[j]]);
+                ro_exact(j) = ro_(occ[exact[j]]);
+            }
+            solver.compute(b_exact, ro_exact);
+            for (size_t j = 0; j < exact.size(); ++j)
+                S.row(exact[j]) = solver.S_batch.row(j);
+        }
+
+        // Compute the `c` basis, in closed form for
+        // at most quadratic limb darkening
+        T prod;
+        if (u_deg <= 2) {
+            computeQuadraticC();
+            prod = quad_c.topRows(nld);
+        } else {
+            if (update_c_basis) {
+                for (int n = 0; n < nwav; ++n) {
+                    agol_c.col(n) = computeC(getColumn(u, n), dagol_cdu(n));
+                    setIndex(agol_norm, n, normC(getColumn(agol_c, n)));
+                }
+                update_c_basis = false;
+            }
+            prod = colwiseProduct(agol_c, agol_norm).topRows(nld);
+        }
+
+        // Dot the result in and we're done
+        T& result_occ(tmp.tmpT[1]);
+        result_occ = S * colwiseProduct(prod, getRow(y, 0));
+        for (size_t j = 0; j < nocc; ++j)
+            setRow(result, occ[j], getRow(result_occ, j));
+
+    }
+
     /**
     Compute the flux during or outside of an occultation
     for a pure limb-darkened map (Y_{l,m} = 0 for l > 0).
@@ -1331,7 +2135,27 @@ namespace maps {
             // is just the Y_{0,0} coefficient
             return getRow(y, 0);
 
-        // Occultation
+        // Occultation of an at most quadratically limb-darkened
+        // map: use the closed-form `c` coefficients
+        } else if (lmax <= 2) {
+
+            // Compute S, dS / db, and dS / dr
+            GreensLimbDark<Scalar<T>>& LD = computeGreensLD(b, ro, true);
+            computeQuadraticC();
+
+            // Compute the value of the flux and its derivatives
+            for (int n = 0; n < nwav; ++n) {
+                Scalar<T> y00 = getIndex(getRow(y, 0), n);
+                agol_cn = getColumn(quad_c, n).head(lmax + 1);
+                setIndex(result, n, Scalar<T>(LD.S.dot(agol_cn) * y00));
+                setIndex(dFdb, n, Scalar<T>(LD.dSdb.dot(agol_cn) * y00));
+                setIndex(dFdro, n, Scalar<T>(LD.dSdr.dot(agol_cn) * y00));
+                for (int i = 0; i < lmax; ++i)
+                    dFdu(i, n) = LD.S.dot(dquad_cdu(n).row(i).head(
+                                 lmax + 1)) * y00;
+            }
+
+        // General occultation
         } else {
 
             // Compute the Agol `c` basis
@@ -1345,43 +2169,44 @@ namespace maps {
             }
 
             // Compute S, dS / db, and dS / dr
-            L.compute(b, ro, true);
+            computeGreensLD(b, ro, true);
 
             // Compute the value of the flux and its derivatives
             for (int n = 0; n < nwav; ++n) {
 
                 // F, dF / db and dF / dr
+                Scalar<T> y00 = getIndex(getRow(y, 0), n);
                 Scalar<T> norm = getIndex(agol_norm, n);
                 agol_cn = getColumn(agol_c, n) * norm;
-                Scalar<T> resn = L.S.dot(agol_cn) * getColumn(getRow(y, 0), n);
-                setIndex(result, n, resn);
-                setIndex(dFdb, n, L.dSdb.dot(agol_cn));
-                setIndex(dFdro, n, L.dSdr.dot(agol_cn));
+                Scalar<T> Sc = L.S.dot(agol_cn);
+                setIndex(result, n, Scalar<T>(Sc * y00));
+                setIndex(dFdb, n, Scalar<T>(L.dSdb.dot(agol_cn) * y00));
+                setIndex(dFdro, n, Scalar<T>(L.dSdr.dot(agol_cn) * y00));
 
                 // Compute dF / dc
                 dFdc.block(0, n, lmax + 1, 1) = L.S.transpose();
-                dFdc(0, n) -= resn * pi<Scalar<T>>();
-                dFdc(1, n) -= 2.0 * pi<Scalar<T>>() / 3.0 * resn;
-                dFdc *= norm;
+                dFdc(0, n) -= Sc * pi<Scalar<T>>();
+                dFdc(1, n) -= 2.0 * pi<Scalar<T>>() / 3.0 * Sc;
+                dFdc.block(0, n, lmax + 1, 1) *= norm * y00;
 
                 // Chain rule to get dF / du
                 dFdu.block(0, n, lmax, 1) = 
                     dagol_cdu(n) * dFdc.block(0, n, lmax + 1, 1);
             }
 
-            // Update the user-facing derivs
-            Scalar<T> binv = 1.0 / b;
-            setRow(dF, 1, Row<T>(dFdb * xo * binv));
-            setRow(dF, 2, Row<T>(dFdb * yo * binv));
-            setRow(dF, 3, dFdro);
-            setRow(dF, 4, cwiseQuotient(result, getRow(y, 0)));
-            for (int i = 0; i < lmax; ++i)
-                setRow(dF, i + 5, getRow(dFdu, i));
+        }
 
-            // Return the flux
-            return result;
+        // Update the user-facing derivs
+        Scalar<T> binv = 1.0 / b;
+        setRow(dF, 1, Row<T>(dFdb * xo * binv));
+        setRow(dF, 2, Row<T>(dFdb * yo * binv));
+        setRow(dF, 3, dFdro);
+        setRow(dF, 4, cwiseQuotient(result, getRow(y, 0)));
+        for (int i = 0; i < lmax; ++i)
+            setRow(dF, i + 5, getRow(dFdu, i));
 
-        }
+        // Return the flux
+        return result;
 
     }
 
@@ -1499,7 +2324,7 @@ namespace maps {
             b_grad.derivatives() = Vector<Scalar<T>>::Unit(2, 0);
             ro_grad.value() = ro;
             ro_grad.derivatives() = Vector<Scalar<T>>::Unit(2, 1);
-            G_grad.compute(b_grad, ro_grad);
+            computeGreens(b_grad, ro_grad);
 
             // Compute the b and ro derivs
             setZero(dFdb);
@@ -1610,7 +2435,7 @@ namespace maps {
             ARRy = B.A * y;
 
             // Compute the sT vector
-            G.compute(b, ro);
+            computeGreens(b, ro);
             
             // Dot the result in and we're done
             return G.sT * ARRy;
@@ -1684,7 +2509,7 @@ namespace maps {
             b_grad.derivatives() = Vector<Scalar<T>>::Unit(2, 0);
             ro_grad.value() = ro;
             ro_grad.derivatives() = Vector<Scalar<T>>::Unit(2, 1);
-            G_grad.compute(b_grad, ro_grad);
+            computeGreens(b_grad, ro_grad);
 
             // Compute the b and ro derivs
             setZero(dFdb);
@@ -1879,7 +2704,7 @@ namespace maps {
             b_grad.derivatives() = Vector<Scalar<T>>::Unit(2, 0);
             ro_grad.value() = ro;
             ro_grad.derivatives() = Vector<Scalar<T>>::Unit(2, 1);
-            G_grad.compute(b_grad, ro_grad);
+            computeGreens(b_grad, ro_grad);
 
             // Compute the b and ro derivs
             setZero(dFdb);
@@ -0,0 +1,95 @@
+/**
+Simple thread-based parallelization utilities.
+
+Work is split into contiguous chunks of a range of indices, one chunk
+per thread. Each thread is handed its own index so that callers can
+give it private solver / temporary state; since every sample is
+computed by the same serial code on its own state, the results are
+identical to those of a single-threaded run.
+
+*/
+
+#ifndef _STARRY_PARALLEL_H_
+#define _STARRY_PARALLEL_H_
+
+#include <algorithm>
+#include <exception>
+#include <thread>
+#include <vector>
+#include "errors.h"
+
+namespace starry {
+namespace parallel {
+
+    /**
+    Return the number of threads to use when evaluating
+    `size` samples. If `threads` is zero or negative, use
+    all available cores. Threads are only used if each of
+    them gets at least `min_chunk` samples.
+
+    */
+    inline int getNumThreads(int threads, size_t size, size_t min_chunk=1) {
+        if (threads <= 0)
+            threads = std::max(1u, std::thread::hardware_concurrency());
+        size_t max_threads = size / std::max(min_chunk, size_t(1));
+        if (static_cast<size_t>(threads) > max_threads)
+            threads = std::max(static_cast<int>(max_threads), 1);
+        return threads;
+    }
+
+    /**
+    Evaluate `func(thread, start, stop)` over the range [0, `size`)
+    in `nthreads` contiguous chunks. The chunk with `thread = 0` runs
+    on the calling thread. Exceptions raised by any of the workers
+    are re-thrown on the calling thread once all threads have joined.
+
+    */
+    template <typename Func>
+    inline void parallelFor(size_t size, int nthreads, Func func) {
+
+        // Trivial case
+        if (nthreads <= 1) {
+            func(0, size_t(0), size);
+            return;
+        }
+
+        // Chunk boundaries
+        std::vector<size_t> bounds(nthreads + 1);
+        for (int i = 0; i < nthreads + 1; ++i)
+            bounds[i] = (size * i) / nthreads;
+
+        // Spawn the workers
+        std::vector<std::exception_ptr> errs(nthreads);
+        std::vector<std::thread> workers;
+        workers.reserve(nthreads - 1);
+        for (int i = 1; i < nthreads; ++i) {
+            workers.emplace_back([&func, &bounds, &errs, i]() {
+                try {
+                    func(i, bounds[i], bounds[i + 1]);
+                } catch (...) {
+                    errs[i] = std::current_exception();
+                }
+            });
+        }
+
+        // Do our share of the work
+        try {
+            func(0, bounds[0], bounds[1]);
+        } catch (...) {
+            errs[0] = std::current_exception();
+        }
+
+        // Wait for everyone & propagate errors
+        for (auto& worker : workers)
+            worker.join();
+        for (auto& err : errs) {
+            if (err)
+                std::rethrow_exception(err);
+        }
+
+    }
+
+} // namespace parallel
+} // namespace starry
+
+#endif
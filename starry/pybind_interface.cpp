@@ -38,6 +38,24 @@
 #define STARRY_TYPE Matrix<Multi>
 #endif
 
+// Monochromatic, quadruple precision (binary)
+#ifdef STARRY_MONO_QUAD
+#undef STARRY_NAME
+#undef STARRY_TYPE
+#define STARRY_NAME _starry_mono_quad
+#define STARRY_TYPE Vector<Quad>
+#define STARRY_QUAD
+#endif
+
+// Spectral, quadruple precision (binary)
+#ifdef STARRY_SPECTRAL_QUAD
+#undef STARRY_NAME
+#undef STARRY_TYPE
+#define STARRY_NAME _starry_spectral_quad
+#define STARRY_TYPE Matrix<Quad>
+#define STARRY_QUAD
+#endif
+
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 #include <stdlib.h>
@@ -54,11 +72,15 @@ PYBIND11_MODULE(STARRY_NAME, m) {
     using utils::Matrix;
     using utils::Vector;
     using utils::Multi;
+#ifdef STARRY_QUAD
+    using utils::Quad;
+#endif
     using pybind_interface::bindMap;
     using pybind_interface::bindBody;
     using pybind_interface::bindPrimary;
     using pybind_interface::bindSecondary;
     using pybind_interface::bindSystem;
+    using pybind_interface::bindCacheInfo;
     using namespace pybind11::literals;
 
     py::options options;
@@ -71,6 +93,7 @@ PYBIND11_MODULE(STARRY_NAME, m) {
     auto Primary1 = bindPrimary<STARRY_TYPE>(mk, Body, "Primary");
     auto Secondary = bindSecondary<STARRY_TYPE>(mk, Body, "Secondary");
     auto System = bindSystem<STARRY_TYPE>(mk, "System");
+    bindCacheInfo<STARRY_TYPE>(m);
 
 #ifdef VERSION_INFO
     m.attr("__version__") = VERSION_INFO;
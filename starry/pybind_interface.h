@@ -67,10 +67,13 @@ namespace pybind_interface {
                 I.resize(res, res);
                 Vector<Scalar<T>> x;
                 x = Vector<Scalar<T>>::LinSpaced(res, -1, 1);
-                for (int i = 0; i < res; i++){
-                    for (int j = 0; j < res; j++){
-                        I(j, i) = static_cast<double>(
-                                  map(0.0, x(i), x(j)));
+                {
+                    py::gil_scoped_release release;
+                    for (int i = 0; i < res; i++){
+                        for (int j = 0; j < res; j++){
+                            I(j, i) = static_cast<double>(
+                                      map(0.0, x(i), x(j)));
+                        }
                     }
                 }
                 show(I, "cmap"_a=cmap, "res"_a=res);
@@ -86,12 +89,15 @@ namespace pybind_interface {
                 Vector<Scalar<T>> x, theta;
                 x = Vector<Scalar<T>>::LinSpaced(res, -1, 1);
                 theta = Vector<Scalar<T>>::LinSpaced(frames, 0, 360);
-                for (int t = 0; t < frames; t++){
-                    I.push_back(Matrix<double>::Zero(res, res));
-                    for (int i = 0; i < res; i++){
-                        for (int j = 0; j < res; j++){
-                            I[t](j, i) = static_cast<double>(
-                                         map(theta(t), x(i), x(j)));
+                {
+                    py::gil_scoped_release release;
+                    for (int t = 0; t < frames; t++){
+                        I.push_back(Matrix<double>::Zero(res, res));
+                        for (int i = 0; i < res; i++){
+                            for (int j = 0; j < res; j++){
+                                I[t](j, i) = static_cast<double>(
+                                             map(theta(t), x(i), x(j)));
+                            }
                         }
                     }
                 }
@@ -262,11 +268,14 @@ namespace pybind_interface {
                                      std::to_string(t + 1));
                     I.push_back(Matrix<double>::Zero(res, res));
                 }
-                for (int i = 0; i < res; i++){
-                    for (int j = 0; j < res; j++){
-                        row = map(0, x(i), x(j));
-                        for (int t = 0; t < map.nwav; t++) {
-                            I[t](j, i) = static_cast<double>(row(t));
+                {
+                    py::gil_scoped_release release;
+                    for (int i = 0; i < res; i++){
+                        for (int j = 0; j < res; j++){
+                            row = map(0, x(i), x(j));
+                            for (int t = 0; t < map.nwav; t++) {
+                                I[t](j, i) = static_cast<double>(row(t));
+                            }
                         }
                     }
                 }
@@ -447,9 +456,11 @@ namespace pybind_interface {
 
             // Is multiprecision enabled?
             .def_property_readonly("multi",
-                [](maps::Map<T> &map){
+                [](maps::Map<T> &map) -> py::object {
                     Scalar<T> foo;
-                    return isMulti(foo);
+                    if (isQuad(foo))
+                        return py::str("quad");
+                    return py::bool_(isMulti(foo));
             }, docstrings::Map::multi)
 
             // Floating point precision
@@ -613,12 +624,32 @@ namespace pybind_interface {
                             py::array_t<double>& yo,
                             py::array_t<double>& ro,
                             bool gradient,
-                            bool numerical) -> py::object {
+                            bool numerical,
+                            int threads) -> py::object {
                     return vectorize::flux(map, theta, xo, yo, ro,
-                                           gradient, numerical);
+                                           gradient, numerical, threads);
                 }, docstrings::Map::flux, "theta"_a=0.0, "xo"_a=0.0, "yo"_a=0.0,
                                    "ro"_a=0.0, "gradient"_a=false,
-                                   "numerical"_a=false)
+                                   "numerical"_a=false, "threads"_a=1)
+
+            .def("design_matrix", [](maps::Map<T> &map,
+                                     py::array_t<double>& theta,
+                                     py::array_t<double>& xo,
+                                     py::array_t<double>& yo,
+                                     py::array_t<double>& ro) {
+                    return vectorize::design_matrix(map, theta, xo, yo, ro);
+                }, docstrings::Map::design_matrix, "theta"_a=0.0, "xo"_a=0.0,
+                                   "yo"_a=0.0, "ro"_a=0.0)
+
+            .def("flux_batch", [](maps::Map<T> &map,
+                                  const Matrix<double>& Y,
+                                  py::array_t<double>& theta,
+                                  py::array_t<double>& xo,
+                                  py::array_t<double>& yo,
+                                  py::array_t<double>& ro) {
+                    return vectorize::flux_batch(map, Y, theta, xo, yo, ro);
+                }, docstrings::Map::flux_batch, "Y"_a, "theta"_a=0.0,
+                                   "xo"_a=0.0, "yo"_a=0.0, "ro"_a=0.0)
                        
             .def("rotate", [](maps::Map<T> &map, double theta) {
                     map.rotate(static_cast<Scalar<T>>(theta));
@@ -631,6 +662,21 @@ namespace pybind_interface {
             }, docstrings::Map::is_physical, "epsilon"_a=1.e-6,
                "max_iterations"_a=100)
 
+            .def("tabulate", [](maps::Map<T> &map, double rmax, double tol,
+                                int res, std::string& path) {
+                    map.tabulate(rmax, tol, res, path);
+            }, docstrings::Map::tabulate, "rmax"_a, "tol"_a=1.e-10,
+               "res"_a=256, "path"_a="")
+
+            .def_property("escalate",
+                [](maps::Map<T> &map) {
+                        return map.getEscalate();
+                    },
+                [](maps::Map<T> &map, bool escalate){
+                        map.setEscalate(escalate);
+                    },
+                docstrings::Map::escalate)
+
             .def("__repr__", &maps::Map<T>::info);
 
         // Add type-specific attributes & methods
@@ -1241,9 +1287,114 @@ namespace pybind_interface {
             // Compute the light curve
             .def("compute", [](kepler::System<T> &system,
                                const Vector<double>& time,
-                               bool gradient, bool numerical) {
-                system.compute(time.template cast<Scalar<T>>(), gradient, numerical);
-            }, docstrings::System::compute, "time"_a, "gradient"_a=false, "numerical"_a=false)
+                               bool gradient, bool numerical,
+                               py::object exposure_time) {
+                Vector<Scalar<T>> time_ = time.template cast<Scalar<T>>();
+                if (exposure_time.is_none()) {
+                    py::gil_scoped_release release;
+                    system.compute(time_, gradient, numerical);
+                } else {
+                    // Broadcast scalars to the shape of the time array
+                    py::object numpy = py::module::import("numpy");
+                    Vector<Scalar<T>> exptime_ = py::cast<Vector<double>>(
+                        numpy.attr("broadcast_to")(exposure_time,
+                                                   py::make_tuple(time.size()))
+                    ).template cast<Scalar<T>>();
+                    py::gil_scoped_release release;
+                    system.compute(time_, exptime_, gradient, numerical);
+                }
+            }, docstrings::System::compute, "time"_a, "gradient"_a=false,
+               "numerical"_a=false, "exposure_time"_a=py::none())
+
+            // Compute the design matrix of one of the bodies
+            .def("design_matrix", [](kepler::System<T> &system,
+                                     const Vector<double>& time,
+                                     kepler::Body<T>* body) {
+                Vector<Scalar<T>> time_ = time.template cast<Scalar<T>>();
+                Matrix<Scalar<T>> X;
+                {
+                    py::gil_scoped_release release;
+                    system.designMatrix(time_, body, X);
+                }
+                return Matrix<double>(X.template cast<double>());
+            }, docstrings::System::design_matrix, "time"_a, "body"_a)
+
+            // Compute the light curve for many parameter sets
+            .def("compute_batch", [](kepler::System<T> &system,
+                                     const Vector<double>& time,
+                                     const Matrix<double>& params,
+                                     const std::vector<std::string>& names,
+                                     py::object exposure_time,
+                                     int threads) {
+                Vector<Scalar<T>> exptime_;
+                if (exposure_time.is_none()) {
+                    exptime_ = Vector<Scalar<T>>::Constant(time.size(),
+                                    system.getExposureTime());
+                } else {
+                    py::object numpy = py::module::import("numpy");
+                    exptime_ = py::cast<Vector<double>>(
+                        numpy.attr("broadcast_to")(exposure_time,
+                                                   py::make_tuple(time.size()))
+                    ).template cast<Scalar<T>>();
+                }
+                Matrix<Scalar<T>> flux;
+                {
+                    py::gil_scoped_release release;
+                    system.computeBatch(time.template cast<Scalar<T>>(),
+                                        exptime_,
+                                        params.template cast<Scalar<T>>(),
+                                        names, flux, threads);
+                }
+                int nwav = system.primary->nwav;
+                std::vector<ssize_t> shape({flux.rows(), time.size()});
+                if (nwav > 1)
+                    shape.push_back(nwav);
+                py::array_t<double> res(shape);
+                Eigen::Map<Eigen::Matrix<double, Eigen::Dynamic, Eigen::Dynamic,
+                                         Eigen::RowMajor>>(res.mutable_data(),
+                    flux.rows(), flux.cols()) = flux.template cast<double>();
+                return res;
+            }, docstrings::System::compute_batch, "time"_a, "params"_a,
+               "names"_a, "exposure_time"_a=py::none(), "threads"_a=1)
+
+            // Compute the sky positions of the secondaries
+            .def("positions", [](kepler::System<T> &system,
+                                 const Vector<double>& time,
+                                 bool gradient) -> py::object {
+                Vector<Scalar<T>> time_ = time.template cast<Scalar<T>>();
+                Matrix<Scalar<T>> x, y, z;
+                if (!gradient) {
+                    {
+                        py::gil_scoped_release release;
+                        system.positions(time_, x, y, z);
+                    }
+                    return py::make_tuple(Matrix<double>(x.template cast<double>()),
+                                          Matrix<double>(y.template cast<double>()),
+                                          Matrix<double>(z.template cast<double>()));
+                } else {
+                    std::vector<std::string> names;
+                    std::vector<Matrix<Scalar<T>>> dx, dy, dz;
+                    {
+                        py::gil_scoped_release release;
+                        system.positions(time_, x, y, z, names, dx, dy, dz);
+                    }
+                    py::dict dX, dY, dZ;
+                    for (size_t k = 0; k < names.size(); ++k) {
+                        dX[names[k].c_str()] = Matrix<double>(dx[k].template cast<double>());
+                        dY[names[k].c_str()] = Matrix<double>(dy[k].template cast<double>());
+                        dZ[names[k].c_str()] = Matrix<double>(dz[k].template cast<double>());
+                    }
+                    py::dict grad;
+                    grad["X"] = dX;
+                    grad["Y"] = dY;
+                    grad["Z"] = dZ;
+                    return py::make_tuple(
+                        py::make_tuple(Matrix<double>(x.template cast<double>()),
+                                       Matrix<double>(y.template cast<double>()),
+                                       Matrix<double>(z.template cast<double>())),
+                        grad);
+                }
+            }, docstrings::System::positions, "time"_a, "gradient"_a=false)
 
             // Exposure time in days
             .def_property("exposure_time",
@@ -1272,6 +1423,33 @@ namespace pybind_interface {
                     sys.setExposureMaxDepth(d);
                 }, docstrings::System::exposure_max_depth)
 
+            // Exposure integration scheme
+            .def_property("exposure_mode",
+                [](kepler::System<T> &sys) {
+                    return sys.getExposureMode();
+                },
+                [](kepler::System<T> &sys, const std::string& mode){
+                    sys.setExposureMode(mode);
+                }, docstrings::System::exposure_mode)
+
+            // Exposure integration order
+            .def_property("exposure_order",
+                [](kepler::System<T> &sys) {
+                    return sys.getExposureOrder();
+                },
+                [](kepler::System<T> &sys, int n){
+                    sys.setExposureOrder(n);
+                }, docstrings::System::exposure_order)
+
+            // Phase folding tolerance
+            .def_property("fold_tol",
+                [](kepler::System<T> &sys) {
+                    return static_cast<double>(sys.getFoldTol());
+                },
+                [](kepler::System<T> &sys, const double& tol){
+                    sys.setFoldTol(tol);
+                }, docstrings::System::fold_tol)
+
             // The computed light curve: a matrix or a vector
             .def_property_readonly("lightcurve", [](kepler::System<T> &system)
                     -> py::object{
@@ -1293,6 +1471,20 @@ namespace pybind_interface {
 
     }
 
+    /**
+    Statistics on the shared change of basis matrices.
+
+    */
+    template <typename T>
+    void bindCacheInfo(py::module& m) {
+        m.def("cache_info", []() -> py::dict {
+            basis::CacheInfo info = basis::cacheInfo<Scalar<T>>();
+            return py::dict("hits"_a=info.hits, "misses"_a=info.misses,
+                            "loads"_a=info.loads, "entries"_a=info.entries, "bytes"_a=info.bytes);
+        }, docstrings::starry::cache_info);
+
+    }
+
 } // namespace pybind_interface
 
 #endif
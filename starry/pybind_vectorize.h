@@ -11,8 +11,10 @@ Vectorization wrappers for the `Map` methods.
 #include <pybind11/stl.h>
 #include <pybind11/numpy.h>
 #include <stdlib.h>
+#include <memory>
 #include "utils.h"
 #include "errors.h"
+#include "parallel.h"
 
 
 namespace pybind_vectorize {
@@ -117,84 +119,208 @@ namespace pybind_vectorize {
         }
     }
 
+    /**
+    Broadcast several python arrays against each other following the
+    numpy broadcasting rules. The broadcast arrays are flattened (in C
+    order) into `args_v` and the shape of the broadcast is returned.
+    This must be called while holding the GIL; the flattened vectors
+    may then be safely accessed after releasing it.
+
+    */
+    inline std::vector<ssize_t> broadcast_args(
+            std::initializer_list<const py::array_t<double>*> args,
+            std::initializer_list<Vector<double>*> args_v) {
+
+        // Figure out the shape of the output
+        ssize_t ndim = 0;
+        for (auto arg : args)
+            ndim = max(ndim, static_cast<ssize_t>(arg->ndim()));
+        std::vector<ssize_t> shape(ndim, 1);
+        for (auto arg : args) {
+            ssize_t offset = ndim - arg->ndim();
+            for (ssize_t k = 0; k < arg->ndim(); ++k) {
+                ssize_t s = arg->shape(k);
+                if (shape[offset + k] == 1)
+                    shape[offset + k] = s;
+                else if ((s != 1) && (s != shape[offset + k]))
+                    throw errors::ValueError("Mismatch in argument dimensions.");
+            }
+        }
+        ssize_t size = 1;
+        for (auto s : shape)
+            size *= s;
+
+        // Flatten each of the arguments
+        auto arg_v = args_v.begin();
+        for (auto arg : args) {
+            ssize_t offset = ndim - arg->ndim();
+            std::vector<ssize_t> strides(ndim, 0);
+            for (ssize_t k = 0; k < arg->ndim(); ++k) {
+                if (arg->shape(k) != 1)
+                    strides[offset + k] = arg->strides(k) / sizeof(double);
+            }
+            const double* data = arg->data();
+            Vector<double>& res = **(arg_v++);
+            res.resize(size);
+            std::vector<ssize_t> index(ndim, 0);
+            ssize_t pos = 0;
+            for (ssize_t i = 0; i < size; ++i) {
+                res(i) = data[pos];
+                for (ssize_t k = ndim - 1; k >= 0; --k) {
+                    pos += strides[k];
+                    if (++index[k] < shape[k])
+                        break;
+                    pos -= strides[k] * shape[k];
+                    index[k] = 0;
+                }
+            }
+        }
+
+        return shape;
+
+    }
+
+    //! Cast a flattened vector to a python object of a given shape
+    inline py::object reshape(const Vector<double>& vec,
+                              const std::vector<ssize_t>& shape) {
+        if (shape.size() == 0)
+            return py::cast(vec(0));
+        py::array_t<double> res(shape);
+        std::copy(vec.data(), vec.data() + vec.size(), res.mutable_data());
+        return std::move(res);
+    }
+
+    /**
+    Evaluate `func(map, start, stop)` over contiguous chunks of the
+    range [0, `size`) on `nthreads` threads. The first chunk is
+    evaluated with `map` itself; every other thread gets its own
+    private copy of the map (and therefore its own rotation, solver
+    and temporary state). The copies are kept by the map and reused
+    in subsequent calls.
+
+    */
+    template <typename T, typename Func>
+    inline void parallelMapChunks(maps::Map<T>& map, size_t size, int nthreads,
+                                  Func func) {
+        if (nthreads > 1)
+            map.initWorkers(nthreads);
+        parallel::parallelFor(size, nthreads,
+            [&map, &func](int thread, size_t start, size_t stop) {
+                func(map.getWorker(thread), start, stop);
+            }
+        );
+    }
+
+    //! Evaluate `func(map, i)` for `i` in [0, `size`) on `nthreads` threads.
+    template <typename T, typename Func>
+    inline void parallelMap(maps::Map<T>& map, size_t size, int nthreads,
+                            Func func) {
+        parallelMapChunks(map, size, nthreads,
+            [&func](maps::Map<T>& worker, size_t start, size_t stop) {
+                for (size_t i = start; i < stop; ++i)
+                    func(worker, i);
+            }
+        );
+    }
+
+    /**
+    Evaluate the flux in contiguous chunks using the batched
+    `Map::flux`, which rotates the map for all samples in a
+    chunk at once. Row `i` of `F` is the flux at sample `i`.
+
+    */
+    template <typename T>
+    inline void fluxBatch(maps::Map<T>& map, const Vector<double>& theta_v,
+                          const Vector<double>& xo_v,
+                          const Vector<double>& yo_v,
+                          const Vector<double>& ro_v, bool numerical,
+                          int nthreads, Matrix<double>& F) {
+        F.resize(theta_v.size(), map.nwav);
+        parallelMapChunks(map, theta_v.size(), nthreads,
+            [&](maps::Map<T>& worker, size_t start, size_t stop) {
+                size_t n = stop - start;
+                T result;
+                worker.flux(
+                    theta_v.segment(start, n).template cast<Scalar<T>>(),
+                    xo_v.segment(start, n).template cast<Scalar<T>>(),
+                    yo_v.segment(start, n).template cast<Scalar<T>>(),
+                    ro_v.segment(start, n).template cast<Scalar<T>>(),
+                    result, numerical);
+                F.block(start, 0, n, map.nwav) = result.template cast<double>();
+            }
+        );
+    }
+
     //! Vectorized `flux` method: single-wavelength starry
     template <typename T>
     typename std::enable_if<!std::is_base_of<Eigen::EigenBase<Row<T>>,
                                              Row<T>>::value, py::object>::type
     flux(maps::Map<T> &map, py::array_t<double>& theta, py::array_t<double>& xo,
          py::array_t<double>& yo, py::array_t<double>& ro, bool gradient,
-         bool numerical){
+         bool numerical, int threads=1){
+
+        // Broadcast the arguments
+        Vector<double> theta_v, xo_v, yo_v, ro_v;
+        auto shape = broadcast_args({&theta, &xo, &yo, &ro},
+                                    {&theta_v, &xo_v, &yo_v, &ro_v});
+        size_t sz = theta_v.size();
+        int nthreads = parallel::getNumThreads(threads, sz,
+                                               STARRY_MIN_THREAD_CHUNK);
+        Vector<double> F(sz);
 
         if (gradient) {
 
-            // Initialize a dictionary of derivatives
-            size_t n = max(theta.size(), max(xo.size(),
-                           max(yo.size(), ro.size())));
-            std::map<string, Matrix<double>> grad;
+            // Initialize the gradient matrix
             map.resizeGradient();
             auto dF_names = map.getGradientNames();
-            int n_ylm = 0, n_ul = 0;
-            for (auto name : dF_names) {
-                if (name == "y")
-                    ++n_ylm;
-                else if (name == "u")
-                    ++n_ul;
-                else
-                    grad[name].resize(n, 1);
-            }
-            grad["y"].resize(n, n_ylm);
-            grad["u"].resize(n, n_ul);
-
-            // Nested lambda function;
-            // https://github.com/pybind/pybind11/issues/
-            // 761#issuecomment-288818460
-            int t = 0;
-            auto F = py::vectorize([&map, &grad, &t, &dF_names, &numerical]
-                        (double theta, double xo, double yo, double ro) {
-                // Evaluate the function
-                double res = static_cast<double>(map.flux(theta, xo, yo,
-                                                          ro, true,
-                                                          numerical));
-                // Gather the derivatives
-                auto dF = map.getGradient();
-                int n_ylm = 0, n_ul = 0;
-                for (int j = 0; j < dF.size(); j++) {
-                    if (dF_names[j] == "y") {
-                        grad["y"](t, n_ylm++) = static_cast<double>(dF(j));
-                    } else if (dF_names[j] == "u") {
-                        grad["u"](t, n_ul++) = static_cast<double>(dF(j));
-                    } else {
-                        grad[dF_names[j]](t, 0) = static_cast<double>(dF(j));
+            int ngrad = dF_names.size();
+            Matrix<double> dF(sz, ngrad);
+
+            // Compute the flux & the gradient
+            {
+                py::gil_scoped_release release;
+                parallelMap(map, sz, nthreads,
+                    [&](maps::Map<T>& worker, size_t i) {
+                        F(i) = static_cast<double>(worker.flux(theta_v(i),
+                            xo_v(i), yo_v(i), ro_v(i), true, numerical));
+                        dF.row(i) = worker.getGradient().transpose().template
+                                        cast<double>();
                     }
-                }
-                t++;
-                return res;
-            })(theta, xo, yo, ro);
+                );
+            }
 
             // Convert to an actual python dictionary
             // Necessary because we're mixing vectors and matrices
             // among the dictionary items.
-            // NOTE: All this copying could be slow: not ideal.
             auto pygrad = py::dict();
-            for (std::string name : dF_names) {
-                if ((name != "y") && (name != "u")) {
-                    pygrad[name.c_str()] = grad[name].col(0);
-                }
+            int n_ylm = 0, n_ul = 0;
+            for (int j = 0; j < ngrad; ++j) {
+                if (dF_names[j] == "y")
+                    ++n_ylm;
+                else if (dF_names[j] == "u")
+                    ++n_ul;
+                else
+                    pygrad[dF_names[j].c_str()] = Vector<double>(dF.col(j));
             }
-            pygrad["y"] = grad["y"].transpose();
-            pygrad["u"] = grad["u"].transpose();
+            pygrad["y"] = Matrix<double>(
+                dF.block(0, ngrad - n_ylm - n_ul, sz, n_ylm).transpose());
+            pygrad["u"] = Matrix<double>(
+                dF.block(0, ngrad - n_ul, sz, n_ul).transpose());
 
             // Return a tuple of (F, dict(dF))
-            return py::make_tuple(F, pygrad);
+            return py::make_tuple(reshape(F, shape), pygrad);
 
         } else {
 
-            // Easy! We'll just return F
-            return py::vectorize([&map, &numerical, &gradient](double theta, double xo,
-                                        double yo, double ro) {
-                return static_cast<double>(map.flux(theta, xo, yo, ro, gradient,
-                                           numerical));
-            })(theta, xo, yo, ro);
+            // Compute the flux
+            {
+                py::gil_scoped_release release;
+                Matrix<double> FBatch;
+                fluxBatch(map, theta_v, xo_v, yo_v, ro_v, numerical,
+                          nthreads, FBatch);
+                F = FBatch.col(0);
+            }
+            return reshape(F, shape);
 
         }
 
@@ -206,13 +332,15 @@ namespace pybind_vectorize {
                                             Row<T>>::value, py::object>::type
     flux(maps::Map<T> &map, py::array_t<double>& theta, py::array_t<double>& xo,
          py::array_t<double>& yo, py::array_t<double>& ro, bool gradient,
-         bool numerical){
+         bool numerical, int threads=1){
 
         // Vectorize the arguments manually
         Vector<double> theta_v, xo_v, yo_v, ro_v;
         vectorize_args(theta, xo, yo, ro,
                        theta_v, xo_v, yo_v, ro_v);
         size_t sz = theta_v.size();
+        int nthreads = parallel::getNumThreads(threads, sz,
+                                               STARRY_MIN_THREAD_CHUNK);
 
         if (gradient) {
 
@@ -240,26 +368,30 @@ namespace pybind_vectorize {
 
             // Iterate through the timeseries
             Matrix<double> F(sz, map.nwav);
-            for (size_t i = 0; i < sz; ++i) {
-
-                // Function value
-                F.row(i) = map.flux(theta_v(i), xo_v(i),
-                           yo_v(i), ro_v(i), true,
-                           numerical).template cast<double>();
-
-                // Gradient
-                auto dF = map.getGradient();
-                int ky = 0, ku = 0;
-                for (int j = 0; j < dF.rows(); ++j) {
-                    if (dF_names[j] == "y") {
-                        grad_y[ky++].row(i) = dF.row(j).template cast<double>();
-                    } else if (dF_names[j] == "u") {
-                        grad_u[ku++].row(i) = dF.row(j).template cast<double>();
-                    } else {
-                        grad[dF_names[j]].row(i) = dF.row(j).template cast<double>();
+            {
+                py::gil_scoped_release release;
+                parallelMap(map, sz, nthreads,
+                    [&](maps::Map<T>& worker, size_t i) {
+
+                    // Function value
+                    F.row(i) = worker.flux(theta_v(i), xo_v(i),
+                               yo_v(i), ro_v(i), true,
+                               numerical).template cast<double>();
+
+                    // Gradient
+                    auto& dF = worker.getGradient();
+                    int ky = 0, ku = 0;
+                    for (int j = 0; j < dF.rows(); ++j) {
+                        if (dF_names[j] == "y") {
+                            grad_y[ky++].row(i) = dF.row(j).template cast<double>();
+                        } else if (dF_names[j] == "u") {
+                            grad_u[ku++].row(i) = dF.row(j).template cast<double>();
+                        } else {
+                            grad.at(dF_names[j]).row(i) = dF.row(j).template cast<double>();
+                        }
                     }
-                }
 
+                });
             }
 
             // Convert to a python dictionary
@@ -278,11 +410,11 @@ namespace pybind_vectorize {
         } else {
 
             // Iterate through the timeseries
-            Matrix<double> F(sz, map.nwav);
-            for (size_t i = 0; i < sz; ++i) {
-                F.row(i) = map.flux(theta_v(i), xo_v(i),
-                           yo_v(i), ro_v(i), false,
-                           numerical).template cast<double>();
+            Matrix<double> F;
+            {
+                py::gil_scoped_release release;
+                fluxBatch(map, theta_v, xo_v, yo_v, ro_v, numerical,
+                          nthreads, F);
             }
 
             // Cast to python object
@@ -292,6 +424,58 @@ namespace pybind_vectorize {
 
     }
 
+    //! Vectorized `design_matrix` method
+    template <typename T>
+    Matrix<double> design_matrix(maps::Map<T> &map, py::array_t<double>& theta,
+                                 py::array_t<double>& xo,
+                                 py::array_t<double>& yo,
+                                 py::array_t<double>& ro) {
+
+        // Broadcast the arguments
+        Vector<double> theta_v, xo_v, yo_v, ro_v;
+        broadcast_args({&theta, &xo, &yo, &ro},
+                       {&theta_v, &xo_v, &yo_v, &ro_v});
+
+        // Compute the design matrix
+        Matrix<Scalar<T>> X;
+        {
+            py::gil_scoped_release release;
+            map.designMatrix(theta_v.template cast<Scalar<T>>(),
+                             xo_v.template cast<Scalar<T>>(),
+                             yo_v.template cast<Scalar<T>>(),
+                             ro_v.template cast<Scalar<T>>(), X);
+        }
+        return X.template cast<double>();
+
+    }
+
+    //! Vectorized `flux_batch` method
+    template <typename T>
+    Matrix<double> flux_batch(maps::Map<T> &map, const Matrix<double>& Y,
+                              py::array_t<double>& theta,
+                              py::array_t<double>& xo,
+                              py::array_t<double>& yo,
+                              py::array_t<double>& ro) {
+
+        // Broadcast the arguments
+        Vector<double> theta_v, xo_v, yo_v, ro_v;
+        broadcast_args({&theta, &xo, &yo, &ro},
+                       {&theta_v, &xo_v, &yo_v, &ro_v});
+
+        // Compute the light curves
+        Matrix<Scalar<T>> F;
+        {
+            py::gil_scoped_release release;
+            map.fluxBatch(Y.template cast<Scalar<T>>(),
+                          theta_v.template cast<Scalar<T>>(),
+                          xo_v.template cast<Scalar<T>>(),
+                          yo_v.template cast<Scalar<T>>(),
+                          ro_v.template cast<Scalar<T>>(), F);
+        }
+        return F.template cast<double>();
+
+    }
+
     //! Vectorized `evaluate` method: single-wavelength starry
     template <typename T>
     typename std::enable_if<!std::is_base_of<Eigen::EigenBase<Row<T>>,
@@ -299,10 +483,21 @@ namespace pybind_vectorize {
     evaluate(maps::Map<T> &map, py::array_t<double>& theta,
              py::array_t<double>& x, py::array_t<double>& y){
 
-        // Easy! We'll just return I
-        return py::vectorize([&map](double theta, double x, double y) {
-            return static_cast<double>(map(theta, x, y));
-        })(theta, x, y);
+        // Broadcast the arguments
+        Vector<double> theta_v, x_v, y_v;
+        auto shape = broadcast_args({&theta, &x, &y}, {&theta_v, &x_v, &y_v});
+        size_t sz = theta_v.size();
+
+        // Iterate through the timeseries
+        Vector<double> I(sz);
+        {
+            py::gil_scoped_release release;
+            for (size_t i = 0; i < sz; ++i)
+                I(i) = static_cast<double>(map(theta_v(i), x_v(i), y_v(i)));
+        }
+
+        // Cast to python object
+        return reshape(I, shape);
 
     }
 
@@ -320,8 +515,11 @@ namespace pybind_vectorize {
 
         // Iterate through the timeseries
         Matrix<double> I(sz, map.nwav);
-        for (size_t i = 0; i < sz; ++i) {
-            I.row(i) = map(theta_v(i), x_v(i), y_v(i)).template cast<double>();
+        {
+            py::gil_scoped_release release;
+            for (size_t i = 0; i < sz; ++i) {
+                I.row(i) = map(theta_v(i), x_v(i), y_v(i)).template cast<double>();
+            }
         }
 
         // Cast to python object
@@ -0,0 +1,226 @@
+/**
+A quadruple precision scalar type backed by GCC's `__float128`.
+
+This is a binary IEEE 754 float with a 113-bit significand (about
+34 decimal digits), emulated in software by the compiler and
+`libquadmath`. It is roughly as precise as the `Multi` type with
+32 digits, but much faster, since it does not carry a decimal
+representation around. It is only available with compilers that
+support `__float128` (GCC, and Clang on x86) and must be linked
+against `libquadmath`.
+
+*/
+
+#ifndef _STARRY_QUAD_H_
+#define _STARRY_QUAD_H_
+
+#include <cmath>
+#include <iostream>
+#include <limits>
+#include <string>
+#include <type_traits>
+#include <Eigen/Core>
+#include <boost/multiprecision/number.hpp>
+extern "C" {
+#include <quadmath.h>
+}
+
+namespace starry {
+namespace quad {
+
+    //! The underlying compiler type
+    __extension__ typedef __float128 float128;
+
+    /**
+    A thin wrapper around `__float128`, so that the usual math functions
+    may be overloaded for it and found by argument-dependent lookup.
+
+    */
+    class Quad {
+
+        public:
+
+            float128 v;                                                         /**< The value */
+
+            Quad() : v(0) {}
+
+            Quad(const float128& x) : v(x) {}
+
+            //! Implicit conversion from any arithmetic type
+            template <typename U, typename=typename std::enable_if<
+                std::is_arithmetic<U>::value>::type>
+            Quad(const U& x) : v(x) {}
+
+            /**
+            Conversion from a multiprecision number. The mantissa is
+            split into three doubles, which together carry more than
+            enough digits to round correctly to 113 bits, and the
+            exponent is applied at the end, so that numbers outside
+            the range of a double are converted as well.
+
+            */
+            template <class Backend,
+                      boost::multiprecision::expression_template_option ET>
+            explicit Quad(const boost::multiprecision::number<Backend, ET>& x) {
+                if (boost::multiprecision::isnan(x) ||
+                        boost::multiprecision::isinf(x)) {
+                    v = static_cast<double>(x);
+                    return;
+                }
+                int exponent;
+                boost::multiprecision::number<Backend, ET> r =
+                    boost::multiprecision::frexp(x, &exponent);
+                double hi = static_cast<double>(r);
+                r -= hi;
+                double mid = static_cast<double>(r);
+                double lo = static_cast<double>(r - mid);
+                v = scalbnq(float128(hi) + float128(mid) + float128(lo),
+                            exponent);
+            }
+
+            //! Explicit conversion to any arithmetic type
+            template <typename U, typename=typename std::enable_if<
+                std::is_arithmetic<U>::value>::type>
+            explicit operator U() const {
+                return static_cast<U>(v);
+            }
+
+            Quad& operator+=(const Quad& x) { v += x.v; return *this; }
+            Quad& operator-=(const Quad& x) { v -= x.v; return *this; }
+            Quad& operator*=(const Quad& x) { v *= x.v; return *this; }
+            Quad& operator/=(const Quad& x) { v /= x.v; return *this; }
+            Quad operator-() const { return Quad(-v); }
+            Quad operator+() const { return *this; }
+
+            friend Quad operator+(const Quad& x, const Quad& y) { return Quad(x.v + y.v); }
+            friend Quad operator-(const Quad& x, const Quad& y) { return Quad(x.v - y.v); }
+            friend Quad operator*(const Quad& x, const Quad& y) { return Quad(x.v * y.v); }
+            friend Quad operator/(const Quad& x, const Quad& y) { return Quad(x.v / y.v); }
+            friend bool operator==(const Quad& x, const Quad& y) { return x.v == y.v; }
+            friend bool operator!=(const Quad& x, const Quad& y) { return x.v != y.v; }
+            friend bool operator<(const Quad& x, const Quad& y) { return x.v < y.v; }
+            friend bool operator<=(const Quad& x, const Quad& y) { return x.v <= y.v; }
+            friend bool operator>(const Quad& x, const Quad& y) { return x.v > y.v; }
+            friend bool operator>=(const Quad& x, const Quad& y) { return x.v >= y.v; }
+
+    };
+
+    // Math functions, found by argument-dependent lookup
+    inline Quad sqrt(const Quad& x) { return sqrtq(x.v); }
+    inline Quad abs(const Quad& x) { return fabsq(x.v); }
+    inline Quad fabs(const Quad& x) { return fabsq(x.v); }
+    inline Quad pow(const Quad& x, const Quad& y) { return powq(x.v, y.v); }
+    inline Quad sin(const Quad& x) { return sinq(x.v); }
+    inline Quad cos(const Quad& x) { return cosq(x.v); }
+    inline Quad tan(const Quad& x) { return tanq(x.v); }
+    inline Quad asin(const Quad& x) { return asinq(x.v); }
+    inline Quad acos(const Quad& x) { return acosq(x.v); }
+    inline Quad atan(const Quad& x) { return atanq(x.v); }
+    inline Quad atan2(const Quad& y, const Quad& x) { return atan2q(y.v, x.v); }
+    inline Quad exp(const Quad& x) { return expq(x.v); }
+    inline Quad log(const Quad& x) { return logq(x.v); }
+    inline Quad floor(const Quad& x) { return floorq(x.v); }
+    inline Quad ceil(const Quad& x) { return ceilq(x.v); }
+    inline Quad fmod(const Quad& x, const Quad& y) { return fmodq(x.v, y.v); }
+    inline bool isnan(const Quad& x) { return isnanq(x.v); }
+    inline bool isinf(const Quad& x) { return isinfq(x.v); }
+    inline bool isfinite(const Quad& x) { return finiteq(x.v); }
+
+    //! Print at full precision (or at the precision of the stream, if set)
+    inline std::ostream& operator<<(std::ostream& os, const Quad& x) {
+        char buf[64];
+        int digits = static_cast<int>(os.precision());
+        if (digits <= 6)
+            digits = 36;
+        quadmath_snprintf(buf, sizeof(buf), "%.*Qg", digits, x.v);
+        return os << buf;
+    }
+
+    //! Read a number in any format accepted by `strtoflt128`
+    inline std::istream& operator>>(std::istream& is, Quad& x) {
+        std::string str;
+        if (is >> str) {
+            char* end;
+            x.v = strtoflt128(str.c_str(), &end);
+            if (*end != '\0')
+                is.setstate(std::ios::failbit);
+        }
+        return is;
+    }
+
+} // namespace quad
+} // namespace starry
+
+namespace std {
+
+    //! Numeric limits of the quadruple precision type
+    template <>
+    class numeric_limits<starry::quad::Quad> {
+
+        public:
+
+            typedef starry::quad::Quad Quad;
+            static const bool is_specialized = true;
+            static const bool is_signed = true;
+            static const bool is_integer = false;
+            static const bool is_exact = false;
+            static const bool has_infinity = true;
+            static const bool has_quiet_NaN = true;
+            static const bool is_iec559 = true;
+            static const int radix = 2;
+            static const int digits = 113;
+            static const int digits10 = 33;
+            static const int max_digits10 = 36;
+            static const int min_exponent = -16381;
+            static const int max_exponent = 16384;
+            static Quad epsilon() { return scalbnq(1, 1 - digits); }
+            static Quad min() { return scalbnq(1, min_exponent - 1); }
+            static Quad max() { return nextafterq(infinity().v, 0); }
+            static Quad lowest() { return -max(); }
+            static Quad infinity() { return __builtin_huge_valq(); }
+            static Quad quiet_NaN() { return nanq(""); }
+            static Quad round_error() { return 0.5; }
+            static Quad denorm_min() { return nextafterq(0, 1); }
+
+    };
+
+} // namespace std
+
+namespace Eigen {
+
+    //! Eigen traits of the quadruple precision type
+    template<>
+    struct NumTraits<starry::quad::Quad> :
+            GenericNumTraits<starry::quad::Quad> {
+        typedef starry::quad::Quad Real;
+        typedef starry::quad::Quad NonInteger;
+        typedef starry::quad::Quad Nested;
+        enum {
+            IsComplex = 0,
+            IsInteger = 0,
+            IsSigned = 1,
+            RequireInitialization = 1,
+            ReadCost = 1,
+            AddCost = 4,
+            MulCost = 4
+        };
+        static inline Real epsilon() {
+            return std::numeric_limits<Real>::epsilon();
+        }
+        static inline Real dummy_precision() {
+            return Real(1e-30);
+        }
+        static inline Real highest() {
+            return std::numeric_limits<Real>::max();
+        }
+        static inline Real lowest() {
+            return std::numeric_limits<Real>::lowest();
+        }
+        static inline int digits10() {
+            return std::numeric_limits<Real>::digits10;
+        }
+    };
+
+} // namespace Eigen
+
+#endif
@@ -17,6 +17,7 @@ from the Wigner-D matrices for complex spherical harmonics.
 #include <Eigen/Core>
 #include "utils.h"
 #include "tables.h"
+#include "errors.h"
 
 namespace starry {
 namespace rotation {
@@ -86,6 +87,11 @@ namespace rotation {
         MapType y_zeta;                                                         /**< The base map in the `zeta` frame */
         MapType y_zeta_rot;                                                     /**< The base map in the `zeta` frame after a `zhat` rotation */
 
+        // Batched rotation params
+        Matrix<T> cosnt_batch;                                                  /**< Matrix of cos(n theta) values for a batch of angles */
+        Matrix<T> sinnt_batch;                                                  /**< Matrix of sin(n theta) values for a batch of angles */
+        Matrix<T> y_zeta_rot_batch;                                             /**< The base map in the `zeta` frame after a `zhat` rotation, for a batch of angles */
+
         // Methods
         inline void rotar(T& c1, T& s1, T& c2, T& s2, T& c3, T& s3);
         inline void dlmn(int l, T& s1, T& c1, T& c2, T& tgbet2, T& s3, T& c3);
@@ -104,6 +110,13 @@ namespace rotation {
         inline void update();
         inline void rotate(const T& costheta, const T& sintheta,
                            MapType& yout);
+        inline void rotate(const Vector<T>& costheta,
+                           const Vector<T>& sintheta, Matrix<T>& yout);
+        inline void fourier(const VectorT<T>& rT, MapType& a, MapType& b);
+        inline void rotatezRow(const T& costheta, const T& sintheta,
+                               const VectorT<T>& rin, VectorT<T>& rout);
+        inline void rotateRows(const Vector<T>& costheta,
+                               const Vector<T>& sintheta, Matrix<T>& rows);
         inline void compute(const T& costheta, const T& sintheta);
         inline void rotatez(const T& costheta, const T& sintheta,
                             const MapType& yin, MapType& yout);
@@ -186,6 +199,186 @@ namespace rotation {
 
     }
 
+    /**
+    Rotate the base map for a batch of angles given vectors of `costheta`
+    and `sintheta`. The `zhat` rotation is computed for all angles at once
+    and the transform out of the `zeta` frame is applied to the entire
+    batch as a single matrix product per degree. The result is an
+    (N x nwav * ntheta) matrix; the rotated map for the `j`-th angle
+    at wavelength `n` is in column `n * ntheta + j`.
+
+    */
+    template <class MapType>
+    inline void Wigner<MapType>::rotate(const Vector<typename MapType::Scalar>& costheta,
+                                        const Vector<typename MapType::Scalar>& sintheta,
+                                        Matrix<typename MapType::Scalar>& yout) {
+
+        const int ntheta = costheta.size();
+        if (sintheta.size() != ntheta)
+            throw errors::ValueError("Mismatch in argument dimensions.");
+
+        // Compute cos(n theta) and sin(n theta) for all angles
+        cosnt_batch.resize(max(2, lmax + 1), ntheta);
+        sinnt_batch.resize(max(2, lmax + 1), ntheta);
+        cosnt_batch.row(0).setOnes();
+        sinnt_batch.row(0).setZero();
+        cosnt_batch.row(1) = costheta.transpose();
+        sinnt_batch.row(1) = sintheta.transpose();
+        for (int n = 2; n < lmax + 1; n++) {
+            cosnt_batch.row(n) = 2.0 * cosnt_batch.row(n - 1).cwiseProduct(cosnt_batch.row(1)) -
+                                 cosnt_batch.row(n - 2);
+            sinnt_batch.row(n) = 2.0 * sinnt_batch.row(n - 1).cwiseProduct(cosnt_batch.row(1)) -
+                                 sinnt_batch.row(n - 2);
+        }
+
+        // Rotate `yzeta` about `zhat` for all angles
+        y_zeta_rot_batch.resize(N, NW * ntheta);
+        int n = 0;
+        for (int l = 0; l < lmax + 1; l++) {
+            for (int m = -l; m < l + 1; m++) {
+                for (int k = 0; k < NW; k++) {
+                    if (m < 0)
+                        y_zeta_rot_batch.block(n, k * ntheta, 1, ntheta) =
+                            y_zeta(n, k) * cosnt_batch.row(-m) +
+                            y_zeta(l * l + l - m, k) * sinnt_batch.row(-m);
+                    else
+                        y_zeta_rot_batch.block(n, k * ntheta, 1, ntheta) =
+                            y_zeta(n, k) * cosnt_batch.row(m) -
+                            y_zeta(l * l + l - m, k) * sinnt_batch.row(m);
+                }
+                n++;
+            }
+        }
+
+        // Rotate out of the `zeta` frame
+        yout.resize(N, NW * ntheta);
+        for (int l = 0; l < lmax + 1; l++) {
+            yout.block(l * l, 0, 2 * l + 1, NW * ntheta) =
+                RZetaInv[l] * y_zeta_rot_batch.block(l * l, 0, 2 * l + 1, NW * ntheta);
+        }
+
+    }
+
+    /**
+    Compute the Fourier coefficients of the projection `rT . R(theta) . y`
+    of the rotated base map onto a row vector `rT`. Since the rotation
+    about `zhat` in the `zeta` frame only mixes the `m` and `-m` terms of
+    each degree, the projection is a trigonometric polynomial of degree
+    `lmax` in theta:
+
+        rT . R(theta) . y = sum_k a_k cos(k theta) + b_k sin(k theta)
+
+    The coefficients are returned in the rows of `a` and `b`. Note that
+    `b_0` is always zero.
+
+    */
+    template <class MapType>
+    inline void Wigner<MapType>::fourier(const VectorT<typename MapType::Scalar>& rT,
+                                         MapType& a, MapType& b) {
+
+        resize(a, lmax + 1, NW);
+        resize(b, lmax + 1, NW);
+        setZero(a);
+        setZero(b);
+        VectorT<T> w;
+        int n0, nr;
+        for (int l = 0; l < lmax + 1; l++) {
+
+            // Project `rT` out of the `zeta` frame
+            w = rT.segment(l * l, 2 * l + 1) * RZetaInv[l];
+
+            // Collect the cos(k theta) and sin(k theta) terms
+            a.row(0) += w(l) * y_zeta.row(l * l + l);
+            for (int k = 1; k < l + 1; k++) {
+                n0 = l * l + l + k;
+                nr = l * l + l - k;
+                a.row(k) += w(l + k) * y_zeta.row(n0) + w(l - k) * y_zeta.row(nr);
+                b.row(k) += w(l - k) * y_zeta.row(n0) - w(l + k) * y_zeta.row(nr);
+            }
+
+        }
+
+    }
+
+    /**
+    Right-multiply a row vector `rin` by the rotation matrix about the
+    z axis, `Rz`, given `costheta` and `sintheta`. Since `Rz^T` is the
+    rotation by `-theta`, this is the transpose of `rotatez`.
+
+    */
+    template <class MapType>
+    inline void Wigner<MapType>::rotatezRow(const typename MapType::Scalar& costheta,
+                                            const typename MapType::Scalar& sintheta,
+                                            const VectorT<typename MapType::Scalar>& rin,
+                                            VectorT<typename MapType::Scalar>& rout) {
+        cosnt(1) = costheta;
+        sinnt(1) = sintheta;
+        for (int n = 2; n < lmax + 1; n++) {
+            cosnt(n) = 2.0 * cosnt(n - 1) * cosnt(1) - cosnt(n - 2);
+            sinnt(n) = 2.0 * sinnt(n - 1) * cosnt(1) - sinnt(n - 2);
+        }
+        rout.resize(N);
+        int n = 0;
+        for (int l = 0; l < lmax + 1; l++) {
+            for (int m = -l; m < 0; m++) {
+                rout(n) = cosnt(-m) * rin(n) - sinnt(-m) * rin(l * l + l - m);
+                n++;
+            }
+            for (int m = 0; m < l + 1; m++) {
+                rout(n) = cosnt(m) * rin(n) + sinnt(m) * rin(l * l + l - m);
+                n++;
+            }
+        }
+    }
+
+    /**
+    Right-multiply each row `i` of the matrix `rows` by the full rotation
+    matrix R(theta_i), given vectors of `costheta` and `sintheta`. As in
+    the batched `rotate`, the transforms into and out of the `zeta` frame
+    are applied to all rows at once.
+
+    */
+    template <class MapType>
+    inline void Wigner<MapType>::rotateRows(const Vector<typename MapType::Scalar>& costheta,
+                                            const Vector<typename MapType::Scalar>& sintheta,
+                                            Matrix<typename MapType::Scalar>& rows) {
+
+        const int nrows = rows.rows();
+        if ((costheta.size() != nrows) || (sintheta.size() != nrows))
+            throw errors::ValueError("Mismatch in argument dimensions.");
+
+        // Compute cos(n theta) and sin(n theta) for all angles
+        cosnt_batch.resize(max(2, lmax + 1), nrows);
+        sinnt_batch.resize(max(2, lmax + 1), nrows);
+        cosnt_batch.row(0).setOnes();
+        sinnt_batch.row(0).setZero();
+        cosnt_batch.row(1) = costheta.transpose();
+        sinnt_batch.row(1) = sintheta.transpose();
+        for (int n = 2; n < lmax + 1; n++) {
+            cosnt_batch.row(n) = 2.0 * cosnt_batch.row(n - 1).cwiseProduct(cosnt_batch.row(1)) -
+                                 cosnt_batch.row(n - 2);
+            sinnt_batch.row(n) = 2.0 * sinnt_batch.row(n - 1).cwiseProduct(cosnt_batch.row(1)) -
+                                 sinnt_batch.row(n - 2);
+        }
+
+        // R = RZetaInv . Rz . RZeta, applied from the right
+        Matrix<T> U, V;
+        for (int l = 0; l < lmax + 1; l++) {
+            U = rows.block(0, l * l, nrows, 2 * l + 1) * RZetaInv[l];
+            V.resize(nrows, 2 * l + 1);
+            for (int m = -l; m < 0; m++) {
+                V.col(l + m) = U.col(l + m).cwiseProduct(cosnt_batch.row(-m).transpose()) -
+                               U.col(l - m).cwiseProduct(sinnt_batch.row(-m).transpose());
+            }
+            for (int m = 0; m < l + 1; m++) {
+                V.col(l + m) = U.col(l + m).cwiseProduct(cosnt_batch.row(m).transpose()) +
+                               U.col(l - m).cwiseProduct(sinnt_batch.row(m).transpose());
+            }
+            rows.block(0, l * l, nrows, 2 * l + 1) = V * RZeta[l];
+        }
+
+    }
+
     /**
     Explicitly compute the full rotation matrix and its derivative.
     The full rotation matrix is
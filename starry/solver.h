@@ -698,6 +698,24 @@ namespace solver {
         }
     }
 
+    /**
+    Is the solution vector ill-conditioned at this `b` and `r`?
+    The small rounding errors in `s^T` are amplified by the large
+    coefficients of high degree maps in the Green's basis. For
+    occultors with `0.35 < r < 1.3` whose center is less than
+    `0.8` from the center of the occulted body, these errors grow
+    geometrically with the degree of the map (up to ~1e-4 at
+    `l = 15` and ~1 at `l = 20` in double precision); everywhere
+    else, they don't. Since only the rate of growth depends on the
+    degree, this is the region to recompute for all maps.
+
+    */
+    template <class T>
+    inline bool unstable(const T& b, const T& r) {
+        return (r > STARRY_ESCALATE_RMIN) && (r < STARRY_ESCALATE_RMAX) &&
+               (b < STARRY_ESCALATE_BMAX);
+    }
+
     /**
     Greens integration housekeeping data
 
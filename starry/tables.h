@@ -8,6 +8,7 @@ using good old template metaprogramming (>= C++14)
 #define _STARRY_TABLES_H_
 
 #include <cmath>
+#include <vector>
 #include <boost/math/special_functions/factorials.hpp>
 #include <boost/math/special_functions/gamma.hpp>
 #include "errors.h"
@@ -793,6 +794,87 @@ namespace tables {
         }
     }
 
+#ifdef STARRY_QUAD
+    /**
+    Tabulate `f(n)` at quadruple precision for `nmin <= n <= nmax`.
+    The values are computed at multi-precision and rounded, since
+    the double precision tables above are not accurate enough.
+
+    */
+    template <class F>
+    inline std::vector<Quad> tabulate_quad(F f, int nmin, int nmax) {
+        std::vector<Quad> table(nmax - nmin + 1);
+        for (int n = nmin; n <= nmax; ++n)
+            table[n - nmin] = Quad(f(n));
+        return table;
+    }
+
+    /**
+    Square root of n (quadruple precision)
+
+    */
+    template <>
+    inline Quad sqrt_int(int n) {
+        static const std::vector<Quad> table =
+            tabulate_quad(sqrt_int<Multi>, 0, MAXSQRT);
+        if ((n < 0) || (n > MAXSQRT))
+            return Quad(sqrt_int<Multi>(n));
+        return table[n];
+    }
+
+    /**
+    One over the square root of n (quadruple precision)
+
+    */
+    template <>
+    inline Quad invsqrt_int(int n) {
+        static const std::vector<Quad> table =
+            tabulate_quad(invsqrt_int<Multi>, 1, MAXSQRT);
+        if ((n < 1) || (n > MAXSQRT))
+            return Quad(invsqrt_int<Multi>(n));
+        return table[n - 1];
+    }
+
+    /**
+    Factorial of n (quadruple precision)
+
+    */
+    template <>
+    inline Quad factorial(int n) {
+        static const std::vector<Quad> table =
+            tabulate_quad(factorial<Multi>, 0, MAXFACT);
+        if ((n < 0) || (n > MAXFACT))
+            return Quad(factorial<Multi>(n));
+        return table[n];
+    }
+
+    /**
+    Double factorial of n (quadruple precision)
+
+    */
+    template <>
+    inline Quad double_factorial(int n) {
+        static const std::vector<Quad> table =
+            tabulate_quad(double_factorial<Multi>, 0, MAXDOUBLEFACT);
+        if ((n < 0) || (n > MAXDOUBLEFACT))
+            return Quad(double_factorial<Multi>(n));
+        return table[n];
+    }
+
+    /**
+    Factorial of n / 2 (quadruple precision)
+
+    */
+    template <>
+    inline Quad half_factorial(int n) {
+        static const std::vector<Quad> table =
+            tabulate_quad(half_factorial<Multi>, -MAXFACT, MAXFACT);
+        if ((n < -MAXFACT) || (n > MAXFACT))
+            return Quad(half_factorial<Multi>(n));
+        return table[n + MAXFACT];
+    }
+#endif
+
     /**
     Binomial coefficient, n choose k
 
@@ -14,6 +14,9 @@ Miscellaneous stuff used throughout the code.
 #include <limits>
 #include <type_traits>
 #include "errors.h"
+#ifdef STARRY_QUAD
+#include "quad.h"
+#endif
 
 namespace starry {
 
@@ -46,6 +49,55 @@ namespace starry {
 #define STARRY_KEPLER_TOL                       1e-12
 #endif
     
+//! Number of intervals per exposure in the search for contact points
+#ifndef STARRY_CONTACT_GRID
+#define STARRY_CONTACT_GRID                     8
+#endif
+
+//! Max iterations in the refinement of the contact points
+#ifndef STARRY_CONTACT_MAX_ITER
+#define STARRY_CONTACT_MAX_ITER                 100
+#endif
+
+//! Max recursion depth of the phase-folded light curve interpolant
+#ifndef STARRY_FOLD_MAX_DEPTH
+#define STARRY_FOLD_MAX_DEPTH                   30
+#endif
+
+//! Step of the finite-difference cross derivatives in the
+//! tabulated solvers, in units of the grid spacing
+#ifndef STARRY_TABLE_DELTA
+#define STARRY_TABLE_DELTA                      1e-3
+#endif
+
+//! Smallest number of samples per thread in multi-threaded map evaluations
+#ifndef STARRY_MIN_THREAD_CHUNK
+#define STARRY_MIN_THREAD_CHUNK                 32
+#endif
+
+//! Number of angles per batch in the batched map rotation
+#ifndef STARRY_ROTATION_BATCH
+#define STARRY_ROTATION_BATCH                   1024
+#endif
+
+//! Recompute the solution vector in multiprecision (if enabled) when
+//! STARRY_ESCALATE_RMIN < r < STARRY_ESCALATE_RMAX and b < STARRY_ESCALATE_BMAX
+#ifndef STARRY_ESCALATE_RMIN
+#define STARRY_ESCALATE_RMIN                    0.35
+#endif
+
+//! Recompute the solution vector in multiprecision (if enabled) when
+//! STARRY_ESCALATE_RMIN < r < STARRY_ESCALATE_RMAX and b < STARRY_ESCALATE_BMAX
+#ifndef STARRY_ESCALATE_RMAX
+#define STARRY_ESCALATE_RMAX                    1.3
+#endif
+
+//! Recompute the solution vector in multiprecision (if enabled) when
+//! STARRY_ESCALATE_RMIN < r < STARRY_ESCALATE_RMAX and b < STARRY_ESCALATE_BMAX
+#ifndef STARRY_ESCALATE_BMAX
+#define STARRY_ESCALATE_BMAX                    0.8
+#endif
+
 //! Re-parameterize solution vector when
 //! abs(b - r) < STARRY_EPS_BMR_ZERO
 #ifndef STARRY_EPS_BMR_ZERO
@@ -88,6 +140,11 @@ namespace utils {
     //! Multiprecision datatype
     typedef boost::multiprecision::number<mp_backend, boost::multiprecision::et_off> Multi;
 
+#ifdef STARRY_QUAD
+    //! Quadruple precision datatype
+    using quad::Quad;
+#endif
+
     //! A generic row vector
     template <typename T>
     using Vector = Eigen::Matrix<T, Eigen::Dynamic, 1>;
@@ -122,9 +179,14 @@ namespace utils {
 
     //! @private
     template <class T> inline Eigen::AutoDiffScalar<T> pi(tag<Eigen::AutoDiffScalar<T>>) {
-        return boost::math::constants::pi<typename T::Scalar>();
+        return pi(tag<typename T::Scalar>());
     }
 
+#ifdef STARRY_QUAD
+    //! @private
+    inline Quad pi(tag<Quad>) { return Quad(pi(tag<Multi>())); }
+#endif
+
     //! Pi for current type
     template <class T> inline T pi() { return pi(tag<T>()); }
 
@@ -133,9 +195,14 @@ namespace utils {
 
     //! @private
     template <class T> inline Eigen::AutoDiffScalar<T> root_pi(tag<Eigen::AutoDiffScalar<T>>) {
-        return boost::math::constants::root_pi<typename T::Scalar>();
+        return root_pi(tag<typename T::Scalar>());
     }
 
+#ifdef STARRY_QUAD
+    //! @private
+    inline Quad root_pi(tag<Quad>) { return Quad(root_pi(tag<Multi>())); }
+#endif
+
     //! Square root of pi for current type
     template <class T> inline T root_pi() { return root_pi(tag<T>()); }
 
@@ -165,6 +232,13 @@ namespace utils {
         return std::to_string(STARRY_NMULTI) + " digits";
     }
 
+#ifdef STARRY_QUAD
+    //! @private
+    template<> inline std::string precision(tag<Quad>) {
+        return "quad";
+    }
+#endif
+
     //! Scalar type precision descriptor
     template<class T> inline std::string precision() { return precision(tag<T>()); }
 
@@ -179,6 +253,28 @@ namespace utils {
         return true;
     }
 
+    //! @private
+    template<class T> inline bool isQuad(const T& scalar) {
+        return false;
+    }
+
+#ifdef STARRY_QUAD
+    //! @private
+    template<> inline bool isQuad(const Quad& scalar) {
+        return true;
+    }
+#endif
+
+    //! The value of the `multi` keyword for a scalar type
+    template<class T> inline std::string multiName() {
+        if (isQuad(T(0.)))
+            return "'quad'";
+        else if (isMulti(T(0.)))
+            return "True";
+        else
+            return "False";
+    }
+
     // --------------------------
     // ------ Unit Vectors ------
     // --------------------------
@@ -0,0 +1,95 @@
+"""Test the change of basis matrices shared between maps."""
+import starry
+from starry.kepler import Secondary
+import numpy as np
+import tempfile
+import shutil
+import os
+
+
+def test_basis_cache():
+    """Maps of the same degree share a single basis."""
+    lmax = 11
+    info0 = starry._starry_mono_64.cache_info()
+    map = starry.Map(lmax)
+    info1 = starry._starry_mono_64.cache_info()
+    assert info1["misses"] == info0["misses"] + 1
+    assert info1["entries"] == info0["entries"] + 1
+    assert info1["bytes"] > info0["bytes"]
+
+    # More maps (and bodies) of the same degree hit the cache
+    maps = [starry.Map(lmax) for i in range(5)]
+    planet = Secondary(lmax)
+    info2 = starry._starry_mono_64.cache_info()
+    assert info2["misses"] == info1["misses"]
+    assert info2["hits"] >= info1["hits"] + 6
+    assert info2["entries"] == info1["entries"]
+    assert info2["bytes"] == info1["bytes"]
+
+    # The shared basis gives the same results
+    for m in maps + [map, planet]:
+        m[1, 0] = 0.5
+        m[2, 1] = -0.2
+    flux = map.flux(theta=30, xo=0.3, yo=0.2, ro=0.1)
+    for m in maps + [planet]:
+        assert m.flux(theta=30, xo=0.3, yo=0.2, ro=0.1) == flux
+
+    # The basis is freed with the last map using it
+    del map, maps, planet, m
+    info3 = starry._starry_mono_64.cache_info()
+    assert info3["entries"] == info0["entries"]
+    assert info3["bytes"] == info0["bytes"]
+
+    # Each module keeps its own cache
+    assert set(starry.cache_info().keys()) >= \
+        set(["mono_64", "mono_128", "spectral_64", "spectral_128"])
+
+
+def test_basis_cache_disk():
+    """Test saving and loading the bases to and from disk."""
+    path = tempfile.mkdtemp()
+    os.environ["STARRY_CACHE_DIR"] = path
+    try:
+        for multi in [False, True]:
+            module = starry._module(1, multi)
+            lmax = 5 if multi else 12
+            info0 = module.cache_info()
+
+            # The first map computes the basis and saves it
+            map = starry.Map(lmax, multi=multi)
+            map[1, 0] = 0.5
+            map[2, 1] = -0.2
+            flux = map.flux(theta=30, xo=0.3, yo=0.2, ro=0.1)
+            del map
+            files = [f for f in os.listdir(path)
+                     if ("_l%d_" % lmax) in f]
+            assert len(files) == 1
+            assert module.cache_info()["loads"] == info0["loads"]
+
+            # The next one loads it
+            map = starry.Map(lmax, multi=multi)
+            map[1, 0] = 0.5
+            map[2, 1] = -0.2
+            assert map.flux(theta=30, xo=0.3, yo=0.2, ro=0.1) == flux
+            assert module.cache_info()["loads"] == info0["loads"] + 1
+            del map
+
+            # An invalid file is ignored and overwritten
+            file = os.path.join(path, files[0])
+            with open(file, "wb") as f:
+                f.write(b"STARRYBS")
+            map = starry.Map(lmax, multi=multi)
+            map[1, 0] = 0.5
+            map[2, 1] = -0.2
+            assert map.flux(theta=30, xo=0.3, yo=0.2, ro=0.1) == flux
+            assert module.cache_info()["loads"] == info0["loads"] + 1
+            assert os.path.getsize(file) > 8
+            del map
+    finally:
+        del os.environ["STARRY_CACHE_DIR"]
+        shutil.rmtree(path)
+
+
+if __name__ == "__main__":
+    test_basis_cache()
+    test_basis_cache_disk()
@@ -0,0 +1,75 @@
+"""Test the light curves of many parameter sets."""
+from starry.kepler import Primary, Secondary, System
+import numpy as np
+import pytest
+np.random.seed(42)
+
+
+def make_system():
+    """A limb-darkened star and a planet with a dipole map."""
+    star = Primary()
+    star[1] = 0.4
+    star[2] = 0.26
+    planet = Secondary(lmax=1)
+    planet.lambda0 = 270
+    planet.r = 0.0916
+    planet.L = 5e-3
+    planet.inc = 87
+    planet.a = 11.12799
+    planet.prot = 4.3
+    planet.porb = 4.3
+    planet.tref = 2.0
+    planet[1, :] = [0.1, 0.2, 0.3]
+    return System(star, planet)
+
+
+def test_compute_batch():
+    """Compare to the light curves computed one at a time."""
+    system = make_system()
+    star = system.primary
+    planet = system.secondaries[0]
+    time = np.linspace(1.5, 6.5, 500)
+    system.compute(time)
+    flux0 = np.array(system.lightcurve)
+
+    # Vary the orbit, the limb darkening and the planet map
+    names = ["b.r", "b.inc", "A.u1", "b.Y_{1,-1}", "b.Y_{1,0}", "b.Y_{1,1}"]
+    nsets = 8
+    params = np.zeros((nsets, len(names)))
+    params[:, 0] = 0.0916 + 0.01 * np.random.randn(nsets)
+    params[:, 1] = 87 + 0.5 * np.random.randn(nsets)
+    params[:, 2] = 0.4 + 0.05 * np.random.randn(nsets)
+    params[:, 3:] = np.random.randn(nsets, 3)
+    for threads in [1, 3]:
+        flux = system.compute_batch(time, params, names, threads=threads)
+        assert flux.shape == (nsets, len(time))
+        for k in range(nsets):
+            system2 = make_system()
+            system2.secondaries[0].r = params[k, 0]
+            system2.secondaries[0].inc = params[k, 1]
+            system2.primary[1] = params[k, 2]
+            system2.secondaries[0][1, :] = params[k, 3:]
+            system2.compute(time)
+            assert np.allclose(flux[k], system2.lightcurve,
+                               atol=1e-12, rtol=0)
+
+    # The system itself is untouched
+    assert planet.r == 0.0916
+    assert star[1] == 0.4
+    assert np.array_equal(system.lightcurve, flux0)
+
+
+def test_compute_batch_errors():
+    """Test invalid parameter names and shapes."""
+    system = make_system()
+    time = np.linspace(1.5, 6.5, 10)
+    for name in ["b.foo", "c.r", "A.r", "r", "b.Y_{1,0"]:
+        with pytest.raises(RuntimeError):
+            system.compute_batch(time, [[0.1]], [name])
+    with pytest.raises(RuntimeError):
+        system.compute_batch(time, [[0.1, 0.2]], ["b.r"])
+
+
+if __name__ == "__main__":
+    test_compute_batch()
+    test_compute_batch_errors()
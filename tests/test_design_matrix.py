@@ -0,0 +1,131 @@
+"""Test the design matrix of the flux."""
+import starry
+import numpy as np
+import pytest
+np.random.seed(42)
+
+
+def run_map(nwav=1, multi=False):
+    """Compare the design matrix to the flux of a map."""
+    map = starry.Map(4, nwav=nwav, multi=multi)
+    map.axis = [1, 2, 3]
+    for l in range(1, 5):
+        for m in range(-l, l + 1):
+            map[l, m] = np.random.randn() * np.ones(nwav) / l ** 2
+
+    # A light curve with and without occultations,
+    # including a complete occultation
+    npts = 100
+    theta = np.linspace(0, 360, npts)
+    xo = np.linspace(-1.5, 1.5, npts)
+    yo = np.linspace(-0.3, 0.3, npts)
+    ro = np.linspace(0.1, 1.5, npts)
+    X = map.design_matrix(theta=theta, xo=xo, yo=yo, ro=ro)
+    assert X.shape == (npts, map.N)
+    flux = map.flux(theta=theta, xo=xo, yo=yo, ro=ro)
+    assert np.allclose(X.dot(map.y).reshape(flux.shape), flux)
+
+    # Scalar arguments are broadcast
+    X = map.design_matrix(theta=30)
+    assert X.shape == (1, map.N)
+    assert np.allclose(X.dot(map.y), map.flux(theta=30))
+
+
+def test_design_matrix_map():
+    """Test the design matrix of a map."""
+    run_map()
+    run_map(multi=True)
+    run_map(nwav=2)
+
+
+def test_design_matrix_ld():
+    """Test that limb-darkened maps raise an error."""
+    map = starry.Map(2)
+    map[1] = 0.4
+    with pytest.raises(RuntimeError):
+        map.design_matrix(theta=0, xo=0.5, ro=0.1)
+
+
+def test_flux_batch():
+    """Test the light curves of many maps with the same geometry."""
+    map = starry.Map(3)
+    map.axis = [1, 2, 3]
+    npts = 100
+    theta = np.linspace(0, 360, npts)
+    xo = np.linspace(-1.5, 1.5, npts)
+    yo = np.linspace(-0.3, 0.3, npts)
+    ro = np.linspace(0.1, 1.5, npts)
+    Y = np.random.randn(map.N, 5)
+    flux = map.flux_batch(Y, theta=theta, xo=xo, yo=yo, ro=ro)
+    assert flux.shape == (npts, 5)
+    for k in range(5):
+        map[:, :] = Y[:, k]
+        assert np.allclose(flux[:, k],
+                           map.flux(theta=theta, xo=xo, yo=yo, ro=ro))
+
+    # Coefficient matrices of the wrong shape
+    with pytest.raises(RuntimeError):
+        map.flux_batch(np.ones((map.N + 1, 5)), theta=theta)
+
+    # Limb-darkened maps
+    map.reset()
+    map[1] = 0.4
+    with pytest.raises(RuntimeError):
+        map.flux_batch(Y, theta=theta, xo=xo, yo=yo, ro=ro)
+
+
+def test_design_matrix_system():
+    """Test the design matrix of the bodies in a system."""
+    # A spotted star and two spotted planets
+    star = starry.kepler.Primary(lmax=2)
+    star[1, 0] = 0.2
+    star[2, 1] = 0.1
+    star.axis = [0, 1, 0.5]
+    star.prot = 3.3
+    b = starry.kepler.Secondary(lmax=2)
+    b.r = 0.1
+    b.L = 1e-2
+    b.a = 30
+    b.porb = 1
+    b.prot = 1
+    b.inc = 89.8
+    b.Omega = 30
+    b.ecc = 0.1
+    b.w = 20
+    b[1, 0] = 0.5
+    b[2, -2] = 0.1
+    c = starry.kepler.Secondary(lmax=3)
+    c.r = 0.15
+    c.L = 5e-3
+    c.a = 35
+    c.porb = 1.1
+    c.prot = 0.5
+    c.inc = 89.9
+    c[1, 1] = 0.3
+    c[3, 0] = 0.1
+    system = starry.kepler.System(star, b, c)
+
+    # Primary and secondary eclipses of both planets
+    time = np.linspace(-0.55, 0.55, 1000)
+    system.compute(time)
+    for body in [star, b, c]:
+        X = system.design_matrix(time, body)
+        assert X.shape == (len(time), body.N)
+        assert np.allclose(body.L * X.dot(body.y), body.lightcurve)
+
+    # The positions from the last call to `compute` are untouched
+    XYZ = [np.array(getattr(body, q)) for body in [b, c] for q in "XYZ"]
+    system.design_matrix(time[::100], star)
+    assert np.array_equal(XYZ, [getattr(body, q)
+                                for body in [b, c] for q in "XYZ"])
+
+    # Bodies that are not in the system
+    with pytest.raises(RuntimeError):
+        system.design_matrix(time, starry.kepler.Secondary())
+
+
+if __name__ == "__main__":
+    test_design_matrix_map()
+    test_design_matrix_ld()
+    test_flux_batch()
+    test_design_matrix_system()
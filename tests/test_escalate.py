@@ -0,0 +1,117 @@
+"""Test the automatic precision escalation of the occultation flux."""
+import starry
+from starry.kepler import Primary, Secondary, System
+import numpy as np
+import pytest
+
+
+def run_escalate(lmax):
+    """Compare to the multiprecision flux over the whole (b, r) plane."""
+    map = starry.Map(lmax)
+    map_multi = starry.Map(lmax, multi=True)
+    map[:, :] = 1
+    map_multi[:, :] = 1
+
+    # A dense grid that crosses the boundaries of the unstable region
+    # in both b and r. The small offset keeps us off the singular
+    # points b = r and b + r = 1.
+    ro, xo = np.meshgrid(np.linspace(0.2, 1.5, 36),
+                         np.linspace(0, 1.3, 36) + 1e-3)
+    ro = ro.flatten()
+    xo = xo.flatten()
+    occulted = (xo > ro - 1) & (xo < 1 + ro)
+    ro = ro[occulted]
+    xo = xo[occulted]
+    flux = map.flux(xo=xo, yo=0, ro=ro)
+    flux_multi = map_multi.flux(xo=xo, yo=0, ro=ro)
+    assert not map.escalate
+    map.escalate = True
+    flux_esc = map.flux(xo=xo, yo=0, ro=ro)
+
+    # The double precision error is much larger than that of
+    # small occultors somewhere in the plane; the escalated error is
+    # not larger than that anywhere
+    err = np.abs(flux - flux_multi)
+    err_esc = np.abs(flux_esc - flux_multi)
+    stable = ro < 0.3
+    err_stable = np.max(err[stable])
+    assert np.max(err) > 1e3 * err_stable
+    assert np.max(err_esc) < 2 * err_stable
+
+    # Nothing changes far from the unstable region
+    far = (ro < 0.3) | (ro > 1.4) | (xo > 0.9)
+    assert np.array_equal(flux_esc[far], flux[far])
+
+    return xo, ro, flux_multi, err_stable
+
+
+def test_escalate():
+    """Test the escalation at l = 15 and l = 20."""
+    run_escalate(20)
+    xo, ro, flux_multi, err_stable = run_escalate(15)
+
+    # The flag is copied to the secondary's sky map
+    planet = Secondary(15)
+    planet[:, :] = 1
+    planet.escalate = True
+    assert planet.escalate
+    assert np.allclose(planet.flux(xo=xo, yo=0, ro=ro), flux_multi,
+                       atol=2 * err_stable, rtol=0)
+
+
+def make_system(escalate):
+    """A high degree star transited by a large planet."""
+    star = Primary(15)
+    star[:, :] = 1
+    star.escalate = escalate
+    planet = Secondary()
+    planet.r = 0.9
+    planet.a = 20
+    planet.inc = 90
+    return System(star, planet)
+
+
+def test_escalate_system():
+    """Toggling the escalation invalidates the cached light curve."""
+    time = np.linspace(-0.05, 0.05, 50)
+    system = make_system(False)
+    system.compute(time)
+    flux = np.array(system.lightcurve)
+    for escalate in [True, False]:
+        system.primary.escalate = escalate
+        system.compute(time)
+        system0 = make_system(escalate)
+        system0.compute(time)
+        assert np.allclose(system.lightcurve, system0.lightcurve,
+                           atol=1e-10, rtol=0)
+        diff = np.max(np.abs(system.lightcurve - flux))
+        if escalate:
+            assert diff > 1e-6
+        else:
+            assert diff < 1e-10
+
+
+def test_escalate_singular():
+    """Fall back to double precision where the multiprecision solver fails."""
+    map = starry.Map(5)
+    map[:, :] = 1
+    flux = map.flux(xo=0.4, yo=0, ro=0.6)
+    map.escalate = True
+    assert np.isfinite(map.flux(xo=0.4, yo=0, ro=0.6))
+    assert np.allclose(map.flux(xo=0.4, yo=0, ro=0.6), flux,
+                       atol=1e-12, rtol=0)
+
+
+def test_escalate_errors():
+    """Escalation is only available for double precision maps."""
+    map = starry.Map(2, multi=True)
+    with pytest.raises(RuntimeError):
+        map.escalate = True
+    map.escalate = False
+
+
+if __name__ == "__main__":
+    test_escalate()
+    test_escalate_system()
+    test_escalate_singular()
+    test_escalate_errors()
@@ -0,0 +1,78 @@
+"""Test the event-driven occultation windowing in `System.compute`."""
+from starry.kepler import Primary, Secondary, System
+import numpy as np
+
+
+def run(nwav=1, multi=False):
+    """Compare the windowed light curve to the step-by-step one."""
+    if nwav == 1:
+        coeff = lambda c: c
+    else:
+        coeff = lambda c: c * np.ones(nwav)
+    star = Primary(nwav=nwav, multi=multi)
+    star[1] = coeff(0.4)
+    star[2] = coeff(0.26)
+    b = Secondary(nwav=nwav, multi=multi)
+    b.r = 0.1
+    b.L = coeff(1e-2)
+    b.a = 20
+    b.porb = 1
+    b.prot = 1
+    b.inc = 89.5
+    b[1, 0] = coeff(0.5)
+    b[1] = coeff(0.3)
+    c = Secondary(nwav=nwav, multi=multi)
+    c.r = 0.15
+    c.L = coeff(5e-3)
+    c.a = 21
+    c.porb = 1.07
+    c.prot = 0.5
+    c.inc = 89.7
+    c[1, 1] = coeff(0.3)
+    d = Secondary(nwav=nwav, multi=multi)
+    d.r = 0.05
+    d.L = coeff(0)
+    d.a = 40
+    d.porb = 3
+    d.inc = 88
+    system = System(star, b, c, d)
+
+    # Transits, secondary eclipses, mutual occultations
+    # and plenty of time out of eclipse
+    time = np.linspace(-2, 2, 4001)
+    system.compute(time)
+    lightcurve = np.array(system.lightcurve)
+    lightcurves = [np.array(body.lightcurve) for body in [star, b, c, d]]
+
+    # Computing the gradient forces a step-by-step evaluation
+    if nwav == 1:
+        system.compute(time, gradient=True)
+        assert np.allclose(lightcurve, system.lightcurve,
+                           atol=1e-12, rtol=0)
+        for lc, body in zip(lightcurves, [star, b, c, d]):
+            assert np.allclose(lc, body.lightcurve, atol=1e-12, rtol=0)
+
+    return lightcurve
+
+
+def test_events():
+    """Test the occultation windowing [double]."""
+    run()
+
+
+def test_events_multi():
+    """Test the occultation windowing [multi]."""
+    run(multi=True)
+
+
+def test_events_spectral():
+    """Test the occultation windowing [spectral]."""
+    lightcurve = run()
+    for col in run(nwav=2).T:
+        assert np.allclose(col, lightcurve.reshape(-1), atol=1e-12, rtol=0)
+
+
+if __name__ == "__main__":
+    test_events()
+    test_events_multi()
+    test_events_spectral()
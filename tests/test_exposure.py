@@ -1,6 +1,7 @@
 """Test exposure time integration."""
 import starry
 import numpy as np
+import pytest
 
 
 def moving_average(a, n):
@@ -52,5 +53,207 @@ def test_exposure():
     assert np.all(np.abs(dFdt_exp - dFdt_num[::thin]) < 1e-3)
 
 
+def test_contiguous():
+    """Test the reuse of the flux at the edges of contiguous exposures."""
+    star = starry.kepler.Primary()
+    star[1] = 0.4
+    star[2] = 0.26
+    b = starry.kepler.Secondary()
+    b.r = 0.1
+    b.L = 1e-3
+    b.a = 20
+    b.porb = 1
+    b[1, 0] = 0.5
+    c = starry.kepler.Secondary()
+    c.r = 0.05
+    c.a = 30
+    c.porb = 2
+    c.inc = 89.8
+    system = starry.kepler.System(star, b, c)
+
+    # Back-to-back cadences, plus a gap
+    time = np.append(np.linspace(-0.05, 0.05, 51), np.linspace(0.1, 0.2, 11))
+    system.exposure_time = 0.002
+    for gradient in [False, True]:
+        system.compute(time, gradient=gradient)
+        flux = np.array(system.lightcurve)
+        if gradient:
+            grad = dict(system.gradient)
+
+        # Computing one cadence at a time never reuses the edges
+        for i, t in enumerate(time):
+            system.compute([t], gradient=gradient)
+            assert np.allclose(system.lightcurve, flux[i], atol=1e-12, rtol=0)
+            if gradient:
+                for key, value in system.gradient.items():
+                    assert np.allclose(value, grad[key][..., i:i + 1],
+                                       atol=1e-10, rtol=0), key
+
+
+def test_exposure_modes():
+    """Test the fixed-order exposure time integration schemes."""
+    star = starry.kepler.Primary()
+    star[1] = 0.4
+    star[2] = 0.26
+    b = starry.kepler.Secondary()
+    b.r = 0.1
+    b.L = 1e-3
+    b.a = 20
+    b.porb = 1
+    b[1, 0] = 0.5
+    c = starry.kepler.Secondary()
+    c.r = 0.05
+    c.L = 1e-4
+    c.a = 21
+    c.porb = 1.1
+    c.inc = 89.8
+    system = starry.kepler.System(star, b, c)
+    time = np.linspace(-0.05, 0.05, 300)
+    system.exposure_time = 0.005
+
+    # Benchmark: the adaptive scheme at high resolution
+    system.exposure_tol = 1e-12
+    system.exposure_max_depth = 12
+    system.compute(time)
+    flux = np.array(system.lightcurve)
+
+    # Gauss-Legendre quadrature w/ many points. Note that the
+    # integrand is not smooth at the contact points, so neither
+    # scheme converges very fast
+    system.exposure_mode = "gauss"
+    system.exposure_order = 50
+    system.compute(time)
+    assert np.allclose(system.lightcurve, flux, atol=1e-6, rtol=0)
+
+    # Supersampling
+    system.exposure_mode = "supersample"
+    system.exposure_order = 200
+    system.compute(time)
+    assert np.allclose(system.lightcurve, flux, atol=1e-6, rtol=0)
+
+    # The vectorized and the step-by-step evaluations agree
+    for mode in ["gauss", "supersample"]:
+        system.exposure_mode = mode
+        system.exposure_order = 7
+        system.compute(time)
+        flux = np.array(system.lightcurve)
+        X = np.array(b.X)
+        system.compute(time, gradient=True)
+        assert np.allclose(system.lightcurve, flux, atol=1e-12, rtol=0)
+        assert np.allclose(b.X, X)
+
+    # Invalid settings
+    with pytest.raises(RuntimeError):
+        system.exposure_mode = "trapezoid"
+    with pytest.raises(RuntimeError):
+        system.exposure_order = 0
+
+
+def test_contact_mode():
+    """Test the contact-point-aware exposure time integration."""
+    star = starry.kepler.Primary()
+    star[1] = 0.4
+    star[2] = 0.26
+    b = starry.kepler.Secondary()
+    b.r = 0.1
+    b.L = 1e-3
+    b.a = 20
+    b.porb = 1
+    b[1, 0] = 0.5
+    c = starry.kepler.Secondary()
+    c.r = 0.05
+    c.L = 1e-4
+    c.a = 21
+    c.porb = 1.1
+    c.inc = 89.8
+    system = starry.kepler.System(star, b, c)
+    time = np.linspace(-0.05, 0.05, 300)
+    system.exposure_time = 0.005
+
+    # Benchmark: Gauss-Legendre w/ lots of points
+    system.exposure_mode = "gauss"
+    system.exposure_order = 2000
+    system.compute(time)
+    flux = np.array(system.lightcurve)
+
+    # Splitting the exposures at the contact points is
+    # far more accurate for the same number of points
+    system.exposure_order = 5
+    system.compute(time)
+    error_gauss = np.max(np.abs(system.lightcurve - flux))
+    system.exposure_mode = "contact"
+    system.compute(time)
+    error_contact = np.max(np.abs(system.lightcurve - flux))
+    assert error_contact < 1e-6
+    assert error_contact < 1e-2 * error_gauss
+
+    # The vectorized and the step-by-step evaluations agree
+    flux = np.array(system.lightcurve)
+    system.compute(time, gradient=True)
+    assert np.allclose(system.lightcurve, flux, atol=1e-12, rtol=0)
+
+
+def test_mixed_cadence():
+    """Test per-point exposure times."""
+    star = starry.kepler.Primary()
+    star[1] = 0.4
+    star[2] = 0.26
+    b = starry.kepler.Secondary()
+    b.r = 0.1
+    b.L = 1e-3
+    b.a = 20
+    b.porb = 1
+    b[1, 0] = 0.5
+    system = starry.kepler.System(star, b)
+
+    # Stitched 30-min, 2-min, 20-s and instantaneous data
+    exptimes = [30 / 1440, 2 / 1440, 20 / 86400, 0]
+    times = [np.linspace(-0.1, 0.1, 15), np.linspace(-0.05, 0.05, 20),
+             np.linspace(-0.03, 0.03, 25), np.linspace(-0.01, 0.01, 5)]
+    time = np.concatenate(times)
+    exptime = np.concatenate([np.ones_like(t) * e
+                              for t, e in zip(times, exptimes)])
+
+    for mode in ["adaptive", "gauss"]:
+        system.exposure_mode = mode
+        for gradient in [False, True]:
+            system.compute(time, gradient=gradient, exposure_time=exptime)
+            flux = np.array(system.lightcurve)
+            if gradient:
+                dfdt = np.array(system.gradient["time"])
+
+            # Compare to one call per cadence
+            i = 0
+            for t, e in zip(times, exptimes):
+                system.exposure_time = e
+                system.compute(t, gradient=gradient)
+                assert np.allclose(system.lightcurve, flux[i:i + len(t)],
+                                   atol=1e-12, rtol=0)
+                if gradient:
+                    assert np.allclose(system.gradient["time"],
+                                       dfdt[i:i + len(t)],
+                                       atol=1e-10, rtol=0)
+                i += len(t)
+            system.exposure_time = 0
+
+    # A scalar is broadcast to the whole time array
+    system.exposure_time = 0.01
+    system.compute(time)
+    flux = np.array(system.lightcurve)
+    system.exposure_time = 0
+    system.compute(time, exposure_time=0.01)
+    assert np.allclose(system.lightcurve, flux)
+
+    # Invalid exposure times
+    with pytest.raises(ValueError):
+        system.compute(time, exposure_time=np.ones(3))
+    with pytest.raises(RuntimeError):
+        system.compute(time, exposure_time=-exptime)
+
+
 if __name__ == "__main__":
     test_exposure()
+    test_contiguous()
+    test_exposure_modes()
+    test_contact_mode()
+    test_mixed_cadence()
@@ -135,6 +135,45 @@ def test_ld_flux_with_gradients_multi():
         run_flux(multi=True, case=case)
 
 
+def test_ld_flux_gradient_normalization():
+    """Test the limb darkening gradient for Y_{0,0} != 1."""
+    lmax = 4
+    eps = 1e-7
+    for nwav in [1, 2]:
+        # A cubic+ limb darkening law with a different
+        # normalization at each wavelength
+        if nwav == 1:
+            y00 = 2.0
+            u = [0.4, 0.26, 0.1, 0.02]
+        else:
+            y00 = np.array([2.0, 0.5])
+            u = [np.array([0.4, 0.3]), np.array([0.26, 0.1]),
+                 np.array([0.1, -0.05]), np.array([0.02, 0.01])]
+        map = starry.Map(lmax, nwav=nwav)
+        map[0, 0] = y00
+        for l in range(1, lmax + 1):
+            map[l] = u[l - 1]
+        args = dict(xo=0.3, yo=0.2, ro=0.4)
+        F, grad = map.flux(gradient=True, **args)
+
+        # Occultor position & radius
+        for key in ["xo", "yo", "ro"]:
+            args_eps = dict(args)
+            args_eps[key] += eps
+            dF = (map.flux(**args_eps) - F) / eps
+            assert np.allclose(np.ravel(grad[key]), np.ravel(dF),
+                               atol=1e-6), key
+
+        # Limb darkening coefficients
+        for l in range(1, lmax + 1):
+            map[l] = u[l - 1] + eps
+            dF = (map.flux(**args) - F) / eps
+            map[l] = u[l - 1]
+            assert np.allclose(np.ravel(grad["u"][l - 1]), np.ravel(dF),
+                               atol=1e-6), l
+
+
 if __name__ == "__main__":
     test_ld_flux_with_gradients_double()
     test_ld_flux_with_gradients_multi()
+    test_ld_flux_gradient_normalization()
@@ -0,0 +1,196 @@
+"""Test the reuse of the system geometry when only the maps change."""
+import starry
+import numpy as np
+
+
+def make_system(lmax=2, multi=False):
+    """A limb-darkened star and two spotted planets."""
+    star = starry.kepler.Primary(lmax=lmax, multi=multi)
+    star[1] = 0.4
+    star[2] = 0.26
+    b = starry.kepler.Secondary(lmax=lmax, multi=multi)
+    b.r = 0.1
+    b.L = 1e-2
+    b.a = 30
+    b.porb = 1
+    b.prot = 1
+    b.inc = 89.8
+    b.Omega = 30
+    b.ecc = 0.1
+    b.w = 20
+    b[1, 0] = 0.5
+    c = starry.kepler.Secondary(lmax=lmax, multi=multi)
+    c.r = 0.15
+    c.L = 5e-3
+    c.a = 31
+    c.porb = 1.03
+    c.prot = 0.5
+    c.inc = 89.9
+    c.Omega = 30
+    c.ecc = 0.1
+    c.w = 20
+    c[1, 1] = 0.3
+    return star, b, c
+
+
+def update_maps(star, b, c):
+    """Change only the map coefficients and luminosities."""
+    star[1] = 0.3
+    b[1, 0] = 0.2
+    b[2, -2] = 0.1
+    c[1, 1] = 0.1
+    c[2, 1] = 0.05
+    c.L = 8e-3
+
+
+def run(multi=False):
+    """Compare cached and fresh light curves."""
+    time = np.linspace(-0.55, 0.55, 500)
+    star, b, c = make_system(multi=multi)
+    system = starry.kepler.System(star, b, c)
+    system.compute(time)
+
+    # Change only the maps and compare to a fresh system
+    update_maps(star, b, c)
+    system.compute(time)
+    star0, b0, c0 = make_system(multi=multi)
+    update_maps(star0, b0, c0)
+    system0 = starry.kepler.System(star0, b0, c0)
+    system0.compute(time)
+    assert np.allclose(system.lightcurve, system0.lightcurve)
+    for body, body0 in zip([star, b, c], [star0, b0, c0]):
+        assert np.allclose(body.lightcurve, body0.lightcurve)
+
+    # The cached design matrix is reused on subsequent calls
+    b[1, 0] = 0.4
+    b0[1, 0] = 0.4
+    system.compute(time)
+    system0 = starry.kepler.System(star0, b0, c0)
+    system0.compute(time)
+    assert np.allclose(system.lightcurve, system0.lightcurve)
+
+    # Changing the orbit invalidates the cache
+    b.a = 25
+    b0.a = 25
+    system.compute(time)
+    system0 = starry.kepler.System(star0, b0, c0)
+    system0.compute(time)
+    assert np.allclose(system.lightcurve, system0.lightcurve)
+
+    # So does changing the time array
+    time = np.linspace(-0.5, 0.6, 400)
+    system.compute(time)
+    system0.compute(time)
+    assert np.allclose(system.lightcurve, system0.lightcurve)
+
+    # And computing the gradient ignores the cache
+    star[1] = 0.5
+    star0[1] = 0.5
+    system.compute(time, gradient=True)
+    system0.compute(time, gradient=True)
+    assert np.allclose(system.lightcurve, system0.lightcurve)
+
+
+def make_bodies():
+    """The system above plus a planet that never transits."""
+    star, b, c = make_system()
+    d = starry.kepler.Secondary()
+    d.r = 0.05
+    d.L = 1e-3
+    d.a = 50
+    d.inc = 85
+    d.porb = 2
+    return [star, b, c, d]
+
+
+def update(bodies, updates):
+    """Apply a list of (body index, parameter, value) updates."""
+    for i, key, value in updates:
+        if type(key) is tuple:
+            bodies[i][key] = value
+        else:
+            setattr(bodies[i], key, value)
+
+
+def test_incremental():
+    """Test the incremental update of the light curve."""
+    time = np.linspace(-0.55, 0.55, 500)
+    bodies = make_bodies()
+    system = starry.kepler.System(*bodies)
+    system.compute(time)
+
+    history = []
+    for updates in [
+        # Planets b and c occult each other near t = 0,
+        # so moving c affects the light curve of b
+        [(2, "inc", 89.7)],
+        # Planet d never overlaps with anything
+        [(3, "a", 55), (3, "L", 2e-3)],
+        # Changing the primary forces a full recompute
+        [(0, "prot", 5.0), (1, "L", 2e-2)],
+        # Several bodies changing at once
+        [(1, "r", 0.12), (2, (1, 0), 0.2), (3, "prot", 0.3)]
+    ]:
+        # Update the system and compare to a fresh one
+        history += updates
+        update(bodies, updates)
+        system.compute(time)
+        bodies0 = make_bodies()
+        update(bodies0, history)
+        system0 = starry.kepler.System(*bodies0)
+        system0.compute(time)
+        assert np.allclose(system.lightcurve, system0.lightcurve)
+        for body, body0 in zip(bodies, bodies0):
+            assert np.allclose(body.lightcurve, body0.lightcurve)
+
+    # Bodies shared between two systems
+    lightcurve = np.array(system.lightcurve)
+    system2 = starry.kepler.System(*bodies)
+    system2.compute(time[::2])
+    system.compute(time)
+    assert np.allclose(system.lightcurve, lightcurve)
+    assert bodies[1].lightcurve.shape[0] == len(time)
+
+
+def test_incremental_radius():
+    """A planet that stops grazing the star when its radius shrinks."""
+    time = np.linspace(-0.1, 0.1, 200)
+
+    def make_grazing(r):
+        star = starry.kepler.Primary()
+        star[1] = 0.4
+        b = starry.kepler.Secondary()
+        b.r = r
+        b.a = 20
+        b.inc = np.arccos(1.15 / 20) * 180 / np.pi
+        return star, b
+
+    star, b = make_grazing(0.2)
+    system = starry.kepler.System(star, b)
+    system.compute(time)
+    assert np.min(system.lightcurve) < 1
+
+    # The old (larger) disk of the planet overlapped the star
+    b.r = 0.1
+    system.compute(time)
+    system0 = starry.kepler.System(*make_grazing(0.1))
+    system0.compute(time)
+    assert np.allclose(system.lightcurve, system0.lightcurve)
+    assert np.allclose(star.lightcurve, 1)
+
+
+def test_geometry_cache():
+    """Test the geometry cache [double]."""
+    run()
+
+
+def test_geometry_cache_multi():
+    """Test the geometry cache [multi]."""
+    run(multi=True)
+
+
+if __name__ == "__main__":
+    test_geometry_cache()
+    test_geometry_cache_multi()
+    test_incremental()
+    test_incremental_radius()
@@ -0,0 +1,74 @@
+"""Test the vectorized Kepler solver."""
+from starry.kepler import Primary, Secondary, System
+import numpy as np
+
+
+def run(ecc, r_m=0, multi=False):
+    """Compare the vectorized and the scalar orbital solutions."""
+    star = Primary(multi=multi)
+    star.r_m = r_m
+    planet = Secondary(multi=multi)
+    planet.r = 0.1
+    planet.L = 1e-3
+    planet.a = 20
+    planet.porb = 3
+    planet.inc = 87
+    planet.ecc = ecc
+    planet.w = 35
+    planet.Omega = 10
+    planet.lambda0 = 60
+    system = System(star, planet)
+    time = np.linspace(-5, 5, 3001)
+
+    # The light curve w/o gradients uses the vectorized solver;
+    # the light curve with gradients solves one time at a time
+    system.compute(time)
+    xyz = np.array([planet.X, planet.Y, planet.Z])
+    lightcurve = np.array(system.lightcurve)
+    system.compute(time, gradient=True)
+    assert np.allclose(xyz, [planet.X, planet.Y, planet.Z],
+                       atol=1e-9, rtol=0)
+    assert np.allclose(lightcurve, system.lightcurve, atol=1e-12, rtol=0)
+
+
+def test_kepler_solver():
+    """Test the vectorized Kepler solver [double]."""
+    for ecc in [0, 0.01, 0.3, 0.7, 0.9]:
+        run(ecc)
+        run(ecc, r_m=6.95700e8)
+
+
+def test_high_eccentricity():
+    """Test the vectorized Kepler solver close to ecc = 1."""
+    # The iterative scalar solver may not converge here, so
+    # we check that the orbits are periodic & bounded instead
+    star = Primary()
+    planet = Secondary()
+    planet.a = 20
+    planet.porb = 3
+    planet.w = 35
+    system = System(star, planet)
+    time = np.linspace(0, 3, 3001)
+    for ecc in [0.99, 0.999]:
+        planet.ecc = ecc
+        system.compute(np.concatenate((time, time + 3)))
+        x, y, z = planet.X, planet.Y, planet.Z
+        assert np.allclose(x[:3001], x[3001:])
+        assert np.allclose(y[:3001], y[3001:])
+        assert np.allclose(z[:3001], z[3001:])
+        r = np.sqrt(x ** 2 + y ** 2 + z ** 2)
+        assert np.all(r >= planet.a * (1 - ecc) * (1 - 1e-10))
+        assert np.all(r <= planet.a * (1 + ecc) * (1 + 1e-10))
+
+
+def test_kepler_solver_multi():
+    """Test the vectorized Kepler solver [multi]."""
+    for ecc in [0.3, 0.9]:
+        run(ecc, multi=True)
+        run(ecc, r_m=6.95700e8, multi=True)
+
+
+if __name__ == "__main__":
+    test_kepler_solver()
+    test_high_eccentricity()
+    test_kepler_solver_multi()
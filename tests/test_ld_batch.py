@@ -0,0 +1,68 @@
+"""Test the batched limb darkening solution vectors."""
+import starry
+from starry.kepler import Primary, Secondary, System
+import numpy as np
+
+
+def test_ld_batch():
+    """Compare the batched flux to the flux computed sample by sample."""
+    # Include complete, grazing & no occultations,
+    # and the special cases b = 0 and ro = 0
+    xo = np.linspace(-1.3, 1.3, 1001)
+    xo[500] = 0
+    ro = np.linspace(0.001, 1.5, 1001)
+    ro[-1] = 0
+    for lmax in [1, 2, 3, 6]:
+        map = starry.Map(lmax)
+        for l in range(1, lmax + 1):
+            map[l] = 0.3 / l
+        flux = map.flux(xo=xo, yo=0, ro=ro)
+        flux_scalar = [map.flux(xo=x, yo=0, ro=r) for x, r in zip(xo, ro)]
+        assert np.allclose(flux, np.ravel(flux_scalar), atol=1e-14, rtol=0)
+
+
+def test_ld_batch_tabulated():
+    """Mix of tabulated & exact samples in a single batch."""
+    map = starry.Map(2)
+    map[1] = 0.4
+    map[2] = 0.26
+    xo = np.linspace(-1.3, 1.3, 1001)
+    ro = np.linspace(0.01, 0.3, 1001)
+    map.tabulate(0.12, tol=1e-10, res=256)
+    flux = map.flux(xo=xo, yo=0.1, ro=ro)
+    flux_scalar = [map.flux(xo=x, yo=0.1, ro=r) for x, r in zip(xo, ro)]
+    assert np.allclose(flux, np.ravel(flux_scalar), atol=1e-14, rtol=0)
+
+
+def test_ld_batch_system():
+    """The occultations of a system are computed in a single batch."""
+    star = Primary()
+    star[1] = 0.4
+    star[2] = 0.26
+    b = Secondary()
+    b.r = 0.1
+    b.L = 1e-3
+    b.a = 20
+    b.porb = 1
+    b.inc = 89.5
+    c = Secondary()
+    c.r = 0.05
+    c.L = 1e-4
+    c.a = 30
+    c.porb = 1.8
+    c.inc = 89.8
+    system = System(star, b, c)
+    time = np.linspace(-0.1, 0.1, 1000)
+    system.compute(time)
+
+    # Compare to the light curve computed one time at a time
+    flux = np.array(system.lightcurve)
+    for t, f in zip(time[::10], flux[::10]):
+        system.compute([t])
+        assert np.allclose(system.lightcurve, f, atol=1e-14, rtol=0)
+
+
+if __name__ == "__main__":
+    test_ld_batch()
+    test_ld_batch_tabulated()
+    test_ld_batch_system()
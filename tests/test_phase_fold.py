@@ -0,0 +1,71 @@
+"""Test the phase folding of strictly periodic light curves."""
+from starry.kepler import Primary, Secondary, System
+import numpy as np
+
+
+def make_system(r_m=0):
+    """A limb-darkened star and an eccentric planet."""
+    star = Primary()
+    star[1] = 0.4
+    star[2] = 0.26
+    star.r_m = r_m
+    planet = Secondary()
+    planet.r = 0.1
+    planet.L = 1e-3
+    planet.a = 20
+    planet.porb = 1.3
+    planet.inc = 89.5
+    planet.ecc = 0.2
+    planet.w = 30
+    planet.tref = 0.1
+    return System(star, planet)
+
+
+def test_phase_fold():
+    """Compare the folded light curve to the exact one."""
+    # Many epochs, with an incommensurate cadence
+    time = np.arange(-60, 60, 0.00137)
+    for r_m in [0, 6.95700e8]:
+        system = make_system(r_m)
+        system.compute(time)
+        flux = np.array(system.lightcurve)
+        system.fold_tol = 1e-10
+        system.compute(time)
+        assert np.allclose(system.lightcurve, flux, atol=1e-9, rtol=0)
+
+
+def test_phase_fold_gradient():
+    """Compare the folded gradient to the exact one."""
+    time = np.arange(-60, 60, 0.005)
+    system = make_system()
+    system.compute(time, gradient=True)
+    flux = np.array(system.lightcurve)
+    grad = dict(system.gradient)
+    system.fold_tol = 1e-10
+    system.compute(time, gradient=True)
+    assert np.allclose(system.lightcurve, flux, atol=1e-9, rtol=0)
+    # The tolerance applies to the flux, not its derivatives,
+    # so we compare the gradient relative to its magnitude
+    for key, value in system.gradient.items():
+        atol = 1e-7 * np.max(np.abs(grad[key])) + 1e-9
+        assert np.allclose(value, grad[key], atol=atol, rtol=0), key
+
+
+def test_not_periodic():
+    """Light curves that aren't strictly periodic are not folded."""
+    time = np.arange(-5, 5, 0.0037)
+    system = make_system()
+    planet = system.secondaries[0]
+    planet[1, 0] = 0.5
+    planet.prot = 0.77
+    system.compute(time)
+    flux = np.array(system.lightcurve)
+    system.fold_tol = 1e-3
+    system.compute(time)
+    assert np.allclose(system.lightcurve, flux, atol=1e-12, rtol=0)
+
+
+if __name__ == "__main__":
+    test_phase_fold()
+    test_phase_fold_gradient()
+    test_not_periodic()
@@ -49,5 +49,38 @@ def test_phasecurves():
     assert error < 1e-4
 
 
+def run_fourier(nwav=1, multi=False):
+    """Compare the Fourier phase curve to the rotation-based flux."""
+    map = Map(6, nwav=nwav, multi=multi)
+    if nwav == 1:
+        coeff = lambda c: c
+    else:
+        coeff = lambda c: c * np.ones(nwav)
+    for l in range(1, 7):
+        for m in range(-l, l + 1):
+            map[l, m] = coeff(np.random.randn() / l ** 2)
+    theta = np.linspace(-180, 540, 100)
+
+    # Change the axis and the coefficients between
+    # evaluations to check that the coefficients are updated
+    for axis in [[0, 1, 0], [1, 2, 3], [0, 0, -1]]:
+        map.axis = axis
+        map[3, 2] = coeff(np.random.randn())
+        flux = map.flux(theta=theta)
+        flux_scalar = np.reshape([map.flux(theta=t) for t in theta],
+                                 np.shape(flux))
+        flux_rot = map.flux(theta=theta, gradient=True)[0]
+        assert np.allclose(flux, flux_rot)
+        assert np.allclose(flux_scalar, flux_rot)
+
+
+def test_fourier():
+    """Test the Fourier phase curve engine."""
+    run_fourier()
+    run_fourier(multi=True)
+    run_fourier(nwav=2)
+
+
 if __name__ == "__main__":
     test_phasecurves()
+    test_fourier()
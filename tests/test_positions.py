@@ -0,0 +1,94 @@
+"""Test the orbit-only `System.positions` method."""
+from starry.kepler import Primary, Secondary, System
+import numpy as np
+
+
+def make_system(r_m=0):
+    """A star and two eccentric planets."""
+    star = Primary()
+    star.r_m = r_m
+    b = Secondary()
+    b.r = 0.1
+    b.a = 20
+    b.porb = 3
+    b.inc = 87
+    b.ecc = 0.3
+    b.w = 35
+    b.Omega = 10
+    b.lambda0 = 60
+    b.tref = 0.1
+    c = Secondary()
+    c.r = 0.05
+    c.a = 40
+    c.porb = 8
+    c.inc = 89
+    c.ecc = 0.1
+    c.w = 120
+    return System(star, b, c)
+
+
+def test_positions():
+    """Compare the positions to those computed in `compute`."""
+    time = np.linspace(-5, 5, 1000)
+    for r_m in [0, 6.95700e8]:
+        system = make_system(r_m)
+        X, Y, Z = system.positions(time)
+        assert X.shape == (len(time), 2)
+        system.compute(time)
+        for i, sec in enumerate(system.secondaries):
+            assert np.allclose(X[:, i], sec.X)
+            assert np.allclose(Y[:, i], sec.Y)
+            assert np.allclose(Z[:, i], sec.Z)
+
+        # The AutoDiff solver agrees with the vectorized one
+        (X2, Y2, Z2), _ = system.positions(time, gradient=True)
+        assert np.allclose(X, X2, atol=1e-10)
+        assert np.allclose(Y, Y2, atol=1e-10)
+        assert np.allclose(Z, Z2, atol=1e-10)
+
+
+def run_gradient(r_m):
+    """Compare the gradient of the positions to finite differences."""
+    time = np.linspace(-2, 2, 27)
+    system = make_system(r_m)
+    (X, Y, Z), grad = system.positions(time, gradient=True)
+
+    # The light travel time delay is computed with some
+    # cancellation error, so we need a larger step
+    if r_m > 0:
+        eps = 1e-4
+    else:
+        eps = 1e-6
+
+    # Time
+    (X1, Y1, Z1) = system.positions(time + eps)
+    (X0, Y0, Z0) = system.positions(time - eps)
+    for D, P1, P0 in zip("XYZ", [X1, Y1, Z1], [X0, Y0, Z0]):
+        assert np.allclose(grad[D]["time"], (P1 - P0) / (2 * eps),
+                           atol=1e-5)
+
+    # Orbital parameters
+    for letter, sec in zip(["b", "c"], system.secondaries):
+        for param in ["a", "porb", "inc", "ecc", "w", "Omega",
+                      "lambda0", "tref"]:
+            value = getattr(sec, param)
+            setattr(sec, param, value + eps)
+            (X1, Y1, Z1) = system.positions(time)
+            setattr(sec, param, value - eps)
+            (X0, Y0, Z0) = system.positions(time)
+            setattr(sec, param, value)
+            name = letter + "." + param
+            for D, P1, P0 in zip("XYZ", [X1, Y1, Z1], [X0, Y0, Z0]):
+                assert np.allclose(grad[D][name], (P1 - P0) / (2 * eps),
+                                   atol=1e-5), name
+
+
+def test_positions_gradient():
+    """Test the gradient of the positions."""
+    run_gradient(0)
+    run_gradient(6.95700e8)
+
+
+if __name__ == "__main__":
+    test_positions()
+    test_positions_gradient()
@@ -0,0 +1,88 @@
+"""Test the binary quadruple precision modules."""
+import starry
+from starry.kepler import Primary, Secondary, System
+import numpy as np
+import pytest
+np.random.seed(43)
+quad = pytest.mark.skipif(starry._load("_starry_mono_quad",
+                                       optional=True) is None,
+                          reason="No `__float128` support.")
+
+
+@quad
+def test_quad_map():
+    """Compare to the decimal multi-precision map."""
+    lmax = 10
+    y = 0.1 * np.random.randn((lmax + 1) ** 2)
+    y[0] = 1
+    maps = [starry.Map(lmax, multi=multi) for multi in [False, True, "quad"]]
+    for map in maps:
+        map[:, :] = y
+    assert maps[2].multi == "quad"
+    assert "multi='quad'" in repr(maps[2])
+
+    # Small and large occultors, including the unstable
+    # regions near b = r - 1 and b = r + 1
+    for ro in [0.1, 10]:
+        xo = np.linspace(ro - 1.1, ro + 1.1, 100)
+        flux = [map.flux(theta=30, xo=xo, yo=0, ro=ro) for map in maps]
+        assert np.allclose(flux[2], flux[1], atol=1e-15, rtol=0)
+
+    # Gradients are supported as well
+    _, grad = maps[0].flux(theta=30, xo=0.3, yo=0.2, ro=0.1, gradient=True)
+    _, grad_quad = maps[2].flux(theta=30, xo=0.3, yo=0.2, ro=0.1,
+                                gradient=True)
+    for key in grad.keys():
+        assert np.allclose(grad_quad[key], grad[key], atol=1e-12), key
+
+    # Spectral maps
+    map = starry.Map(2, nwav=3, multi="quad")
+    map[1, 0] = [0.1, 0.2, 0.3]
+    flux = map.flux(xo=0.3, yo=0.2, ro=0.1)
+    for n in range(3):
+        map1 = starry.Map(2)
+        map1[1, 0] = 0.1 * (n + 1)
+        assert np.allclose(flux[0, n], map1.flux(xo=0.3, yo=0.2, ro=0.1),
+                           atol=1e-14)
+
+
+@quad
+def test_quad_system():
+    """Compare a quadruple precision light curve to a double one."""
+    time = np.linspace(-0.25, 3.25, 1000)
+    lightcurves = []
+    for multi in [False, "quad"]:
+        star = Primary(multi=multi)
+        star[1] = 0.4
+        star[2] = 0.26
+        planet = Secondary(lmax=1, multi=multi)
+        planet[1, :] = [0.1, 0.2, 0.3]
+        planet.r = 0.1
+        planet.L = 5e-3
+        planet.a = 10
+        planet.porb = 3
+        planet.prot = 3
+        planet.inc = 89.5
+        system = System(star, planet)
+        system.compute(time)
+        lightcurves.append(system.lightcurve)
+    assert np.allclose(lightcurves[1], lightcurves[0], atol=1e-12)
+
+
+def test_invalid_multi():
+    """Only `False`, `True` and `"quad"` are valid precisions."""
+    for multi in ["dd", "Quad", "float128", 2]:
+        with pytest.raises(ValueError):
+            starry.Map(2, multi=multi)
+        with pytest.raises(ValueError):
+            Primary(multi=multi)
+        with pytest.raises(ValueError):
+            Secondary(multi=multi)
+    for multi in [False, 0, True, 1]:
+        assert starry.Map(2, multi=multi).multi == bool(multi)
+
+
+if __name__ == "__main__":
+    test_quad_map()
+    test_quad_system()
+    test_invalid_multi()
@@ -0,0 +1,79 @@
+"""Test the closed-form quadratic limb darkening solver."""
+import starry
+import numpy as np
+
+
+def test_quadratic_ld():
+    """Compare the quadratic solver to the general one."""
+    xo = np.linspace(-1.3, 1.3, 1001)
+    ro = np.linspace(0.001, 1.5, 1001)
+    for lmax in [3, 5]:
+        map = starry.Map(lmax)
+        map[1] = 0.4
+        map[2] = 0.26
+        flux = map.flux(xo=xo, yo=0.1, ro=ro)
+        flux_scalar = [map.flux(xo=x, yo=0.1, ro=r) for x, r in zip(xo, ro)]
+
+        # A negligible higher order coefficient forces the general solver
+        map[lmax] = 1e-300
+        flux_general = map.flux(xo=xo, yo=0.1, ro=ro)
+        assert np.allclose(flux, flux_general, atol=1e-14, rtol=0)
+        assert np.allclose(np.ravel(flux_scalar), flux_general,
+                           atol=1e-14, rtol=0)
+
+
+def test_quadratic_ld_gradient():
+    """The gradient includes the higher order coefficients."""
+    map = starry.Map(4)
+    map[1] = 0.4
+    map[2] = 0.26
+    xo = np.linspace(-1.3, 1.3, 101)
+    flux, grad = map.flux(xo=xo, yo=0.1, ro=0.1, gradient=True)
+    assert np.allclose(flux, map.flux(xo=xo, yo=0.1, ro=0.1),
+                       atol=1e-14, rtol=0)
+    assert np.all(np.abs(grad["u"][2:]).max(axis=1) > 0)
+
+    # Compare to numerical derivatives
+    eps = 1e-8
+    map[4] = eps
+    dfdu4 = (map.flux(xo=xo, yo=0.1, ro=0.1) - flux) / eps
+    assert np.allclose(grad["u"][3], dfdu4, atol=1e-6, rtol=0)
+
+
+def test_quadratic_ld_closed_form():
+    """Compare the closed-form gradient to the general one."""
+    xo = np.linspace(-1.3, 1.3, 101)
+    ro = np.linspace(0.001, 1.5, 101)
+    for lmax, y00 in [(1, 1), (2, 1), (2, 2)]:
+        map = starry.Map(lmax)
+        map_general = starry.Map(3)
+        for m in [map, map_general]:
+            m[0, 0] = y00
+            m[1] = 0.4
+            if lmax > 1:
+                m[2] = 0.26
+        map_general[3] = 1e-300
+        flux, grad = map.flux(xo=xo, yo=0.1, ro=ro, gradient=True)
+        flux_general, grad_general = map_general.flux(xo=xo, yo=0.1, ro=ro,
+                                                      gradient=True)
+        assert np.allclose(flux, flux_general, atol=1e-14, rtol=0)
+        for key in ["xo", "yo", "ro"]:
+            assert np.allclose(grad[key], grad_general[key],
+                               atol=1e-12, rtol=0), key
+        assert np.allclose(grad["u"], grad_general["u"][:lmax],
+                           atol=1e-12, rtol=0)
+
+        # Compare to numerical derivatives
+        eps = 1e-8
+        map[1] = 0.4 + eps
+        dfdu1 = (map.flux(xo=xo, yo=0.1, ro=ro) - flux) / eps
+        assert np.allclose(grad["u"][0], dfdu1, atol=1e-6, rtol=0)
+        map[1] = 0.4
+        dfdxo = (map.flux(xo=xo + eps, yo=0.1, ro=ro) - flux) / eps
+        assert np.allclose(grad["xo"], dfdxo, atol=1e-6, rtol=0)
+
+
+if __name__ == "__main__":
+    test_quadratic_ld()
+    test_quadratic_ld_gradient()
+    test_quadratic_ld_closed_form()
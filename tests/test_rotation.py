@@ -58,6 +58,33 @@ def run(multi=False):
     assert np.allclose(map(theta=[30, 30, 30]), 0.2617513456622787)
 
 
+def run_batch(nwav=1, multi=False):
+    """Compare the batched and sample-by-sample flux computations."""
+    map = starry.Map(5, nwav=nwav, multi=multi)
+    map.axis = [1, 2, 3]
+    if nwav == 1:
+        coeff = lambda c: c
+    else:
+        coeff = lambda c: c * np.ones(nwav)
+    map[1, :] = coeff(0.2)
+    map[3, -2] = coeff(0.15)
+    map[4, 3] = coeff(-0.1)
+    map[1] = coeff(0.3)
+
+    # Several rotations, in and out of occultation,
+    # including a complete occultation
+    npts = 50
+    theta = np.linspace(-180, 540, npts)
+    xo = np.linspace(-1.5, 1.5, npts)
+    yo = 0.2
+    ro = np.linspace(0.1, 2.0, npts)
+    batch = map.flux(theta=theta, xo=xo, yo=yo, ro=ro)
+    serial = [map.flux(theta=theta[i], xo=xo[i], yo=yo, ro=ro[i])
+              for i in range(npts)]
+    assert np.allclose(batch.reshape(npts, -1),
+                       np.reshape(serial, (npts, -1)))
+
+
 def test_rotation_double():
     """Test some elementary rotations [double]."""
     return run(multi=False)
@@ -68,6 +95,14 @@ def test_rotation_multi():
     return run(multi=True)
 
 
+def test_rotation_batch():
+    """Test the batched rotation used in flux evaluations."""
+    run_batch()
+    run_batch(multi=True)
+    run_batch(nwav=3)
+
+
 if __name__ == "__main__":
     test_rotation_double()
     test_rotation_multi()
+    test_rotation_batch()
@@ -152,5 +152,38 @@ def test_gradients(plot=False):
             pl.close()
 
 
+def test_gradients_edge_on():
+    """Test the inc and Omega gradients when the sky transform is trivial."""
+    def lightcurve(inc, Omega, gradient=False):
+        A = Primary()
+        A[1] = 0.4
+        b = Secondary(lmax=1)
+        b.r = 0.1
+        b.L = 1e-2
+        b.a = 20
+        b.porb = 10
+        b.prot = 10
+        b[1, :] = [0.3, 0.1, 0.2]
+        b.inc = inc
+        b.Omega = Omega
+        system = System(A, b)
+        system.compute(time, gradient=gradient)
+        if gradient:
+            return dict(system.gradient)
+        else:
+            return np.array(system.lightcurve)
+
+    # Phase curve & secondary eclipse
+    time = np.linspace(4.5, 5.5, 50)
+    grad = lightcurve(90, 0, gradient=True)
+    eps = 1e-4
+    dfdinc = (lightcurve(90 + eps, 0) - lightcurve(90 - eps, 0)) / (2 * eps)
+    dfdOmega = (lightcurve(90, eps) - lightcurve(90, -eps)) / (2 * eps)
+    for key, num in [("b.inc", dfdinc), ("b.Omega", dfdOmega)]:
+        assert np.all(np.isfinite(grad[key])), key
+        assert np.allclose(grad[key], num, atol=1e-8), key
+
+
 if __name__ == "__main__":
     test_gradients(True)
+    test_gradients_edge_on()
@@ -0,0 +1,125 @@
+"""Test the tabulated occultation solution vectors."""
+import starry
+from starry.kepler import Primary, Secondary, System
+import numpy as np
+import pytest
+import tempfile
+import shutil
+import os
+
+
+def compare(map, tol, res, rmax=0.12):
+    """Compare the tabulated flux & gradient to the exact ones."""
+    # Include grazing & full occultations and tiny occultors
+    xo = np.linspace(-1.2, 1.2, 1001)
+    ro = np.linspace(0.001, 0.15, 1001)
+    flux = map.flux(xo=xo, yo=0.1, ro=ro)
+    _, grad = map.flux(xo=xo, yo=0.1, ro=ro, gradient=True)
+    map.tabulate(rmax, tol=tol, res=res)
+    flux_tab = map.flux(xo=xo, yo=0.1, ro=ro)
+    _, grad_tab = map.flux(xo=xo, yo=0.1, ro=ro, gradient=True)
+
+    # The tables were actually used
+    assert np.any(flux_tab != flux)
+
+    # The flux is a sum over the solution vector, so we allow
+    # for an error of `tol` in each of its terms
+    norm = np.sum(np.abs(map.y)) + np.sum(np.abs(map.u))
+    assert np.allclose(flux_tab, flux, atol=norm * tol, rtol=0)
+    for key in ["xo", "yo", "ro"]:
+        assert np.allclose(grad_tab[key], grad[key],
+                           atol=4 * norm * tol * res, rtol=0), key
+
+    # Discard the tables
+    map.tabulate(0)
+    assert np.array_equal(map.flux(xo=xo, yo=0.1, ro=ro), flux)
+
+
+def test_tabulate_ld():
+    """Test the tabulated limb darkening solution vector."""
+    map = starry.Map(3)
+    map[1] = 0.4
+    map[2] = 0.26
+    map[3] = -0.1
+    compare(map, 1e-10, 256)
+
+
+def test_tabulate_ylm():
+    """Test the tabulated spherical harmonic solution vector."""
+    map = starry.Map(2)
+    map[1, 0] = 0.3
+    map[1, 1] = 0.1
+    map[2, -1] = -0.2
+    compare(map, 1e-8, 128)
+
+
+def test_tabulate_file():
+    """Test saving and memory-mapping the tables."""
+    path = tempfile.mkdtemp()
+    try:
+        xo = np.linspace(-1.2, 1.2, 1001)
+        map = starry.Map(2)
+        map[1] = 0.4
+        map[2] = 0.26
+        map.tabulate(0.12, tol=1e-10, res=256, path=path)
+        flux = map.flux(xo=xo, yo=0.1, ro=0.1)
+        files = os.listdir(path)
+        assert len(files) == 1
+        file = os.path.join(path, files[0])
+        mtime = os.path.getmtime(file)
+
+        # A different map loads the table instead of computing it
+        map2 = starry.Map(2)
+        map2[1] = 0.4
+        map2[2] = 0.26
+        map2.tabulate(0.12, tol=1e-10, res=256, path=path)
+        assert np.array_equal(map2.flux(xo=xo, yo=0.1, ro=0.1), flux)
+        assert os.listdir(path) == files
+        assert os.path.getmtime(file) == mtime
+
+        # Tables with different settings live in different files
+        map2.tabulate(0.12, tol=1e-9, res=256, path=path)
+        map2.flux(xo=xo, yo=0.1, ro=0.1)
+        assert len(os.listdir(path)) == 2
+    finally:
+        shutil.rmtree(path)
+
+
+def test_tabulate_system():
+    """Test tabulating the primary's solution vector in a system."""
+    star = Primary()
+    star[1] = 0.4
+    star[2] = 0.26
+    planet = Secondary()
+    planet.r = 0.1
+    planet.a = 20
+    planet.inc = 89.5
+    system = System(star, planet)
+    time = np.linspace(-0.1, 0.1, 1000)
+    system.compute(time)
+    flux = np.array(system.lightcurve)
+
+    # The light curve is recomputed with the tables
+    star.tabulate(0.12, tol=1e-10, res=256)
+    system.compute(time)
+    assert np.any(system.lightcurve != flux)
+    assert np.allclose(system.lightcurve, flux, atol=1e-9, rtol=0)
+
+
+def test_tabulate_errors():
+    """Test the sanity checks on the table settings."""
+    map = starry.Map(2)
+    with pytest.raises(RuntimeError):
+        map.tabulate(-0.1)
+    with pytest.raises(RuntimeError):
+        map.tabulate(0.1, tol=0)
+    with pytest.raises(RuntimeError):
+        map.tabulate(0.1, res=5)
+
+
+if __name__ == "__main__":
+    test_tabulate_ld()
+    test_tabulate_ylm()
+    test_tabulate_file()
+    test_tabulate_system()
+    test_tabulate_errors()
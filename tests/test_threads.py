@@ -0,0 +1,143 @@
+"""Test multi-threaded flux evaluation."""
+import starry
+import numpy as np
+from threading import Thread
+
+
+def run(nwav=1, multi=False, gradient=False):
+    """Compare the threaded and serial flux computations."""
+    # Instantiate a map with spots, limb darkening and a tilted axis
+    map = starry.Map(5, nwav=nwav, multi=multi)
+    map.axis = [1, 2, 3]
+    if nwav == 1:
+        coeff = lambda c: c
+    else:
+        coeff = lambda c: c * np.ones(nwav)
+    map[1, :] = coeff(0.2)
+    map[2, 1] = coeff(0.1)
+    map[1] = coeff(0.4)
+    map[2] = coeff(0.26)
+
+    # A light curve with an occultation
+    npts = 100
+    theta = np.linspace(0, 360, npts)
+    xo = np.linspace(-1.5, 1.5, npts)
+    yo = 0.1
+    ro = 0.3
+
+    # Serial evaluation
+    serial = map.flux(theta=theta, xo=xo, yo=yo, ro=ro,
+                      gradient=gradient)
+
+    # Threaded evaluation: results should be identical
+    for threads in [2, 3, 0]:
+        threaded = map.flux(theta=theta, xo=xo, yo=yo, ro=ro,
+                            gradient=gradient, threads=threads)
+        if gradient:
+            assert np.array_equal(serial[0], threaded[0])
+            for key in serial[1].keys():
+                assert np.array_equal(serial[1][key], threaded[1][key])
+        else:
+            assert np.array_equal(serial, threaded)
+
+
+def test_threads_double():
+    """Test threaded flux evaluation [double]."""
+    run()
+    run(gradient=True)
+
+
+def test_threads_multi():
+    """Test threaded flux evaluation [multi]."""
+    run(multi=True)
+
+
+def test_threads_spectral():
+    """Test threaded flux evaluation [spectral]."""
+    run(nwav=2)
+    run(nwav=2, gradient=True)
+
+
+def test_worker_state():
+    """Test that the worker copies follow changes to the map."""
+    map = starry.Map(3)
+    theta = np.linspace(0, 360, 200)
+    xo = np.linspace(-1.5, 1.5, 200)
+    for i in range(3):
+        if i == 1:
+            map[2, -1] = 0.3
+            map[1] = 0.4
+        elif i == 2:
+            map.axis = [1, 0, 1]
+        serial = map.flux(theta=theta, xo=xo, yo=0.1, ro=0.3)
+        threaded = map.flux(theta=theta, xo=xo, yo=0.1, ro=0.3, threads=4)
+        assert np.array_equal(serial, threaded)
+
+
+def test_release_gil():
+    """Test concurrent evaluation of separate maps and systems."""
+    # Maps
+    npts = 1000
+    xo = np.linspace(-1.5, 1.5, npts)
+    maps = [starry.Map(3) for i in range(4)]
+    for i, map in enumerate(maps):
+        map[1, 0] = 0.1 * i
+        map[1] = 0.4
+    serial = [map.flux(theta=30, xo=xo, yo=0.1, ro=0.1) for map in maps]
+    threaded = [None for map in maps]
+
+    def flux(i):
+        threaded[i] = maps[i].flux(theta=30, xo=xo, yo=0.1, ro=0.1)
+
+    threads = [Thread(target=flux, args=(i,)) for i in range(len(maps))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for i in range(len(maps)):
+        assert np.array_equal(serial[i], threaded[i])
+
+    # Systems
+    time = np.linspace(-0.25, 0.25, npts)
+    systems = []
+    for i in range(4):
+        star = starry.kepler.Primary()
+        star[1] = 0.4
+        planet = starry.kepler.Secondary()
+        planet.r = 0.1 + 0.01 * i
+        systems.append(starry.kepler.System(star, planet))
+    serial = []
+    for system in systems:
+        system.compute(time)
+        serial.append(np.array(system.lightcurve))
+    threads = [Thread(target=system.compute, args=(time,))
+               for system in systems]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for i, system in enumerate(systems):
+        assert np.array_equal(serial[i], system.lightcurve)
+
+
+def test_broadcasting():
+    """Test that the output of `flux` has the broadcast shape."""
+    map = starry.Map(2)
+    map[1, 0] = 0.5
+    assert np.ndim(map.flux(theta=30)) == 0
+    theta = np.linspace(0, 360, 12).reshape(3, 4)
+    xo = np.linspace(-1, 1, 4)
+    flux = map.flux(theta=theta, xo=xo, ro=0.1)
+    assert flux.shape == (3, 4)
+    for i in range(3):
+        assert np.array_equal(flux[i], map.flux(theta=theta[i], xo=xo, ro=0.1))
+    assert map(theta=theta, x=0.1).shape == (3, 4)
+
+
+if __name__ == "__main__":
+    test_threads_double()
+    test_threads_multi()
+    test_threads_spectral()
+    test_worker_state()
+    test_release_gil()
+    test_broadcasting()
@@ -1,7 +1,11 @@
 """Test the code run time."""
+import starry
 from starry import Map
 import numpy as np
 import time
+import subprocess
+import sys
+import os
 
 
 def test_small(benchmark=0.1):
@@ -56,6 +60,31 @@ def test_large(benchmark=0.1):
     print("Time [Benchmark]: %.3f [%.3f]" % (t, benchmark))
 
 
+def test_import(benchmark=0.25):
+    """Import time of the package in a fresh interpreter."""
+    # Only the double precision module is loaded on import;
+    # the others are loaded the first time they are used
+    script = "import numpy, time, sys; " \
+             "tstart = time.time(); import starry; " \
+             "print(time.time() - tstart); " \
+             "print(','.join(sorted(m for m in sys.modules " \
+             "if m.startswith('starry._starry'))))"
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.path.dirname(os.path.dirname(starry.__file__))
+    t = np.zeros(5)
+    for i in range(5):
+        out = subprocess.check_output([sys.executable, "-c", script],
+                                      env=env).decode().split()
+        t[i] = float(out[0])
+        assert out[1] == "starry._starry_mono_64,starry._starry_mono_64.kepler"
+    t = np.median(t)
+
+    # Print
+    print("Time [Benchmark]: %.3f [%.3f]" % (t, benchmark))
+    assert t < benchmark
+
+
 if __name__ == "__main__":
     test_small()
     test_large()
+    test_import()
@@ -0,0 +1,62 @@
+"""Speed and accuracy of the quadruple precision modules."""
+from starry import Map
+import time
+import matplotlib.pyplot as pl
+import numpy as np
+
+# Timing params
+number = 3
+npts = 100
+larr = [1, 2, 3, 5, 8, 10, 13, 15]
+ro = 10.
+xo = np.linspace(ro - 1.1, ro + 1.1, npts)
+labels = ['double', 'quad', 'multi']
+kinds = [False, 'quad', True]
+colors = ['C0', 'C1', 'C2']
+ftime = np.zeros((3, len(larr)))
+error = np.zeros((3, len(larr)))
+
+# Loop over the degree of the map
+for i, lmax in enumerate(larr):
+
+    # A random map, the same for all three precisions
+    np.random.seed(lmax)
+    y = 0.1 * np.random.randn((lmax + 1) ** 2)
+    y[0] = 1
+
+    # Occultations by a large body, close to the
+    # ill-conditioned limits b = r - 1 and b = r + 1
+    flux = np.zeros((3, npts))
+    for j, multi in enumerate(kinds):
+        map = Map(lmax, multi=multi)
+        map[:, :] = y
+        tstart = time.time()
+        for k in range(number):
+            flux[j] = map.flux(theta=30, xo=xo, yo=0, ro=ro)
+        ftime[j, i] = (time.time() - tstart) / number / npts
+
+    # Error relative to the decimal multiprecision result
+    for j in range(3):
+        error[j, i] = np.max(np.abs(flux[j] - flux[2]))
+
+# Plot
+fig, ax = pl.subplots(1, 2, figsize=(8, 3))
+for j in range(3):
+    ax[0].plot(larr, ftime[j], 'o-', ms=2, lw=0.5, color=colors[j],
+               label=labels[j])
+    if j < 2:
+        ax[1].plot(larr, error[j] + 1e-18, 'o-', ms=2, lw=0.5,
+                   color=colors[j], label=labels[j])
+
+# Tweak and save
+ax[0].legend(fontsize=9, loc='upper left')
+ax[0].set_ylabel("Time per point [s]", fontsize=10)
+ax[1].set_ylabel("Error relative to multi", fontsize=10)
+for axis in ax:
+    axis.set_xlabel("Spherical harmonic degree", fontsize=10)
+    axis.set_yscale('log')
+
+# Print average ratios
+print(np.median(ftime[2] / ftime[1]))
+print(np.median(ftime[1] / ftime[0]))
+fig.savefig("speed_quad.pdf", bbox_inches='tight')
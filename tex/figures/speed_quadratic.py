@@ -0,0 +1,99 @@
+"""Speed of the quadratic limb darkening solver."""
+from starry import Map
+import time
+import matplotlib.pyplot as pl
+import numpy as np
+import batman
+
+# Input params
+u1 = 0.4
+u2 = 0.26
+rplanet = 0.1   # fraction of stellar radius
+b0 = 0.5        # impact parameter
+
+# Timing params
+number = 10
+nN = 8
+Nmax = 5
+Narr = np.logspace(1, Nmax, nN)
+quad_time = np.zeros(nN)
+general_time = np.zeros(nN)
+quad_grad_time = np.zeros(nN)
+general_grad_time = np.zeros(nN)
+batman_time = np.zeros(nN)
+
+
+def timeit(map, xo, gradient=False):
+    """Average time to compute the light curve of `map`."""
+    tstart = time.time()
+    for k in range(number):
+        map.flux(xo=xo, yo=b0, ro=rplanet, gradient=gradient)
+    return (time.time() - tstart) / number
+
+
+# The quadratically limb-darkened map, which uses the closed-form
+# solver, and a cubic map with a negligible third coefficient,
+# which forces the general solver
+quad_map = Map(2)
+quad_map[1] = u1
+quad_map[2] = u2
+general_map = Map(3)
+general_map[1] = u1
+general_map[2] = u2
+general_map[3] = 1e-300
+
+# Loop over number of cadences
+for i, N in enumerate(Narr):
+
+    # Sky positions of the planet
+    xo = np.linspace(-1.5, 1.5, int(N))
+    t = xo
+
+    # starry, with and without the gradient
+    quad_time[i] = timeit(quad_map, xo)
+    general_time[i] = timeit(general_map, xo)
+    quad_grad_time[i] = timeit(quad_map, xo, gradient=True)
+    general_grad_time[i] = timeit(general_map, xo, gradient=True)
+
+    # batman, with a circular orbit so wide that the
+    # planet moves in a straight line across the star
+    params = batman.TransitParams()
+    params.limb_dark = "quadratic"
+    params.u = [u1, u2]
+    params.t0 = 0.
+    params.ecc = 0
+    params.w = 90.
+    params.rp = rplanet
+    params.a = 1e4
+    params.per = 2 * np.pi * params.a
+    params.inc = np.arccos(b0 / params.a) * 180 / np.pi
+    m = batman.TransitModel(params, t, nthreads=1)
+    tstart = time.time()
+    for k in range(number):
+        m.light_curve(params)
+    batman_time[i] = (time.time() - tstart) / number
+
+# Plot
+fig, ax = pl.subplots(1, figsize=(4, 3))
+for y, label, color, ls in zip([quad_time, general_time, quad_grad_time,
+                                general_grad_time, batman_time],
+                               ['starry (quadratic)', 'starry (general)',
+                                'starry (quadratic + grad)',
+                                'starry (general + grad)', 'batman'],
+                               ['C0', 'C2', 'C0', 'C2', 'C1'],
+                               ['-', '-', '--', '--', '-']):
+    ax.plot(Narr, y, 'o', ms=2, color=color)
+    ax.plot(Narr, y, ls, lw=0.5, color=color, label=label)
+
+# Tweak and save
+ax.legend(fontsize=7, loc='upper left')
+ax.set_ylabel("Time [s]", fontsize=10)
+ax.set_xlabel("Number of points", fontsize=10)
+ax.set_xscale('log')
+ax.set_yscale('log')
+
+# Print average ratios
+print(np.nanmedian(general_time / quad_time))
+print(np.nanmedian(general_grad_time / quad_grad_time))
+print(np.nanmedian(quad_time / batman_time))
+fig.savefig("speed_quadratic.pdf", bbox_inches='tight')